@@ -1,6 +1,7 @@
 import time
 from utils.db_connection import DatabaseConnection
 from utils.data_generator import BibliotecaDataGenerator
+from utils.metrics import REGISTRO
 
 def main():
     """
@@ -41,6 +42,12 @@ def main():
         print(f"Total de registros: {sum(resultado.values())}")
         print(f"Tempo total de execução: {tempo_total:.2f} segundos")
         print("="*50)
+
+        # Onde o tempo foi gasto: geração x carga de cada lote e latência de
+        # cada instrução enviada ao banco
+        resumo = REGISTRO.resumo()
+        metricas = ["lote_geracao_segundos", "lote_carga_segundos", "db_latencia_segundos"]
+        print(resumo[resumo["metrica"].isin(metricas)].to_string(index=False))
         
     finally:
         # Fecha todas as conexões do pool
@@ -0,0 +1,88 @@
+import utils.benchmark as benchmark
+from utils.benchmark import BenchmarkIndice, etapas_crescimento
+
+
+class GeradorFalso:
+    seed = 42
+    locales = ["pt_BR"]
+    vocabulario = None
+
+    def __init__(self):
+        self.chamadas = []
+
+    def popular_banco(self, **opcoes):
+        self.chamadas.append(opcoes)
+        return {"usuarios": 0, "livros": 0, "emprestimos": 0}
+
+
+def _preparar(monkeypatch, existentes):
+    """
+    Substitui as funções de snapshot e de banco por versões em memória.
+    Retorna a lista de chaves salvas.
+    """
+    salvas = []
+    linhas = {"usuarios": 1, "livros": 1, "emprestimos": 1}
+    monkeypatch.setattr(benchmark, "existe_snapshot", lambda chave: chave in existentes)
+    monkeypatch.setattr(
+        benchmark, "restaurar_snapshot", lambda chave, analisar: {"linhas": linhas}
+    )
+
+    def salvar(chave, metodo):
+        salvas.append(chave)
+        return {"linhas": linhas}
+
+    monkeypatch.setattr(benchmark, "salvar_snapshot", salvar)
+    monkeypatch.setattr(benchmark, "_contar_linhas", lambda: linhas)
+    monkeypatch.setattr(benchmark, "execute_query", lambda *args: None)
+    monkeypatch.setattr(
+        BenchmarkIndice, "medir", lambda self, etapa, total: [{"etapa": etapa, "total": total}]
+    )
+    return salvas
+
+
+def _chaves(gerador, etapas):
+    chaves, acumulado = [], {"num_usuarios": 0, "num_livros": 0, "num_emprestimos": 0}
+    for quantidades in etapas:
+        for campo in acumulado:
+            acumulado[campo] += quantidades[campo]
+        chaves.append(benchmark.chave_snapshot(gerador.seed, gerador.locales, acumulado, ""))
+    return chaves
+
+
+def test_etapas_geradas_sao_salvas(monkeypatch):
+    gerador = GeradorFalso()
+    etapas = etapas_crescimento(2, 1000)
+    salvas = _preparar(monkeypatch, existentes=set())
+
+    BenchmarkIndice("teste", "SELECT 1", []).executar(gerador, etapas, snapshot="copy")
+
+    assert salvas == _chaves(gerador, etapas)
+    assert [chamada["clear"] for chamada in gerador.chamadas] == [True, False]
+
+
+def test_etapa_gerada_depois_de_restaurar_nao_e_salva(monkeypatch):
+    gerador = GeradorFalso()
+    etapas = etapas_crescimento(2, 1000)
+    chaves = _chaves(gerador, etapas)
+    salvas = _preparar(monkeypatch, existentes={chaves[0]})
+
+    BenchmarkIndice("teste", "SELECT 1", []).executar(gerador, etapas, snapshot="copy")
+
+    # A etapa 2 é gerada sobre a 1 restaurada, mas com o gerador no estado
+    # inicial: salvá-la envenenaria a chave acumulada
+    assert salvas == []
+    assert len(gerador.chamadas) == 1
+    assert "clear" not in gerador.chamadas[0]
+
+
+def test_sem_snapshot_limpa_na_primeira_etapa_e_conta_as_tabelas(monkeypatch):
+    gerador = GeradorFalso()
+    etapas = etapas_crescimento(2, 1000)
+    salvas = _preparar(monkeypatch, existentes=set())
+
+    resultado = BenchmarkIndice("teste", "SELECT 1", []).executar(gerador, etapas)
+
+    assert salvas == []
+    assert [chamada["clear"] for chamada in gerador.chamadas] == [True, False]
+    # O total vem das tabelas, como no caminho com snapshots
+    assert resultado["total"].tolist() == [3, 3]
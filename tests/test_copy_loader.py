@@ -0,0 +1,135 @@
+import json
+import struct
+from datetime import date, datetime
+import numpy as np
+import pytest
+from utils.copy_loader import (
+    formatar_valor_texto,
+    gerar_buffer_binario,
+    gerar_buffer_texto,
+    gerar_buffer_texto_colunar,
+    pontos_poligono,
+    tabela_staging,
+)
+
+CABECALHO = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+TRAILER = struct.pack("!h", -1)
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (None, "\\N"),
+    (True, "t"),
+    (False, "f"),
+    (42, "42"),
+    ("a\tb\nc\\d\re", "a\\tb\\nc\\\\d\\re"),
+    (date(2024, 2, 29), "2024-02-29"),
+    # As barras do literal de array são escapadas de novo pelo formato texto
+    (["ação", 'com "aspas"', None], '{"ação","com \\\\"aspas\\\\"",NULL}'),
+    (["a\\b"], '{"a\\\\\\\\b"}'),
+    ({"k": [1, 2]}, '{"k": [1, 2]}'),
+])
+def test_formatar_valor_texto(valor, esperado):
+    assert formatar_valor_texto(valor) == esperado
+
+
+def test_buffer_texto():
+    buffer = gerar_buffer_texto([(1, "x y", None), (2, "a\tb", True)])
+    assert buffer.read() == "1\tx y\t\\N\n2\ta\\tb\tt\n"
+
+
+def test_buffer_texto_colunar_igual_ao_por_linhas():
+    colunas = {
+        "id": np.array([1, 2, 3]),
+        "nome": ["ana", "b\tc", None],
+        "ativo": np.array([True, False, True]),
+        "data": np.array(["2024-01-01", "NaT", "2023-12-31"], dtype="datetime64[D]"),
+        "tags": [["x"], [], ["y", "z"]],
+    }
+    linhas = [
+        (1, "ana", True, date(2024, 1, 1), ["x"]),
+        (2, "b\tc", False, None, []),
+        (3, None, True, date(2023, 12, 31), ["y", "z"]),
+    ]
+    ordem = ["id", "nome", "ativo", "data", "tags"]
+    assert gerar_buffer_texto_colunar(colunas, ordem).read() == gerar_buffer_texto(linhas).read()
+
+
+def _ler_campos(dados):
+    """
+    Decodifica as linhas de um buffer binário do COPY em listas de campos brutos.
+    """
+    assert dados.startswith(CABECALHO)
+    assert dados.endswith(TRAILER)
+    pos = len(CABECALHO)
+    linhas = []
+    while True:
+        (num_campos,) = struct.unpack_from("!h", dados, pos)
+        pos += 2
+        if num_campos == -1:
+            break
+        campos = []
+        for _ in range(num_campos):
+            (tamanho,) = struct.unpack_from("!i", dados, pos)
+            pos += 4
+            if tamanho == -1:
+                campos.append(None)
+            else:
+                campos.append(dados[pos:pos + tamanho])
+                pos += tamanho
+        linhas.append(campos)
+    assert pos == len(dados)
+    return linhas
+
+
+def test_buffer_binario_vazio():
+    assert gerar_buffer_binario([], ["int4"]).read() == CABECALHO + TRAILER
+
+
+def test_buffer_binario_escalares_e_nulos():
+    tipos = ["int4", "int8", "float8", "bool", "text", "date"]
+    rows = [
+        (7, 2**40, 1.5, True, "ação", date(2000, 1, 2)),
+        (None, None, None, False, None, datetime(1999, 12, 31, 10, 0)),
+    ]
+    linhas = _ler_campos(gerar_buffer_binario(rows, tipos).read())
+    assert linhas == [
+        [struct.pack("!i", 7), struct.pack("!q", 2**40), struct.pack("!d", 1.5),
+         b"\x01", "ação".encode("utf-8"), struct.pack("!i", 1)],
+        [None, None, None, b"\x00", None, struct.pack("!i", -1)],
+    ]
+
+
+def test_buffer_binario_jsonb():
+    (linha,) = _ler_campos(gerar_buffer_binario([({"a": 1}, '{"b": 2}')], ["jsonb", "jsonb"]).read())
+    assert linha[0][:1] == b"\x01" and json.loads(linha[0][1:]) == {"a": 1}
+    assert linha[1] == b'\x01{"b": 2}'
+
+
+def test_buffer_binario_polygon():
+    assert pontos_poligono("((0,0),(1.5,-2),(3e1,4))") == [(0.0, 0.0), (1.5, -2.0), (30.0, 4.0)]
+    (linha,) = _ler_campos(gerar_buffer_binario([("((0,0),(1,2))",)], ["polygon"]).read())
+    assert linha[0] == struct.pack("!idddd", 2, 0, 0, 1, 2)
+
+
+def test_buffer_binario_text_array():
+    rows = [(["a", None, "ção"],), ([],)]
+    cheio, vazio = _ler_campos(gerar_buffer_binario(rows, ["text[]"]).read())
+    assert cheio[0] == (
+        struct.pack("!iiiii", 1, 1, 25, 3, 1)
+        + struct.pack("!i", 1) + b"a"
+        + struct.pack("!i", -1)
+        + struct.pack("!i", 5) + "ção".encode("utf-8")
+    )
+    assert vazio[0] == struct.pack("!iii", 0, 0, 25)
+
+
+def test_buffer_binario_tipo_sem_suporte():
+    with pytest.raises(ValueError, match="numeric"):
+        gerar_buffer_binario([(1,)], ["numeric"])
+
+
+def test_tabela_staging_por_conjunto_de_colunas():
+    assert tabela_staging("livros", ["id", "titulo"]) == tabela_staging("livros", ["id", "titulo"])
+    assert tabela_staging("livros", ["id", "titulo"]) != tabela_staging("livros", ["titulo"])
+    assert tabela_staging("livros", ["id"]) != tabela_staging("usuarios", ["id"])
+    assert tabela_staging("emprestimos", ["id"]).startswith("_staging_emprestimos_")
@@ -0,0 +1,59 @@
+import pytest
+from utils.db_connection import _copy_sql, prepare_statement
+
+
+class CursorFalso:
+    def __init__(self, comandos):
+        self.comandos = comandos
+
+    def execute(self, sql, params=None):
+        self.comandos.append(sql)
+
+
+class ConexaoFalsa:
+    def __init__(self):
+        self.comandos = []
+
+    def cursor(self):
+        return CursorFalso(self.comandos)
+
+
+def test_prepare_statement_uma_vez_por_consulta():
+    conn = ConexaoFalsa()
+    nome = prepare_statement(conn, "SELECT * FROM livros WHERE id = %s")
+    assert prepare_statement(conn, "SELECT * FROM livros WHERE id = %s") == nome
+    assert conn.comandos == [f"PREPARE {nome} AS SELECT * FROM livros WHERE id = $1"]
+
+
+def test_prepare_statement_por_nome():
+    conn = ConexaoFalsa()
+    query = "SELECT * FROM livros WHERE id = %s"
+    derivado = prepare_statement(conn, query)
+    assert prepare_statement(conn, query, name="busca_livro") == "busca_livro"
+    assert prepare_statement(conn, query, name="busca_livro") == "busca_livro"
+    assert conn.comandos == [
+        f"PREPARE {derivado} AS SELECT * FROM livros WHERE id = $1",
+        "PREPARE busca_livro AS SELECT * FROM livros WHERE id = $1",
+    ]
+
+
+def test_prepare_statement_nome_com_outra_consulta():
+    conn = ConexaoFalsa()
+    prepare_statement(conn, "SELECT * FROM livros WHERE id = %s", name="busca")
+    with pytest.raises(ValueError, match="busca"):
+        prepare_statement(conn, "SELECT * FROM usuarios WHERE id = %s", name="busca")
+    assert len(conn.comandos) == 1
+
+
+@pytest.mark.parametrize("sql, esperado", [
+    ("SELECT 1;", "SELECT 1"),
+    ("  SELECT 1 /* bloco */ ;  ", "SELECT 1 /* bloco */ "),
+    ("SELECT '--;' AS x", "SELECT '--;' AS x"),
+    ('SELECT 1 AS "a--b"', 'SELECT 1 AS "a--b"'),
+    ("SELECT $$;--$$", "SELECT $$;--$$"),
+    ("SELECT 1 -- comentário", None),
+    ("SELECT 1; -- comentário", None),
+    ("SELECT 1; SELECT 2", None),
+])
+def test_copy_sql(sql, esperado):
+    assert _copy_sql(sql) == esperado
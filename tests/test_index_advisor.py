@@ -0,0 +1,38 @@
+import pytest
+from utils.benchmark import comandos_remocao
+from utils.index_advisor import _candidato_extra
+
+
+def test_extra_com_nome_recebe_nome_de_candidato():
+    candidato = _candidato_extra("CREATE INDEX idx_livros_genero ON livros (genero)", 7)
+    assert candidato["nome"] == "idx_candidato_007_livros_btree"
+    assert candidato["nome_informado"] == "idx_livros_genero"
+    assert candidato["sql"] == "CREATE INDEX idx_candidato_007_livros_btree ON livros (genero)"
+    assert comandos_remocao([candidato["sql"]]) == ["DROP INDEX IF EXISTS idx_candidato_007_livros_btree;"]
+
+
+def test_extra_sem_nome_recebe_nome_antes_do_on():
+    candidato = _candidato_extra("CREATE INDEX ON livros USING gin (citacoes)", 3)
+    assert candidato["nome_informado"] is None
+    assert candidato["metodo"] == "gin"
+    assert candidato["sql"] == "CREATE INDEX idx_candidato_003_livros_gin ON livros USING gin (citacoes)"
+
+
+def test_extra_concurrently_if_not_exists():
+    candidato = _candidato_extra(
+        "create unique index concurrently if not exists uq_isbn on livros (isbn)", 1
+    )
+    assert candidato["nome_informado"] == "uq_isbn"
+    assert candidato["sql"] == (
+        "create unique index concurrently if not exists idx_candidato_001_livros_btree on livros (isbn)"
+    )
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1",
+    "CREATE INDEX a b ON livros (genero)",
+    "CREATE INDEX idx_sem_tabela",
+])
+def test_extra_sem_nome_utilizavel(sql):
+    with pytest.raises(ValueError, match="CREATE INDEX"):
+        _candidato_extra(sql, 1)
@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+import pandas as pd
+import pytest
+from utils import db_connection
+from utils.result_cache import CacheResultados, tabelas_escritas, tabelas_lidas
+
+
+@pytest.mark.parametrize(
+    "query, esperadas",
+    [
+        ("SELECT * FROM livros WHERE id = %s", {"livros"}),
+        ("SELECT * FROM livros l, emprestimos e WHERE l.id = e.livro_id", {"livros", "emprestimos"}),
+        (
+            "SELECT * FROM livros l JOIN emprestimos e ON l.id = e.livro_id, usuarios u",
+            {"livros", "emprestimos", "usuarios"},
+        ),
+        (
+            "SELECT * FROM livros WHERE id IN (SELECT livro_id FROM emprestimos)",
+            {"livros", "emprestimos"},
+        ),
+        (
+            "WITH ativos AS (SELECT * FROM usuarios) "
+            "SELECT * FROM ativos a, (SELECT id FROM livros) l",
+            {"usuarios", "livros"},
+        ),
+        ('SELECT * FROM public."Livros"', {"livros"}),
+        ("SELECT EXTRACT(YEAR FROM data_emprestimo) FROM emprestimos", {"emprestimos"}),
+        ("SELECT 'FROM usuarios' AS texto FROM livros -- FROM emprestimos", {"livros"}),
+        ("SELECT p FROM livros, regexp_split_to_table(titulo, ' ') p", {"livros"}),
+        ("TABLE livros", {"livros"}),
+    ],
+)
+def test_tabelas_lidas(query, esperadas):
+    assert tabelas_lidas(query) == frozenset(esperadas)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT * FROM emprestimos WHERE data_emprestimo > CURRENT_DATE",
+        "SELECT now()",
+        "SELECT * FROM livros ORDER BY random() LIMIT 1",
+        "SELECT * FROM funcao_do_usuario(1)",
+        "SELECT * FROM (livros JOIN emprestimos ON true)",
+    ],
+)
+def test_tabelas_lidas_nao_guardaveis(query):
+    assert tabelas_lidas(query) is None
+
+
+def test_tabelas_escritas():
+    assert tabelas_escritas("SELECT * FROM livros") == frozenset()
+    assert tabelas_escritas("INSERT INTO livros (titulo) VALUES (%s)") == {"livros"}
+    assert tabelas_escritas("TRUNCATE usuarios, livros RESTART IDENTITY") == {"usuarios", "livros"}
+    assert tabelas_escritas("TRUNCATE usuarios CASCADE") is None
+    assert tabelas_escritas("DO $$ BEGIN END $$") is None
+
+
+def _guardar(cache, query):
+    chave = cache.chave(query)
+    tabelas = tabelas_lidas(query)
+    cache.guardar(chave, tabelas, pd.DataFrame({"x": [1]}), cache.versao(tabelas))
+    return chave
+
+
+def test_escrita_invalida_todas_as_tabelas_da_lista():
+    cache = CacheResultados()
+    chave = _guardar(cache, "SELECT * FROM livros l, emprestimos e WHERE l.id = e.livro_id")
+    outra = _guardar(cache, "SELECT * FROM usuarios")
+
+    assert cache.invalidar(tabelas_escritas("DELETE FROM emprestimos")) == 1
+    assert cache.obter(chave) is None
+    assert cache.obter(outra) is not None
+
+
+class CursorFalso:
+    description = None
+    rowcount = 1
+
+    def execute(self, query, params=None):
+        pass
+
+
+class ConexaoFalsa:
+    def cursor(self):
+        return CursorFalso()
+
+    def commit(self):
+        pass
+
+
+def test_execute_concurrently_invalida_escritas(monkeypatch):
+    @contextmanager
+    def conexao(timeout=None):
+        yield ConexaoFalsa()
+
+    monkeypatch.setattr(db_connection.DatabaseConnection, "connection", conexao)
+    monkeypatch.setattr(db_connection.DatabaseConnection, "pool_size", lambda: 2)
+    cache = CacheResultados()
+    monkeypatch.setattr(db_connection, "_result_cache", cache)
+    chave = _guardar(cache, "SELECT * FROM livros")
+    outra = _guardar(cache, "SELECT * FROM usuarios")
+
+    resultado = db_connection.execute_concurrently(["UPDATE livros SET paginas = 1"])
+    assert resultado["erro"].isna().all()
+    assert cache.obter(chave) is None
+    assert cache.obter(outra) is not None
+
+
+def test_invalidar_tudo():
+    cache = CacheResultados()
+    chave = _guardar(cache, "SELECT * FROM livros")
+    cache.invalidar()
+    assert cache.obter(chave) is None
+
+
+def test_resultado_lido_durante_escrita_nao_e_guardado():
+    cache = CacheResultados()
+    tabelas = tabelas_lidas("SELECT * FROM livros")
+    versao = cache.versao(tabelas)
+    cache.invalidar(["livros"])
+    cache.guardar(cache.chave("SELECT * FROM livros"), tabelas, pd.DataFrame(), versao)
+    assert cache.estatisticas()["entradas"] == 0
+
+
+def test_limite_de_entradas_descarta_as_menos_usadas():
+    cache = CacheResultados(max_entradas=2)
+    primeira = _guardar(cache, "SELECT * FROM livros")
+    _guardar(cache, "SELECT * FROM usuarios")
+    cache.obter(primeira)
+    _guardar(cache, "SELECT * FROM emprestimos")
+    assert cache.obter(primeira) is not None
+    assert cache.obter(cache.chave("SELECT * FROM usuarios")) is None
+    assert cache.estatisticas()["descartes"] == 1
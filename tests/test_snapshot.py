@@ -0,0 +1,42 @@
+import json
+import pandas as pd
+import pytest
+from utils import snapshot
+
+
+def _salvar_metadados(diretorio, chave):
+    pasta = diretorio / chave
+    pasta.mkdir()
+    (pasta / "metadados.json").write_text(json.dumps({
+        "chave": chave, "metodo": "template", "linhas": {}, "banco": "snapshot_x",
+    }))
+
+
+@pytest.fixture
+def sem_conexoes(monkeypatch):
+    # Qualquer tentativa de remover o banco falha o teste
+    def proibido(*args, **kwargs):
+        raise AssertionError("o banco não deveria ser removido")
+
+    monkeypatch.setattr(snapshot, "_conexao_manutencao", proibido)
+    monkeypatch.setattr(snapshot.DatabaseConnection, "close_all_connections", proibido)
+
+
+@pytest.mark.parametrize("banco", ["postgres", "template1"])
+def test_template_recusa_banco_do_sistema(monkeypatch, tmp_path, sem_conexoes, banco):
+    monkeypatch.setattr(snapshot.DatabaseConnection, "_get_db_params", lambda: {"database": banco})
+    _salvar_metadados(tmp_path, "etapa")
+    with pytest.raises(ValueError, match=banco):
+        snapshot.restaurar_snapshot("etapa", diretorio=str(tmp_path))
+    with pytest.raises(ValueError, match=banco):
+        snapshot.salvar_snapshot("nova", metodo="template", diretorio=str(tmp_path))
+
+
+def test_template_recusa_banco_com_outras_tabelas(monkeypatch, tmp_path, sem_conexoes):
+    monkeypatch.setattr(snapshot.DatabaseConnection, "_get_db_params", lambda: {"database": "experimento"})
+    monkeypatch.setattr(
+        snapshot, "execute_query", lambda sql, params=None: pd.DataFrame({"tabela": ["clientes"]})
+    )
+    _salvar_metadados(tmp_path, "etapa")
+    with pytest.raises(ValueError, match="clientes"):
+        snapshot.restaurar_snapshot("etapa", diretorio=str(tmp_path))
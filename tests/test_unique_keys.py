@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from utils.unique_keys import (
+    ESPACO_CPF,
+    GeradorChaves,
+    PermutacaoFeistel,
+    digito_isbn13,
+    digitos_cpf,
+)
+
+
+@pytest.mark.parametrize("tamanho", [1, 2, 10, 1000, 4097])
+def test_permutacao_e_bijetora(tamanho):
+    permutacao = PermutacaoFeistel(tamanho, seed=7)
+    resultado = permutacao.aplicar(np.arange(tamanho))
+    assert sorted(resultado.tolist()) == list(range(tamanho))
+
+
+def test_permutacao_depende_da_semente():
+    valores = np.arange(1000)
+    a = PermutacaoFeistel(1000, seed=1).aplicar(valores)
+    b = PermutacaoFeistel(1000, seed=2).aplicar(valores)
+    assert not np.array_equal(a, b)
+    assert np.array_equal(a, PermutacaoFeistel(1000, seed=1).aplicar(valores))
+
+
+@pytest.mark.parametrize("valores", [[-1], [100], [0, 5, 100]])
+def test_permutacao_fora_do_espaco(valores):
+    with pytest.raises(ValueError):
+        PermutacaoFeistel(100, seed=7).aplicar(valores)
+
+
+def _cpf_valido(cpf):
+    digitos = [int(c) for c in cpf if c.isdigit()]
+    if len(digitos) != 11 or len(set(digitos)) == 1:
+        return False
+    for posicao in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(posicao + 1, 1, -1)))
+        if soma * 10 % 11 % 10 != digitos[posicao]:
+            return False
+    return True
+
+
+def _isbn_valido(isbn):
+    digitos = [int(c) for c in isbn if c.isdigit()]
+    return len(digitos) == 13 and sum(d * (1 if i % 2 == 0 else 3) for i, d in enumerate(digitos)) % 10 == 0
+
+
+def test_cpfs_unicos_e_validos():
+    cpfs = GeradorChaves(42).cpfs(np.arange(20000))
+    assert len(set(cpfs)) == len(cpfs)
+    assert all(len(cpf) == 14 and cpf[3] == "." and cpf[11] == "-" for cpf in cpfs)
+    assert all(_cpf_valido(cpf) for cpf in cpfs)
+
+
+def test_cpfs_nos_extremos_do_espaco():
+    # Os extremos passam pela permutação; o resultado nunca é de dígitos repetidos
+    cpfs = GeradorChaves(42).cpfs(np.array([0, ESPACO_CPF - 1]))
+    assert all(_cpf_valido(cpf) for cpf in cpfs)
+
+
+def test_digitos_cpf_conhecidos():
+    # 529.982.247-25 é o CPF de exemplo da Receita Federal
+    assert digitos_cpf([529982247]).tolist() == [25]
+
+
+def test_isbns_unicos_e_validos():
+    isbns = GeradorChaves(42).isbns(np.arange(20000))
+    assert len(set(isbns)) == len(isbns)
+    assert all(isbn[:3] in ("978", "979") for isbn in isbns)
+    assert all(_isbn_valido(isbn) for isbn in isbns)
+
+
+def test_digito_isbn13_conhecido():
+    # 978-0-306-40615-7
+    assert digito_isbn13([978030640615]).tolist() == [7]
+
+
+def test_emails_unicos_com_bases_repetidas():
+    emails = GeradorChaves(42).emails(np.arange(5000), ["ana.souza@example.org"] * 5000)
+    assert len(set(emails)) == len(emails)
+    assert all(e.startswith("ana.souza.") and e.endswith("@example.org") for e in emails)
+
+
+@pytest.mark.parametrize("metodo", ["cpfs", "isbns", "emails"])
+def test_chaves_independem_da_divisao_em_lotes(metodo):
+    numeros = np.arange(1000, 4000)
+    bases = [f"u{i}@example.org" for i in numeros]
+
+    def gerar(gerador, inicio, fim):
+        if metodo == "emails":
+            return gerador.emails(numeros[inicio:fim], bases[inicio:fim])
+        return getattr(gerador, metodo)(numeros[inicio:fim])
+
+    inteiro = gerar(GeradorChaves(42), 0, len(numeros))
+    # Cada shard tem o seu gerador, com a mesma semente base
+    em_lotes = []
+    for inicio in range(0, len(numeros), 700):
+        em_lotes.extend(gerar(GeradorChaves(42), inicio, inicio + 700))
+    assert em_lotes == inteiro
@@ -0,0 +1,346 @@
+import re
+import json
+import time
+import random
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+import asyncpg
+import pandas as pd
+from utils.db_connection import (
+    DatabaseConnection,
+    _invalidate_writes,
+    invalidate_result_cache,
+)
+from utils.copy_loader import clausula_on_conflict, para_data, pontos_poligono, tabela_staging
+from utils.batch_generator import para_linhas
+
+_PLACEHOLDER_RE = re.compile(r"%%|%s")
+
+
+def converter_placeholders(query):
+    """
+    Converte os placeholders do psycopg2 (%s) para o formato do asyncpg ($1, $2, ...),
+    para que as mesmas consultas sirvam às duas camadas.
+    """
+    contador = itertools.count(1)
+    return _PLACEHOLDER_RE.sub(
+        lambda m: "%" if m.group(0) == "%%" else f"${next(contador)}", query
+    )
+
+
+def _parametros_asyncpg(params):
+    """
+    Adapta os parâmetros do database.ini (formato libpq) para o asyncpg.connect.
+    """
+    conversao = {
+        "host": ("host", str),
+        "port": ("port", int),
+        "user": ("user", str),
+        "password": ("password", str),
+        "database": ("database", str),
+        "dbname": ("database", str),
+        "connect_timeout": ("timeout", float),
+    }
+    parametros = {}
+    for chave, valor in params.items():
+        if chave in conversao:
+            nome, tipo = conversao[chave]
+            parametros[nome] = tipo(valor)
+    return parametros
+
+
+class AsyncDatabaseConnection:
+    """
+    Contraparte assíncrona do DatabaseConnection, baseada em um pool do asyncpg.
+
+    Usa as mesmas seções [postgresql] e [pool] do database.ini.
+    """
+
+    _pool = None
+    _lock = None
+    _timeout = None
+
+    @classmethod
+    async def init_pool(
+        cls,
+        config_file="database.ini",
+        section="postgresql",
+        pool_section="pool",
+        max_size=None,
+    ):
+        """
+        Inicializa o pool assíncrono.
+
+        Args:
+            max_size: Sobrescreve o maxconn do database.ini (útil para simular
+                muitos clientes simultâneos)
+        """
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+
+        async with cls._lock:
+            if cls._pool is None:
+                params = DatabaseConnection._get_db_params(config_file, section)
+                config = DatabaseConnection._get_pool_config(config_file, pool_section)
+                max_size = max_size or config["maxconn"]
+
+                cls._pool = await asyncpg.create_pool(
+                    min_size=min(config["minconn"], max_size),
+                    max_size=max_size,
+                    **_parametros_asyncpg(params),
+                )
+                cls._timeout = config["timeout"]
+
+                print("Pool de conexão assíncrono inicializado com sucesso")
+
+    @classmethod
+    @asynccontextmanager
+    async def connection(cls, timeout=None):
+        """
+        Context manager assíncrono que obtém uma conexão do pool e sempre a devolve.
+        """
+        if cls._pool is None:
+            await cls.init_pool()
+
+        async with cls._pool.acquire(timeout=timeout or cls._timeout) as conn:
+            yield conn
+
+    @classmethod
+    async def close_pool(cls):
+        """
+        Fecha todas as conexões do pool assíncrono.
+        """
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool = None
+
+
+def _parametros(params):
+    return tuple(params) if params is not None else ()
+
+
+def _linhas_afetadas(status):
+    """
+    Extrai o número de linhas do status retornado pelo PostgreSQL (ex: 'INSERT 0 5').
+    """
+    ultimo = status.split()[-1] if status else ""
+    return int(ultimo) if ultimo.isdigit() else 0
+
+
+async def execute(query, params=None):
+    """
+    Executa um comando SQL (INSERT, UPDATE, DDL...) e retorna o número de linhas afetadas.
+    """
+    try:
+        async with AsyncDatabaseConnection.connection() as conn:
+            status = await conn.execute(converter_placeholders(query), *_parametros(params))
+        # O cache de resultados do fetch_dataframe síncrono vale para o processo
+        _invalidate_writes(query)
+        return _linhas_afetadas(status)
+    except Exception as e:
+        print(f"Erro ao executar comando assíncrono: {e}")
+        raise
+
+
+async def fetch(query, params=None):
+    """
+    Executa uma consulta e retorna as linhas como uma lista de tuplas.
+    """
+    try:
+        async with AsyncDatabaseConnection.connection() as conn:
+            rows = await conn.fetch(converter_placeholders(query), *_parametros(params))
+            return [tuple(row) for row in rows]
+    except Exception as e:
+        print(f"Erro ao executar consulta assíncrona: {e}")
+        raise
+
+
+async def fetch_dataframe(query, params=None):
+    """
+    Executa uma consulta e retorna os resultados como um DataFrame do pandas.
+    """
+    try:
+        async with AsyncDatabaseConnection.connection() as conn:
+            stmt = await conn.prepare(converter_placeholders(query))
+            rows = await stmt.fetch(*_parametros(params))
+            cols = [atributo.name for atributo in stmt.get_attributes()]
+            return pd.DataFrame([tuple(row) for row in rows], columns=cols)
+    except Exception as e:
+        print(f"Erro ao executar consulta assíncrona: {e}")
+        raise
+
+
+async def iter_query(query, params=None, itersize=10000, as_dataframe=True):
+    """
+    Versão assíncrona do iter_query: percorre o resultado em blocos com um
+    cursor do servidor.
+
+    Yields:
+        DataFrames (ou listas de tuplas) de até itersize linhas
+    """
+    async with AsyncDatabaseConnection.connection() as conn:
+        async with conn.transaction():
+            stmt = await conn.prepare(converter_placeholders(query))
+            cols = [atributo.name for atributo in stmt.get_attributes()]
+            cursor = await stmt.cursor(*_parametros(params))
+            while True:
+                rows = await cursor.fetch(itersize)
+                if not rows:
+                    break
+                rows = [tuple(row) for row in rows]
+                yield pd.DataFrame(rows, columns=cols) if as_dataframe else rows
+
+
+async def execute_many(query, params_list):
+    """
+    Executa um comando com vários conjuntos de parâmetros em uma transação.
+
+    Returns:
+        Número de conjuntos de parâmetros executados
+    """
+    params_list = list(params_list)
+    try:
+        async with AsyncDatabaseConnection.connection() as conn:
+            async with conn.transaction():
+                await conn.executemany(converter_placeholders(query), params_list)
+        _invalidate_writes(query)
+        return len(params_list)
+    except Exception as e:
+        print(f"Erro ao executar consulta múltipla assíncrona: {e}")
+        raise
+
+
+def _normalizar_valor(valor, tipo):
+    """
+    Converte um valor para o tipo Python esperado pelo codec binário do asyncpg.
+    """
+    if valor is None:
+        return None
+    if tipo == "date":
+        return para_data(valor)
+    if tipo == "polygon":
+        return pontos_poligono(valor)
+    if tipo == "jsonb" and not isinstance(valor, str):
+        return json.dumps(valor)
+    return valor
+
+
+def _normalizar_registros(rows, columns, tipos):
+    if isinstance(rows, dict):
+        rows = para_linhas(rows, columns)
+    if tipos is None:
+        return rows
+    return [
+        tuple(_normalizar_valor(valor, tipo) for valor, tipo in zip(row, tipos))
+        for row in rows
+    ]
+
+
+async def execute_copy(table, columns, rows, tipos=None, conflito=None):
+    """
+    Carrega linhas em lote com COPY binário (copy_records_to_table do asyncpg).
+
+    Args:
+        table: Tabela de destino
+        columns: Colunas na ordem das tuplas
+        rows: Lista de tuplas ou lote colunar (dict coluna -> valores)
+        tipos: Tipos das colunas, usados para converter datas e polígonos
+        conflito: Colunas do ON CONFLICT DO NOTHING (passa por tabela temporária)
+
+    Returns:
+        Número de linhas inseridas
+    """
+    registros = _normalizar_registros(rows, columns, tipos)
+    colunas = ", ".join(columns)
+    try:
+        async with AsyncDatabaseConnection.connection() as conn:
+            async with conn.transaction():
+                if conflito is None:
+                    await conn.copy_records_to_table(
+                        table, records=registros, columns=list(columns)
+                    )
+                    inseridos = len(registros)
+                else:
+                    staging = tabela_staging(table, columns)
+                    await conn.execute(
+                        f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+                        f"AS SELECT {colunas} FROM {table} WITH NO DATA"
+                    )
+                    # Guarda a ordem de entrada (ver db_connection.execute_copy)
+                    await conn.execute(
+                        f"ALTER TABLE {staging} ADD COLUMN IF NOT EXISTS _ordem BIGSERIAL"
+                    )
+                    await conn.copy_records_to_table(
+                        staging, records=registros, columns=list(columns)
+                    )
+                    status = await conn.execute(
+                        f"INSERT INTO {table} ({colunas}) SELECT {colunas} FROM {staging} "
+                        f"ORDER BY _ordem " + clausula_on_conflict(table, columns, conflito)
+                    )
+                    inseridos = _linhas_afetadas(status)
+        invalidate_result_cache([table])
+        return inseridos
+    except Exception as e:
+        print(f"Erro ao executar COPY assíncrono: {e}")
+        raise
+
+
+async def simular_clientes(
+    num_clientes=100, operacoes_por_cliente=20, proporcao_emprestimos=0.1, seed=42
+):
+    """
+    Simula clientes da biblioteca concorrentes em um único processo.
+
+    Cada cliente faz buscas de usuário por CPF e de livro por ISBN e, com
+    probabilidade proporcao_emprestimos, registra um novo empréstimo.
+
+    Returns:
+        DataFrame com uma linha por operação (cliente, operação, tempo, erro)
+    """
+    usuarios = await fetch("SELECT id, cpf FROM usuarios ORDER BY random() LIMIT 1000")
+    livros = await fetch("SELECT id, isbn FROM livros ORDER BY random() LIMIT 1000")
+    if not usuarios or not livros:
+        raise ValueError("Não há usuários ou livros no banco para simular clientes")
+
+    async def cliente(indice):
+        rng = random.Random(f"{seed}:{indice}")
+        registros = []
+        for _ in range(operacoes_por_cliente):
+            usuario_id, cpf = rng.choice(usuarios)
+            livro_id, isbn = rng.choice(livros)
+            sorteio = rng.random()
+
+            if sorteio < proporcao_emprestimos:
+                operacao = "emprestimo"
+                sql = (
+                    "INSERT INTO emprestimos (livro_id, usuario_id, data_emprestimo, status) "
+                    "VALUES (%s, %s, CURRENT_DATE, 'Em Andamento')"
+                )
+                params = (livro_id, usuario_id)
+                executar = execute
+            elif sorteio < proporcao_emprestimos + (1 - proporcao_emprestimos) / 2:
+                operacao = "busca_cpf"
+                sql, params, executar = "SELECT * FROM usuarios WHERE cpf = %s", (cpf,), fetch
+            else:
+                operacao = "busca_isbn"
+                sql, params, executar = "SELECT * FROM livros WHERE isbn = %s", (isbn,), fetch
+
+            inicio = time.perf_counter()
+            try:
+                await executar(sql, params)
+                erro = None
+            except Exception as e:
+                erro = str(e)
+            registros.append(
+                {
+                    "cliente": indice,
+                    "operacao": operacao,
+                    "tempo": time.perf_counter() - inicio,
+                    "erro": erro,
+                }
+            )
+        return registros
+
+    resultados = await asyncio.gather(*(cliente(i) for i in range(num_clientes)))
+    return pd.DataFrame([registro for registros in resultados for registro in registros])
@@ -0,0 +1,196 @@
+import numpy as np
+from datetime import date
+
+# Listas de valores categóricos usados na geração vetorizada
+IDIOMAS = np.array(["Português", "Inglês", "Espanhol", "Francês"])
+STATUS_DEVOLVIDOS = np.array(["Devolvido", "Atrasado"])
+STATUS_PENDENTES = np.array(["Em Andamento", "Perdido", "Danificado"])
+
+
+def _datas_entre(rng, n, inicio, fim):
+    """
+    Sorteia n datas uniformes no intervalo fechado [inicio, fim].
+    """
+    inicio = np.datetime64(inicio, "D")
+    fim = np.datetime64(fim, "D")
+    dias = (fim - inicio).astype(np.int64)
+    return inicio + rng.integers(0, dias + 1, size=n).astype("timedelta64[D]")
+
+
+def _anos_atras(hoje, anos):
+    """
+    Retorna a data de `anos` anos antes de hoje (29/02 vira 28/02).
+    """
+    try:
+        return hoje.replace(year=hoje.year - anos)
+    except ValueError:
+        return hoje.replace(year=hoje.year - anos, day=28)
+
+
+def para_linhas(colunas, ordem):
+    """
+    Converte um lote colunar em uma lista de tuplas na ordem das colunas.
+
+    Datas numpy viram datetime.date (NaT vira None) e escalares numpy viram
+    tipos Python, para que o lote possa ir para executemany ou COPY.
+    """
+    listas = []
+    for nome in ordem:
+        coluna = colunas[nome]
+        if isinstance(coluna, np.ndarray):
+            if np.issubdtype(coluna.dtype, np.datetime64):
+                coluna = coluna.astype("datetime64[D]").astype(object)
+            else:
+                coluna = coluna.tolist()
+        listas.append(coluna)
+    return list(zip(*listas))
+
+
+class GeradorLotes:
+    """
+    Gera colunas inteiras de valores numéricos, datas e categorias com NumPy.
+
+    Complementa o BibliotecaDataGenerator: os textos continuam vindo do Faker,
+    mas tudo o que é sorteio (datas, status, gêneros, chaves estrangeiras,
+    dimensões, metadados numéricos) é feito em uma única chamada por coluna.
+    """
+
+    def __init__(self, seed=42, hoje=None):
+        """
+        Args:
+            seed: Semente do gerador NumPy
+            hoje: Data de referência para os intervalos relativos (padrão: hoje)
+        """
+        self.rng = np.random.default_rng(seed)
+        self.hoje = hoje or date.today()
+
+    def dimensoes(self, n):
+        """
+        Gera larguras e alturas (cm) e os polígonos retangulares correspondentes.
+
+        Returns:
+            Tupla (larguras, alturas, poligonos)
+        """
+        larguras = self.rng.uniform(10, 30, size=n)
+        alturas = self.rng.uniform(15, 40, size=n)
+        poligonos = [
+            f"((0,0),({l},0),({l},{a}),(0, {a}), (0,0))"
+            for l, a in zip(larguras.tolist(), alturas.tolist())
+        ]
+        return larguras, alturas, poligonos
+
+    def datas_nascimento(self, n):
+        """Gera n datas de nascimento para idades entre 5 e 90 anos"""
+        return _datas_entre(
+            self.rng, n, _anos_atras(self.hoje, 90), _anos_atras(self.hoje, 5)
+        )
+
+    def datas_correlacionadas(self, posicao, n, total, inicio, fim, correlacao):
+        """
+        Sorteia n datas cuja ordem acompanha a posição das linhas na carga, para
+        controlar a correlação física entre a data e a ordem no disco.
+
+        A linha na posição p recebe uma data uniforme dentro da fatia p/total do
+        intervalo, o que produz datas crescentes sem precisar conhecer as
+        outras linhas da carga (cada lote ou shard calcula só as suas). Uma
+        fração 1 - correlacao das linhas recebe uma data uniforme no intervalo
+        inteiro, embaralhando parcialmente a ordem.
+
+        Args:
+            posicao: Posição da primeira linha do lote na carga
+            n: Tamanho do lote
+            total: Número de linhas da carga
+            inicio: Primeira data do intervalo
+            fim: Última data do intervalo
+            correlacao: 1.0 gera datas ordenadas; 0.0, datas em ordem aleatória
+        """
+        inicio = np.datetime64(inicio, "D")
+        dias = (np.datetime64(fim, "D") - inicio).astype(np.int64) + 1
+        fracao = (np.arange(posicao, posicao + n) + self.rng.random(n)) / max(total, 1)
+        aleatorias = self.rng.random(n) >= correlacao
+        fracao[aleatorias] = self.rng.random(int(aleatorias.sum()))
+        deslocamento = np.minimum((fracao * dias).astype(np.int64), dias - 1)
+        return inicio + deslocamento.astype("timedelta64[D]")
+
+    def colunas_usuarios(self, n):
+        """
+        Gera as colunas de data de um lote de usuários (e-mail e CPF, únicos,
+        vêm do GeradorChaves).
+        """
+        return {
+            "data_nascimento": self.datas_nascimento(n),
+        }
+
+    def colunas_livros(self, n, generos):
+        """
+        Gera as colunas numéricas, de data e categóricas de um lote de livros
+        (o ISBN vem do GeradorChaves).
+
+        Args:
+            n: Tamanho do lote
+            generos: Lista de gêneros possíveis
+        """
+        larguras, alturas, poligonos = self.dimensoes(n)
+        return {
+            "genero": self.rng.choice(np.asarray(generos), size=n),
+            "num_citacoes": self.rng.integers(0, 6, size=n),
+            "num_paginas": self.rng.integers(50, 1001, size=n),
+            "edicao": self.rng.integers(1, 11, size=n),
+            "idioma": self.rng.choice(IDIOMAS, size=n),
+            "peso": np.round(self.rng.uniform(0.1, 3.0, size=n), 2),
+            "largura": larguras,
+            "altura": alturas,
+            "dimensao": poligonos,
+            "publicado_em": _datas_entre(
+                self.rng, n, _anos_atras(self.hoje, 100), self.hoje
+            ),
+            # 75% de chance de estar disponível
+            "disponivel": self.rng.random(n) < 0.75,
+        }
+
+    def sortear_ids(self, ids, n):
+        """
+        Sorteia n ids de uma lista de ids (uniforme) ou de um AmostradorChaves
+        (com a distribuição dele).
+        """
+        if hasattr(ids, "amostrar"):
+            return ids.amostrar(n, self.rng)
+        return self.rng.choice(np.asarray(ids), size=n)
+
+    def colunas_emprestimos(self, n, livros_ids, usuarios_ids):
+        """
+        Gera um lote completo de empréstimos em formato colunar.
+
+        Args:
+            n: Tamanho do lote
+            livros_ids: Array com os ids de livros existentes ou um
+                AmostradorChaves
+            usuarios_ids: Array com os ids de usuários existentes ou um
+                AmostradorChaves
+        """
+        data_emprestimo = _datas_entre(
+            self.rng, n, _anos_atras(self.hoje, 3), self.hoje
+        )
+
+        # 80% de chance de ter uma data de devolução
+        tem_devolucao = self.rng.random(n) < 0.8
+        dias_ate_devolucao = self.rng.integers(1, 61, size=n)
+        data_devolucao = np.where(
+            tem_devolucao,
+            data_emprestimo + dias_ate_devolucao.astype("timedelta64[D]"),
+            np.datetime64("NaT", "D"),
+        )
+        status = np.where(
+            tem_devolucao,
+            self.rng.choice(STATUS_DEVOLVIDOS, size=n),
+            self.rng.choice(STATUS_PENDENTES, size=n),
+        )
+
+        return {
+            "livro_id": self.sortear_ids(livros_ids, n),
+            "usuario_id": self.sortear_ids(usuarios_ids, n),
+            "data_emprestimo": data_emprestimo,
+            "data_devolucao": data_devolucao,
+            "dias_ate_devolucao": np.where(tem_devolucao, dias_ate_devolucao, 0),
+            "status": status,
+        }
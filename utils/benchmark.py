@@ -0,0 +1,471 @@
+import os
+import re
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.db_connection import (
+    DatabaseConnection,
+    execute_query,
+    drain_query,
+    _execute_statement,
+    deallocate_prepared,
+    explain_prepared,
+    prepare_statement,
+    prepared_statement_stats,
+)
+from utils.plan_analyzer import verificar_plano
+from utils.key_sampler import nome_distribuicao
+from utils.partitioning import nome_particionamento
+from utils.snapshot import (
+    _contar_linhas,
+    chave_snapshot,
+    existe_snapshot,
+    restaurar_snapshot,
+    salvar_snapshot,
+)
+
+# Percentis reportados no resumo de cada medida
+PERCENTIS = (50, 95, 99)
+
+# Modos de plano medidos em consultas preparadas -> plan_cache_mode
+MODOS_PLANO = {
+    "auto": "auto",
+    "generico": "force_generic_plan",
+    "customizado": "force_custom_plan",
+}
+
+_INDICE_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE,
+)
+
+
+def etapas_crescimento(
+    num_iteracoes,
+    registros_por_iteracao,
+    proporcao_usuarios=0.10,
+    proporcao_livros=0.30,
+):
+    """
+    Monta as etapas de crescimento usadas nos notebooks: a cada iteração são
+    adicionados registros_por_iteracao registros divididos entre as tabelas.
+
+    Returns:
+        Lista de dicionários com num_usuarios, num_livros e num_emprestimos
+    """
+    usuarios = int(registros_por_iteracao * proporcao_usuarios)
+    livros = int(registros_por_iteracao * proporcao_livros)
+    emprestimos = registros_por_iteracao - usuarios - livros
+    return [
+        {"num_usuarios": usuarios, "num_livros": livros, "num_emprestimos": emprestimos}
+        for _ in range(num_iteracoes)
+    ]
+
+
+def comandos_remocao(criar_indices):
+    """
+    Deriva os DROP INDEX a partir dos CREATE INDEX informados.
+    """
+    nomes = []
+    for sql in criar_indices:
+        encontrado = _INDICE_RE.search(sql)
+        if encontrado is None:
+            raise ValueError(f"Não foi possível extrair o nome do índice de: {sql}")
+        nomes.append(encontrado.group(1))
+    return [f"DROP INDEX IF EXISTS {nome};" for nome in nomes]
+
+
+def explain_analyze(query, params=None):
+    """
+    Executa EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) e retorna o plano completo
+    (dicionário com 'Plan', 'Planning Time', 'Execution Time'...).
+    """
+    with DatabaseConnection.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", params)
+        resultado = cursor.fetchone()[0][0]
+        conn.rollback()
+    return resultado
+
+
+def medir_consulta(
+    query,
+    params=None,
+    aquecimento=2,
+    repeticoes=10,
+    indice_esperado=None,
+    permitir_seq_scan=True,
+):
+    """
+    Mede uma consulta repetidas vezes.
+
+    A latência do cliente é medida consumindo o resultado sem montar um
+    DataFrame (drain_query). A latência do servidor, os buffers e o resumo do
+    plano (ver plan_analyzer.resumir_plano) vêm de execuções separadas com
+    EXPLAIN ANALYZE.
+
+    Args:
+        indice_esperado: Índice (ou lista) que o plano deve usar
+        permitir_seq_scan: Se False, um Seq Scan no plano interrompe a medição
+
+    Raises:
+        PlanoInesperadoError: Se o plano não atender às expectativas
+
+    Returns:
+        Lista de registros, um por repetição
+    """
+    for _ in range(aquecimento):
+        drain_query(query, params)
+
+    registros = []
+    for repeticao in range(repeticoes):
+        linhas, tempo_cliente = drain_query(query, params)
+        plano = explain_analyze(query, params)
+
+        resumo = verificar_plano(plano, indice_esperado, permitir_seq_scan)
+
+        registro = {
+            "repeticao": repeticao,
+            "linhas": linhas,
+            "latencia_cliente_ms": tempo_cliente * 1000,
+            "latencia_servidor_ms": plano["Execution Time"],
+        }
+        registro.update(resumo)
+        registros.append(registro)
+    return registros
+
+
+def medir_consulta_preparada(
+    query,
+    lista_params,
+    repeticoes=5,
+    modo_plano="auto",
+    indice_esperado=None,
+    permitir_seq_scan=True,
+):
+    """
+    Mede execuções repetidas de uma consulta parametrizada, alternando os
+    parâmetros, em uma única conexão.
+
+    Com modo_plano 'auto', 'generico' ou 'customizado' a consulta é executada
+    como instrução preparada (ver prepare_statement) com o plan_cache_mode
+    correspondente; no modo 'auto' o servidor usa planos customizados nas
+    cinco primeiras execuções e depois pode passar ao plano genérico. Com
+    modo_plano None a consulta é enviada como texto a cada execução, como em
+    medir_consulta.
+
+    Args:
+        query: Consulta com marcadores %s
+        lista_params: Lista de tuplas de parâmetros (ex: vários gêneros e datas)
+        repeticoes: Passadas sobre lista_params
+        modo_plano: 'auto', 'generico', 'customizado' ou None (sem preparo)
+
+    Returns:
+        Lista de registros, um por execução, com as latências do cliente e do
+        servidor, o tempo de planejamento e o tipo de plano usado
+    """
+    if modo_plano is not None and modo_plano not in MODOS_PLANO:
+        raise ValueError(f"Modo de plano inválido: {modo_plano}. Use um de {list(MODOS_PLANO)}")
+
+    registros = []
+    with DatabaseConnection.connection() as conn:
+        cursor = conn.cursor()
+        if modo_plano is not None:
+            # Contadores de planos genéricos e customizados começam do zero
+            deallocate_prepared(conn)
+            cursor.execute("SET plan_cache_mode = %s", (MODOS_PLANO[modo_plano],))
+            conn.commit()
+
+        try:
+            for repeticao in range(repeticoes):
+                for indice, params in enumerate(lista_params):
+                    # Os dois caminhos medem só o envio, a execução e a leitura
+                    # das linhas: a diferença entre eles é apenas o preparo
+                    inicio = time.perf_counter()
+                    if modo_plano is None:
+                        cursor.execute(query, params)
+                    else:
+                        nome = prepare_statement(conn, query)
+                        cursor.execute(_execute_statement(nome, params), params)
+                    resultado = cursor.fetchall() if cursor.description is not None else []
+                    conn.commit()
+                    tempo_cliente = time.perf_counter() - inicio
+
+                    if modo_plano is None:
+                        plano = explain_analyze(query, params)
+                        tipo_plano = "sem_preparo"
+                    else:
+                        antes = prepared_statement_stats(conn, query)
+                        plano = explain_prepared(query, params, conn=conn)
+                        depois = prepared_statement_stats(conn, query)
+                        tipo_plano = (
+                            "generico"
+                            if depois["generic_plans"] > antes["generic_plans"]
+                            else "customizado"
+                        )
+
+                    registro = {
+                        "modo_plano": modo_plano or "sem_preparo",
+                        "execucao": len(registros),
+                        "repeticao": repeticao,
+                        "indice_params": indice,
+                        "params": str(params),
+                        "linhas": len(resultado),
+                        "tipo_plano": tipo_plano,
+                        "latencia_cliente_ms": tempo_cliente * 1000,
+                        "latencia_servidor_ms": plano["Execution Time"],
+                    }
+                    registro.update(
+                        verificar_plano(plano, indice_esperado, permitir_seq_scan)
+                    )
+                    registros.append(registro)
+        finally:
+            if modo_plano is not None:
+                cursor.execute("RESET plan_cache_mode")
+                conn.commit()
+    return registros
+
+
+def comparar_modos_plano(
+    query, lista_params, modos=(None, "auto", "generico", "customizado"), **opcoes
+):
+    """
+    Mede a mesma consulta parametrizada sem preparo e em cada modo de plano
+    (ver medir_consulta_preparada).
+
+    Returns:
+        DataFrame com uma linha por execução; agrupe por modo_plano e
+        tipo_plano para comparar planejamento_ms e latencia_servidor_ms
+    """
+    registros = []
+    for modo in modos:
+        registros.extend(medir_consulta_preparada(query, lista_params, modo_plano=modo, **opcoes))
+    return pd.DataFrame(registros)
+
+
+def resumir(resultados):
+    """
+    Resume os resultados de um benchmark: mínimo, mediana, p95 e p99 das
+    latências e média dos buffers por etapa e configuração.
+    """
+    chaves = ["benchmark", "etapa", "total_registros", "configuracao"]
+    linhas = []
+    for grupo, df in resultados.groupby(chaves, sort=False, dropna=False):
+        linha = dict(zip(chaves, grupo))
+        linha["linhas"] = int(df["linhas"].iloc[0])
+        for medida in ("latencia_cliente_ms", "latencia_servidor_ms"):
+            valores = df[medida].to_numpy()
+            linha[f"{medida}_min"] = valores.min()
+            for percentil in PERCENTIS:
+                linha[f"{medida}_p{percentil}"] = np.percentile(valores, percentil)
+        for buffer in ("shared_hit", "shared_read", "temp_read", "temp_written"):
+            linha[buffer] = df[buffer].mean()
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def salvar_resultados(resultados, caminho):
+    """
+    Salva os resultados em Parquet (.parquet) ou CSV (.csv), anexando a
+    arquivos existentes para permitir comparar execuções ao longo do tempo.
+    """
+    if os.path.exists(caminho):
+        anteriores = (
+            pd.read_parquet(caminho) if caminho.endswith(".parquet") else pd.read_csv(caminho)
+        )
+        resultados = pd.concat([anteriores, resultados], ignore_index=True)
+
+    if caminho.endswith(".parquet"):
+        resultados.to_parquet(caminho, index=False)
+    elif caminho.endswith(".csv"):
+        resultados.to_csv(caminho, index=False)
+    else:
+        raise ValueError("Use um caminho terminado em .parquet ou .csv")
+
+
+def variante_snapshot(gerador, opcoes_carga):
+    """
+    Descreve as opções de geração que mudam os dados produzidos, para compor a
+    chave dos snapshots (ver snapshot.chave_snapshot).
+    """
+    partes = []
+    if gerador.vocabulario is not None:
+        partes.append("vocabulario")
+    if opcoes_carga.get("vetorizado"):
+        partes.append("vetorizado")
+    if opcoes_carga.get("num_workers"):
+        partes.append(f"shards{opcoes_carga.get('tamanho_shard', '')}")
+    if opcoes_carga.get("distribuicao") is not None:
+        partes.append(nome_distribuicao(opcoes_carga["distribuicao"]))
+    if opcoes_carga.get("correlacao") is not None:
+        partes.append(f"correlacao{opcoes_carga['correlacao']}")
+    # O método 'template' clona também o layout das tabelas
+    if opcoes_carga.get("colunas_busca"):
+        partes.append("colunas_busca")
+    if opcoes_carga.get("particionamento"):
+        partes.append(nome_particionamento(opcoes_carga["particionamento"]))
+    return "-".join(partes)
+
+
+class BenchmarkIndice:
+    """
+    Experimento de índice: para cada etapa de crescimento, popula o banco,
+    mede a consulta sem os índices, cria os índices, mede de novo e os remove.
+
+    Substitui as funções executar_consulta_com_tempo, extrair_leituras_de_disco,
+    criar_indices_* e remover_indices_* copiadas em cada notebook.
+    """
+
+    def __init__(
+        self,
+        nome,
+        query,
+        criar_indices,
+        remover_indices=None,
+        params=None,
+        aquecimento=2,
+        repeticoes=10,
+        analisar=True,
+        indice_esperado=None,
+        permitir_seq_scan=True,
+    ):
+        """
+        Args:
+            nome: Nome do benchmark (ex: 'btree_genero_publicado')
+            query: Consulta medida
+            criar_indices: Lista de comandos CREATE INDEX
+            remover_indices: Lista de DROP INDEX (derivada de criar_indices se omitida)
+            params: Parâmetros da consulta
+            aquecimento: Execuções descartadas antes de cada medição
+            repeticoes: Execuções medidas em cada configuração
+            analisar: Executa ANALYZE após a carga e a criação dos índices
+            indice_esperado: Índice (ou lista) que a configuração com índices
+                deve usar; caso contrário a execução falha com PlanoInesperadoError
+            permitir_seq_scan: Se False, a configuração com índices falha quando
+                o planejador recorre a um Seq Scan
+        """
+        self.nome = nome
+        self.query = query
+        self.criar_indices = list(criar_indices)
+        self.remover_indices = (
+            list(remover_indices)
+            if remover_indices is not None
+            else comandos_remocao(self.criar_indices)
+        )
+        self.params = params
+        self.aquecimento = aquecimento
+        self.repeticoes = repeticoes
+        self.analisar = analisar
+        self.indice_esperado = indice_esperado
+        self.permitir_seq_scan = permitir_seq_scan
+
+    def _executar_comandos(self, comandos):
+        for sql in comandos:
+            execute_query(sql)
+        if self.analisar:
+            execute_query("ANALYZE")
+
+    def medir(self, etapa=0, total_registros=None):
+        """
+        Mede a consulta sem e com os índices no estado atual do banco.
+
+        Returns:
+            Lista de registros tidy (um por repetição e configuração)
+        """
+        registros = []
+        contexto = {
+            "benchmark": self.nome,
+            "etapa": etapa,
+            "total_registros": total_registros,
+            "executado_em": datetime.now().isoformat(timespec="seconds"),
+        }
+
+        self._executar_comandos(self.remover_indices)
+        try:
+            for configuracao in ("sem_indices", "com_indices"):
+                expectativas = {}
+                if configuracao == "com_indices":
+                    self._executar_comandos(self.criar_indices)
+                    expectativas = {
+                        "indice_esperado": self.indice_esperado,
+                        "permitir_seq_scan": self.permitir_seq_scan,
+                    }
+
+                for registro in medir_consulta(
+                    self.query,
+                    self.params,
+                    self.aquecimento,
+                    self.repeticoes,
+                    **expectativas,
+                ):
+                    registro.update(contexto, configuracao=configuracao)
+                    registros.append(registro)
+        finally:
+            self._executar_comandos(self.remover_indices)
+        return registros
+
+    def executar(self, gerador, etapas, snapshot=None, **opcoes_carga):
+        """
+        Executa o experimento completo sobre as etapas de crescimento.
+
+        Args:
+            gerador: BibliotecaDataGenerator usado para popular o banco
+            etapas: Lista de dicionários com num_usuarios, num_livros e
+                num_emprestimos (ver etapas_crescimento)
+            snapshot: Método de snapshot ('copy' ou 'template'). Se informado,
+                cada etapa já salva é restaurada em vez de gerada, e as etapas
+                geradas são salvas para as próximas execuções. Depois de uma
+                restauração, as etapas geradas não são salvas (ver abaixo).
+            opcoes_carga: Argumentos extras repassados a popular_banco
+                (ex: modo_carga, num_workers, vetorizado)
+
+        A primeira etapa gerada parte do banco vazio, e o total de registros
+        de cada etapa é o número de linhas nas tabelas ao fim dela, com ou sem
+        snapshots.
+
+        Returns:
+            DataFrame tidy com uma linha por repetição medida
+        """
+        registros = []
+        acumulado = {"num_usuarios": 0, "num_livros": 0, "num_emprestimos": 0}
+        variante = variante_snapshot(gerador, opcoes_carga)
+        restaurado = False
+
+        for etapa, quantidades in enumerate(etapas):
+            print(f"\n[{self.nome}] Etapa {etapa + 1} de {len(etapas)}")
+            inicio = time.perf_counter()
+
+            if snapshot is None:
+                gerador.popular_banco(**quantidades, clear=etapa == 0, **opcoes_carga)
+                linhas = _contar_linhas()
+            else:
+                for campo in acumulado:
+                    acumulado[campo] += quantidades[campo]
+                chave = chave_snapshot(gerador.seed, gerador.locales, acumulado, variante)
+
+                if existe_snapshot(chave):
+                    metadados = restaurar_snapshot(chave, analisar=False)
+                    restaurado = True
+                elif restaurado:
+                    # O estado aleatório do gerador não avançou nas etapas
+                    # restauradas, então os dados gerados agora não são os de
+                    # uma execução sem snapshots e não devem ser salvos com a
+                    # chave acumulada
+                    print("Snapshot não salvo: etapas anteriores foram restauradas.")
+                    gerador.popular_banco(**quantidades, **opcoes_carga)
+                    metadados = {"linhas": _contar_linhas()}
+                else:
+                    gerador.popular_banco(**quantidades, clear=etapa == 0, **opcoes_carga)
+                    metadados = salvar_snapshot(chave, snapshot)
+                linhas = metadados["linhas"]
+            # Linhas das tabelas ao fim da etapa, com ou sem snapshots
+            total_registros = sum(linhas.values())
+            print(f"Carga concluída em {time.perf_counter() - inicio:.2f}s")
+
+            if self.analisar:
+                execute_query("ANALYZE")
+
+            registros.extend(self.medir(etapa, total_registros))
+
+        return pd.DataFrame(registros)
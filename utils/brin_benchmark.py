@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from utils.db_connection import execute_query
+from utils.index_cost import comparar_configuracoes
+
+# Fração do intervalo de datas coberta pelas consultas de faixa
+FRACAO_PADRAO = 0.01
+
+
+def _configuracoes(tabela, coluna):
+    """
+    B-tree contra BRIN com o tamanho de faixa padrão (128 páginas) e com
+    faixas menores, mais precisas e maiores.
+    """
+    base = f"idx_{tabela}_{coluna}"
+    return {
+        "btree": [f"CREATE INDEX {base}_btree ON {tabela} ({coluna})"],
+        "brin": [f"CREATE INDEX {base}_brin ON {tabela} USING brin ({coluna})"],
+        "brin_8": [
+            f"CREATE INDEX {base}_brin_8 ON {tabela} USING brin ({coluna}) "
+            f"WITH (pages_per_range = 8)"
+        ],
+    }
+
+
+# Cargas de trabalho BRIN: faixas de datas nas colunas cuja correlação física
+# é controlada pelo gerador (ver popular_banco com correlacao)
+CARGAS_BRIN = {
+    "emprestimos_data": ("emprestimos", "data_emprestimo"),
+    "livros_publicacao": ("livros", "publicado_em"),
+}
+
+
+def correlacao_fisica(tabela, coluna):
+    """
+    Retorna a correlação entre a ordem física das linhas e a ordem dos valores
+    da coluna (pg_stats.correlation, de -1 a 1), calculada pelo ANALYZE.
+    Perto de 1 ou -1, cada faixa de páginas cobre um intervalo estreito de
+    valores e o BRIN descarta quase toda a tabela.
+    """
+    resultado = execute_query(
+        "SELECT correlation FROM pg_stats WHERE tablename = %s AND attname = %s",
+        (tabela, coluna),
+    )
+    if len(resultado) == 0 or pd.isna(resultado.correlation[0]):
+        return np.nan
+    return float(resultado.correlation[0])
+
+
+def intervalo_consulta(tabela, coluna, fracao=FRACAO_PADRAO):
+    """
+    Retorna uma faixa (inicio, fim) que cobre a fração informada do intervalo
+    de valores da coluna, centrada no meio do intervalo.
+    """
+    resultado = execute_query(
+        f"SELECT MIN({coluna}) AS minimo, MAX({coluna}) AS maximo FROM {tabela}"
+    )
+    minimo, maximo = resultado.minimo[0], resultado.maximo[0]
+    if minimo is None or pd.isna(minimo):
+        raise ValueError(f"Não há valores em {tabela}.{coluna}")
+    meio = minimo + (maximo - minimo) / 2
+    metade = (maximo - minimo) * fracao / 2
+    return (meio - metade, meio + metade)
+
+
+def executar_brin(cargas=None, fracao=FRACAO_PADRAO, aquecimento=2, repeticoes=10):
+    """
+    Executa as consultas de faixa de datas sobre os dados já carregados,
+    comparando B-tree e BRIN pelo tamanho e pelo custo de leitura.
+
+    Args:
+        cargas: Nomes das cargas de CARGAS_BRIN (padrão: todas)
+        fracao: Fração do intervalo de datas coberta pela consulta
+        aquecimento: Execuções descartadas antes de cada medição
+        repeticoes: Repetições de cada medição
+
+    Returns:
+        DataFrame com uma linha por carga e configuração, incluindo a
+        correlação física da coluna e a razão entre o tamanho de cada índice
+        e o da B-tree
+    """
+    resultados = []
+    for nome in cargas or CARGAS_BRIN:
+        tabela, coluna = CARGAS_BRIN[nome]
+        execute_query(f"ANALYZE {tabela}")
+        params = intervalo_consulta(tabela, coluna, fracao)
+        print(f"\n[brin] Carga {nome} entre {params[0]} e {params[1]}")
+
+        resultado = comparar_configuracoes(
+            f"SELECT id, {coluna} FROM {tabela} WHERE {coluna} BETWEEN %s AND %s",
+            _configuracoes(tabela, coluna),
+            params,
+            aquecimento=aquecimento,
+            repeticoes=repeticoes,
+        )
+        btree = resultado.loc[resultado["configuracao"] == "btree", "tamanho_indices_bytes"]
+        resultado["razao_tamanho_btree"] = (
+            resultado["tamanho_indices_bytes"] / btree.iloc[0]
+        )
+        resultado.insert(0, "carga", nome)
+        resultado.insert(1, "correlacao_fisica", correlacao_fisica(tabela, coluna))
+        resultados.append(resultado)
+    return pd.concat(resultados, ignore_index=True)
+
+
+def comparar_correlacoes(
+    gerador,
+    carga,
+    correlacoes=(None, 0.5, 0.9, 1.0),
+    cargas=None,
+    fracao=FRACAO_PADRAO,
+    aquecimento=2,
+    repeticoes=10,
+    **opcoes_carga,
+):
+    """
+    Recarrega o banco com cada nível de correlação e executa as consultas de
+    faixa de datas, mostrando como o BRIN depende da ordem física dos dados.
+
+    Args:
+        gerador: BibliotecaDataGenerator usado nas cargas
+        carga: Dicionário com num_usuarios, num_livros e num_emprestimos
+        correlacoes: Valores de correlacao passados a popular_banco (None
+            mantém as datas aleatórias)
+        cargas: Nomes das cargas de CARGAS_BRIN (padrão: todas)
+        opcoes_carga: Argumentos extras repassados a popular_banco
+
+    Returns:
+        DataFrame de executar_brin com a coluna correlacao_gerada
+    """
+    resultados = []
+    for correlacao in correlacoes:
+        print(f"\n[brin] Carga com correlacao={correlacao}")
+        gerador.popular_banco(clear=True, correlacao=correlacao, **carga, **opcoes_carga)
+        resultado = executar_brin(cargas, fracao, aquecimento, repeticoes)
+        resultado.insert(0, "correlacao_gerada", correlacao)
+        resultados.append(resultado)
+    return pd.concat(resultados, ignore_index=True)
@@ -0,0 +1,314 @@
+import io
+import re
+import json
+import struct
+import hashlib
+from datetime import date, datetime
+import numpy as np
+from utils.batch_generator import para_linhas
+
+# Cabeçalho fixo do formato binário do COPY (assinatura + flags + extensão)
+_COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_BINARY_TRAILER = struct.pack("!h", -1)
+
+# Epoch usado pelo PostgreSQL para datas no formato binário
+_PG_EPOCH = date(2000, 1, 1)
+
+# OID do tipo text, usado nos elementos de arrays TEXT[]
+_TEXT_OID = 25
+
+_NUMERO_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def _escapar_texto(valor):
+    """
+    Escapa um valor para o formato texto do COPY.
+    """
+    return (
+        valor.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _array_literal(valores):
+    """
+    Converte uma lista de strings em um literal de array do PostgreSQL.
+    """
+    elementos = []
+    for valor in valores:
+        if valor is None:
+            elementos.append("NULL")
+        else:
+            valor = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+            elementos.append(f'"{valor}"')
+    return "{" + ",".join(elementos) + "}"
+
+
+def para_data(valor):
+    """
+    Converte datetime, date ou string ISO em datetime.date.
+    """
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor))
+
+
+def formatar_valor_texto(valor):
+    """
+    Converte um valor Python na representação do formato texto do COPY.
+    """
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    if isinstance(valor, (list, tuple)):
+        return _escapar_texto(_array_literal(valor))
+    if isinstance(valor, dict):
+        return _escapar_texto(json.dumps(valor))
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return _escapar_texto(str(valor))
+
+
+def _codificar_texto(valor):
+    return str(valor).encode("utf-8")
+
+
+def _codificar_int4(valor):
+    return struct.pack("!i", int(valor))
+
+
+def _codificar_int8(valor):
+    return struct.pack("!q", int(valor))
+
+
+def _codificar_float8(valor):
+    return struct.pack("!d", float(valor))
+
+
+def _codificar_bool(valor):
+    return b"\x01" if valor else b"\x00"
+
+
+def _codificar_date(valor):
+    return struct.pack("!i", (para_data(valor) - _PG_EPOCH).days)
+
+
+def _codificar_jsonb(valor):
+    if not isinstance(valor, str):
+        valor = json.dumps(valor)
+    # Versão 1 do formato binário do jsonb seguida do texto JSON
+    return b"\x01" + valor.encode("utf-8")
+
+
+def pontos_poligono(valor):
+    """
+    Converte um polígono em texto ('((x1,y1),(x2,y2),...)') ou uma sequência de
+    pares em uma lista de pontos (x, y).
+    """
+    if isinstance(valor, str):
+        numeros = [float(n) for n in _NUMERO_RE.findall(valor)]
+        return list(zip(numeros[0::2], numeros[1::2]))
+    return [(float(x), float(y)) for x, y in valor]
+
+
+def _codificar_polygon(valor):
+    pontos = pontos_poligono(valor)
+    partes = [struct.pack("!i", len(pontos))]
+    for x, y in pontos:
+        partes.append(struct.pack("!dd", x, y))
+    return b"".join(partes)
+
+
+def _codificar_text_array(valor):
+    if not valor:
+        return struct.pack("!iii", 0, 0, _TEXT_OID)
+
+    tem_nulo = any(v is None for v in valor)
+    partes = [struct.pack("!iiiii", 1, int(tem_nulo), _TEXT_OID, len(valor), 1)]
+    for elemento in valor:
+        if elemento is None:
+            partes.append(struct.pack("!i", -1))
+        else:
+            dados = str(elemento).encode("utf-8")
+            partes.append(struct.pack("!i", len(dados)))
+            partes.append(dados)
+    return b"".join(partes)
+
+
+# Codificadores do formato binário por tipo de coluna
+CODIFICADORES_BINARIOS = {
+    "text": _codificar_texto,
+    "varchar": _codificar_texto,
+    "int4": _codificar_int4,
+    "integer": _codificar_int4,
+    "int8": _codificar_int8,
+    "bigint": _codificar_int8,
+    "float8": _codificar_float8,
+    "bool": _codificar_bool,
+    "boolean": _codificar_bool,
+    "date": _codificar_date,
+    "jsonb": _codificar_jsonb,
+    "polygon": _codificar_polygon,
+    "text[]": _codificar_text_array,
+}
+
+
+def gerar_buffer_texto(rows):
+    """
+    Serializa as linhas no formato texto do COPY e retorna um buffer pronto para leitura.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(formatar_valor_texto(valor) for valor in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _coluna_texto(coluna):
+    """
+    Converte uma coluna inteira para a representação texto do COPY.
+    """
+    if isinstance(coluna, np.ndarray):
+        if np.issubdtype(coluna.dtype, np.datetime64):
+            textos = np.datetime_as_string(coluna, unit="D").astype(object)
+            textos[np.isnat(coluna)] = "\\N"
+            return textos.tolist()
+        if coluna.dtype == np.bool_:
+            return np.where(coluna, "t", "f").tolist()
+        if np.issubdtype(coluna.dtype, np.number):
+            return coluna.astype(str).tolist()
+        coluna = coluna.tolist()
+    return [formatar_valor_texto(valor) for valor in coluna]
+
+
+def gerar_buffer_texto_colunar(colunas, ordem):
+    """
+    Serializa um lote colunar (dict coluna -> valores) no formato texto do COPY,
+    convertendo cada coluna de uma vez em vez de valor a valor.
+    """
+    textos = [_coluna_texto(colunas[nome]) for nome in ordem]
+    buffer = io.StringIO()
+    for campos in zip(*textos):
+        buffer.write("\t".join(campos))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def tamanho_lote(rows):
+    """
+    Retorna o número de linhas de um lote em linhas (lista) ou colunar (dict).
+    """
+    if isinstance(rows, dict):
+        return len(next(iter(rows.values()))) if rows else 0
+    return len(rows)
+
+
+def gerar_buffer_binario(rows, tipos):
+    """
+    Serializa as linhas no formato binário do COPY.
+
+    Args:
+        rows: Iterável de tuplas com os valores de cada linha
+        tipos: Tipos PostgreSQL de cada coluna, na mesma ordem das tuplas
+    """
+    try:
+        codificadores = [CODIFICADORES_BINARIOS[tipo] for tipo in tipos]
+    except KeyError as e:
+        raise ValueError(f"Tipo sem suporte no COPY binário: {e.args[0]}")
+
+    num_campos = struct.pack("!h", len(codificadores))
+    nulo = struct.pack("!i", -1)
+
+    buffer = io.BytesIO()
+    buffer.write(_COPY_BINARY_HEADER)
+    for row in rows:
+        buffer.write(num_campos)
+        for codificar, valor in zip(codificadores, row):
+            if valor is None:
+                buffer.write(nulo)
+                continue
+            dados = codificar(valor)
+            buffer.write(struct.pack("!i", len(dados)))
+            buffer.write(dados)
+    buffer.write(_COPY_BINARY_TRAILER)
+    buffer.seek(0)
+    return buffer
+
+
+def tabela_staging(table, columns):
+    """
+    Retorna o nome da tabela temporária usada nas cargas com ON CONFLICT.
+
+    A tabela é criada uma vez por sessão com as colunas do primeiro lote, então
+    o nome inclui o conjunto de colunas: lotes com outras colunas na mesma
+    conexão usam outra tabela.
+    """
+    assinatura = hashlib.sha1(",".join(columns).encode("utf-8")).hexdigest()[:8]
+    return f"_staging_{table}_{assinatura}"
+
+
+def clausula_on_conflict(table, columns, conflito, manter_menor=None):
+    """
+    Monta a cláusula ON CONFLICT usada nas cargas em lote.
+
+    Args:
+        table: Tabela de destino
+        columns: Colunas inseridas
+        conflito: Colunas da restrição de unicidade
+        manter_menor: Se informado, em caso de conflito prevalece a linha com o
+            menor valor desta coluna (a linha existente é substituída), o que
+            torna o resultado independente da ordem de chegada das linhas.
+            Caso contrário, a linha nova é descartada (DO NOTHING).
+    """
+    alvo = ", ".join(conflito)
+    if manter_menor is None:
+        return f"ON CONFLICT ({alvo}) DO NOTHING"
+
+    atribuicoes = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns)
+    return (
+        f"ON CONFLICT ({alvo}) DO UPDATE SET {atribuicoes} "
+        f"WHERE {table}.{manter_menor} > EXCLUDED.{manter_menor}"
+    )
+
+
+def copy_rows(cursor, table, columns, rows, formato="text", tipos=None):
+    """
+    Envia as linhas para a tabela usando COPY ... FROM STDIN.
+
+    Args:
+        cursor: Cursor psycopg2 aberto
+        table: Nome da tabela de destino
+        columns: Lista de colunas na ordem das tuplas
+        rows: Lista de tuplas com os valores ou lote colunar (dict coluna -> valores)
+        formato: 'text' ou 'binary'
+        tipos: Tipos das colunas (obrigatório no formato binário)
+
+    Returns:
+        Tamanho dos dados enviados (bytes no formato binário, caracteres no
+        formato texto)
+    """
+    colunar = isinstance(rows, dict)
+    if formato == "binary":
+        if tipos is None:
+            raise ValueError("O formato binário exige os tipos das colunas")
+        if colunar:
+            rows = para_linhas(rows, columns)
+        buffer = gerar_buffer_binario(rows, tipos)
+    elif formato == "text":
+        if colunar:
+            buffer = gerar_buffer_texto_colunar(rows, columns)
+        else:
+            buffer = gerar_buffer_texto(rows)
+    else:
+        raise ValueError(f"Formato de COPY desconhecido: {formato}")
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT {formato})"
+    cursor.copy_expert(sql, buffer)
+    return buffer.tell()
@@ -1,26 +1,346 @@
 from faker import Faker
 import random
+import time
+import hashlib
+import multiprocessing
 from datetime import datetime, timedelta
 import json
-from utils.db_connection import execute_query, execute_many, DatabaseConnection
+from utils.db_connection import (
+    execute_query,
+    execute_many,
+    execute_copy,
+    fetch_arrow,
+    invalidate_result_cache,
+    DatabaseConnection,
+)
+from utils.copy_loader import clausula_on_conflict, tamanho_lote
+from utils.batch_generator import GeradorLotes, para_linhas, _anos_atras
+from utils.unique_keys import GeradorChaves, ESPACO_CPF, ESPACO_EMAIL, ESPACO_ISBN
+from utils.vocabulary import VocabularioFaker, GERADORES_POOL
+from utils.dataset_cache import CacheDados, chave_dados, gravar_lote
+from utils.key_sampler import AmostradorChaves, opcoes_distribuicao
+from utils.pipeline import PipelineCarga
+from utils.fast_load import CargaRapida
+from utils.partitioning import (
+    layout_emprestimos,
+    opcoes_particionamento,
+    sql_emprestimos_particionada,
+)
+from utils.metrics import REGISTRO
+import numpy as np
+import psycopg2.errors
 import psycopg2.extras
 
 # Registrar o adaptador para arrays
 psycopg2.extras.register_default_jsonb()
 
+# Modos de carga aceitos por popular_banco e pelos métodos inserir_*
+MODOS_CARGA = ("insert", "copy", "copy_binary")
+
+# Colunas e tipos usados pelo caminho de carga via COPY
+COLUNAS_USUARIOS = ("nome", "email", "cpf", "data_nascimento")
+TIPOS_USUARIOS = ("text", "varchar", "varchar", "date")
+
+COLUNAS_LIVROS = (
+    "isbn",
+    "titulo",
+    "autor",
+    "genero",
+    "citacoes",
+    "metadados",
+    "dimensao",
+    "publicado_em",
+    "disponivel",
+)
+TIPOS_LIVROS = (
+    "varchar",
+    "text",
+    "text",
+    "text",
+    "text[]",
+    "jsonb",
+    "polygon",
+    "date",
+    "bool",
+)
+
+COLUNAS_EMPRESTIMOS = (
+    "livro_id",
+    "usuario_id",
+    "data_emprestimo",
+    "data_devolucao",
+    "status",
+)
+TIPOS_EMPRESTIMOS = ("int4", "int4", "date", "date", "varchar")
+
+# Colunas, tipos e colunas do ON CONFLICT de cada tabela carregada
+ESQUEMA_CARGA = {
+    "usuarios": (COLUNAS_USUARIOS, TIPOS_USUARIOS, ("email",)),
+    "livros": (COLUNAS_LIVROS, TIPOS_LIVROS, ("isbn",)),
+    "emprestimos": (COLUNAS_EMPRESTIMOS, TIPOS_EMPRESTIMOS, None),
+}
+
+SQL_INSERIR_USUARIOS = """
+INSERT INTO usuarios (nome, email, cpf, data_nascimento)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (email) DO NOTHING
+"""
+
+# SQL para inserção - modificado para usar genero em vez de generos
+SQL_INSERIR_LIVROS = """
+INSERT INTO livros (isbn, titulo, autor, genero, citacoes, metadados, dimensao, publicado_em, disponivel)
+VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s::polygon, %s, %s)
+ON CONFLICT (isbn) DO NOTHING
+"""
+
+SQL_INSERIR_EMPRESTIMOS = """
+INSERT INTO emprestimos (livro_id, usuario_id, data_emprestimo, data_devolucao, status)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Registros por shard na geração paralela. É fixo para que a divisão do
+# trabalho (e portanto os dados gerados) não dependa do número de workers.
+TAMANHO_SHARD = 10000
+
+# Tamanho dos lotes de inserção de cada tabela dentro de um shard
+TAMANHO_LOTE = {"usuarios": 1000, "livros": 1000, "emprestimos": 5000}
+
+# Coluna de data cuja correlação com a ordem física pode ser controlada
+# (ver popular_banco com correlacao) e o intervalo, em anos até hoje, em que
+# ela é sorteada
+DATAS_CORRELACIONADAS = {"livros": ("publicado_em", 100), "emprestimos": ("data_emprestimo", 3)}
+
+# Colunas de busca pré-calculadas de livros (ver create_schema com
+# colunas_busca): o tsvector do título e as dimensões como box e como o ponto
+# (largura, altura), já que todo polígono de dimensão é um retângulo com um
+# vértice na origem. São colunas geradas, preenchidas pelo servidor em
+# qualquer modo de carga
+COLUNAS_BUSCA_LIVROS = {
+    "titulo_tsv": "tsvector GENERATED ALWAYS AS (to_tsvector('portuguese', titulo)) STORED",
+    "dimensao_caixa": "box GENERATED ALWAYS AS (box(dimensao)) STORED",
+    "dimensao_ponto": "point GENERATED ALWAYS AS ((box(dimensao))[0]) STORED",
+}
+
+# Tentativas de um lote de shard que falhou por deadlock entre workers
+TENTATIVAS_DEADLOCK = 5
+
+# Listas de ids (ou AmostradorChaves) usadas pelos workers ao gerar empréstimos
+_IDS_WORKER = {}
+
+
+def _sql_insert(tabela, colunas, tipos, conflito=None, manter_menor=None):
+    """
+    Monta o INSERT parametrizado de uma tabela a partir das colunas e tipos.
+    """
+    valores = ", ".join(f"%s::{tipo}" for tipo in tipos)
+    sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({valores})"
+    if conflito:
+        sql += " " + clausula_on_conflict(tabela, colunas, conflito, manter_menor)
+    return sql
+
+
+def derivar_seed(seed, tabela, shard):
+    """
+    Deriva a semente de um shard a partir da semente base.
+
+    Usa um hash estável (e não hash() do Python, que varia entre processos).
+    """
+    chave = f"{seed}:{tabela}:{shard}".encode("utf-8")
+    return int.from_bytes(hashlib.sha256(chave).digest()[:4], "big")
+
+
+def carregar_ids(tabela, ordenar=False):
+    """
+    Carrega os ids de uma tabela em um array NumPy. Os ids são lidos com
+    COPY TO STDOUT direto para uma coluna Arrow (ver fetch_arrow), sem criar
+    um inteiro Python por id.
+    """
+    sql = f"SELECT id FROM {tabela}"
+    if ordenar:
+        sql += " ORDER BY id"
+    ids = fetch_arrow(sql).column("id")
+    return ids.to_numpy().astype(np.int64, copy=False)
+
+
+def amostradores_emprestimos(distribuicao):
+    """
+    Monta os AmostradorChaves de usuários e livros usados para sortear as
+    chaves estrangeiras dos empréstimos, a partir das faixas de ids.
+
+    Returns:
+        Tupla (usuarios, livros) ou None se alguma das tabelas estiver vazia
+    """
+    amostradores = []
+    for tabela in ("usuarios", "livros"):
+        amostrador = AmostradorChaves.da_tabela(
+            tabela, **opcoes_distribuicao(distribuicao, tabela)
+        )
+        if amostrador is None:
+            return None
+        amostradores.append(amostrador)
+    return tuple(amostradores)
+
+
+def _inicializar_worker(usuarios_ids, livros_ids):
+    """
+    Inicializa um processo do pool com as listas de ids usadas nos empréstimos.
+    """
+    _IDS_WORKER["usuarios"] = usuarios_ids
+    _IDS_WORKER["livros"] = livros_ids
+
+
+def _ids_worker(tabela, vetorizado):
+    """
+    Retorna os ids de uma tabela no worker: o array NumPy no modo vetorizado
+    ou uma lista Python (convertida uma única vez) no modo por linha.
+    AmostradorChaves são usados diretamente nos dois modos.
+    """
+    if vetorizado or isinstance(_IDS_WORKER[tabela], AmostradorChaves):
+        return _IDS_WORKER[tabela]
+
+    chave = f"{tabela}_lista"
+    if chave not in _IDS_WORKER:
+        _IDS_WORKER[chave] = _IDS_WORKER[tabela].tolist()
+    return _IDS_WORKER[chave]
+
+
+def _carregar_shard(tarefa):
+    """
+    Gera e carrega um shard dentro de um processo do pool.
+
+    Args:
+        tarefa: Dicionário com a faixa do shard (inicio, quantidade, seed e
+            id_inicial) e, em 'opcoes', as opções da carga, iguais para todos
+            os shards (ver inserir_em_paralelo)
+
+    Returns:
+        Tupla (linhas afetadas pelo shard, métricas do shard exportadas do
+        registro do worker, para serem mescladas no processo principal)
+    """
+    opcoes = tarefa["opcoes"]
+    tabela = opcoes["tabela"]
+    modo_carga = opcoes["modo_carga"]
+    vetorizado = opcoes["vetorizado"]
+    inicio = tarefa["inicio"]
+    quantidade = tarefa["quantidade"]
+    id_inicial = tarefa["id_inicial"]
+
+    # Todos os shards sorteiam do mesmo vocabulário, já salvo em disco pelo
+    # processo principal
+    vocabulario = None
+    if opcoes["parametros_vocabulario"] is not None:
+        seed_vocabulario, tamanhos = opcoes["parametros_vocabulario"]
+        vocabulario = VocabularioFaker.carregar(opcoes["locales"], seed_vocabulario, tamanhos)
+
+    gerador = BibliotecaDataGenerator(
+        locales=opcoes["locales"], seed=tarefa["seed"], vocabulario=vocabulario
+    )
+    # As chaves únicas usam a semente base: cada linha é numerada pelo id, e
+    # a mesma permutação em todos os shards garante que não se repitam
+    gerador.gerador_chaves = GeradorChaves(opcoes["seed_chaves"])
+    # Lotes do shard gravados no cache de dados, nomeados pelo primeiro id
+    gerador._gravacao = opcoes["pasta_cache"]
+    gerador._prefixo_lote = f"{id_inicial:012d}-"
+    gerador._sem_conflito = opcoes["sem_conflito"]
+    batch_size = TAMANHO_LOTE[tabela]
+    total_inseridos = 0
+    # O processo do pool é reaproveitado entre shards: só as métricas deste
+    # shard voltam para o processo principal
+    REGISTRO.limpar()
+
+    for i in range(0, quantidade, batch_size):
+        batch_size_atual = min(batch_size, quantidade - i)
+        inicio_geracao = time.perf_counter()
+
+        if tabela == "usuarios":
+            lote = gerador.gerar_lote_usuarios(batch_size_atual, vetorizado, id_inicial + i)
+        elif tabela == "livros":
+            lote = gerador.gerar_lote_livros(batch_size_atual, vetorizado, id_inicial + i)
+        else:
+            lote = gerador.gerar_lote_emprestimos(
+                batch_size_atual,
+                _ids_worker("livros", vetorizado),
+                _ids_worker("usuarios", vetorizado),
+                vetorizado,
+            )
+        # A posição na carga inteira (e não no shard) define as datas
+        lote = gerador._correlacionar(tabela, lote, inicio + i, opcoes["correlacao"])
+
+        if vetorizado:
+            params = dict(lote)
+            params["id"] = np.arange(
+                id_inicial + i, id_inicial + i + batch_size_atual
+            )
+        else:
+            params = [(id_inicial + i + j,) + linha for j, linha in enumerate(lote)]
+        tempo_geracao = time.perf_counter() - inicio_geracao
+
+        # Workers que inserem chaves únicas repetidas (ex: geradas com outra
+        # semente) podem entrar em deadlock.
+        # O lote é desfeito por inteiro, então pode ser reenviado com segurança.
+        inicio_carga = time.perf_counter()
+        for tentativa in range(TENTATIVAS_DEADLOCK):
+            try:
+                total_inseridos += gerador._carregar_lote(
+                    tabela, params, modo_carga, com_id=True
+                )
+                break
+            except psycopg2.errors.DeadlockDetected:
+                if tentativa == TENTATIVAS_DEADLOCK - 1:
+                    raise
+                time.sleep(0.05 * (tentativa + 1))
+        REGISTRO.registrar_lote(
+            tabela, batch_size_atual, tempo_geracao, time.perf_counter() - inicio_carga
+        )
+
+    return total_inseridos, REGISTRO.exportar()
+
 
 class BibliotecaDataGenerator:
-    def __init__(self, locales=["pt_BR"], seed=42):
+    def __init__(self, locales=["pt_BR"], seed=42, vocabulario=False):
         """
         Inicializa o gerador de dados com Faker.
 
         Args:
             locales: Lista de localidades para Faker usar
             seed: Semente aleatória para garantir reprodutibilidade
+            vocabulario: Se True, nomes, e-mails, empresas, títulos e citações
+                são sorteados de pools pré-gerados e guardados em disco
+                (VocabularioFaker) em vez de chamar o Faker a cada linha.
+                Também aceita uma instância de VocabularioFaker.
         """
         self.fake = Faker(locales)
+        self.locales = locales
+        self.seed = seed
         Faker.seed(seed)
         random.seed(seed)
+        # Sorteios vetorizados com NumPy (usados quando vetorizado=True)
+        self.gerador_lotes = GeradorLotes(seed)
+        # CPFs, ISBNs e e-mails únicos derivados da posição de cada linha
+        self.gerador_chaves = GeradorChaves(seed)
+        if vocabulario is True:
+            vocabulario = VocabularioFaker.carregar(locales, seed)
+        self.vocabulario = vocabulario or None
+        self.estatisticas_carga = {}
+        # Tempos e vazões por estágio das cargas em pipeline
+        self.estatisticas_pipeline = {}
+        # Tempos de reconstrução do modo de carga rápida
+        self.estatisticas_carga_rapida = {}
+        # Próximo índice de shard de cada tabela no modo paralelo, para que
+        # chamadas sucessivas gerem shards novos
+        self._proximo_shard = {"usuarios": 0, "livros": 0, "emprestimos": 0}
+        # Cache de dados (ver popular_banco com cache=True): pasta onde os lotes
+        # estão sendo gravados, chamadas anteriores que compõem a chave do
+        # cache e se algum dado foi reproduzido do cache em vez de gerado
+        self._gravacao = None
+        self._prefixo_lote = ""
+        self._lotes_gravados = 0
+        self._historico_carga = []
+        self._reproduzido = False
+        # Modo de carga rápida (ver popular_banco com carga_rapida): as
+        # restrições UNIQUE estão removidas, então os lotes não usam ON CONFLICT
+        self._carga_rapida = None
+        self._sem_conflito = False
         self.generos_possiveis = [
             "Romance",
             "Ficção Científica",
@@ -44,9 +364,23 @@ class BibliotecaDataGenerator:
             "Esporte",
         ]
 
-    def create_schema(self):
+    def create_schema(self, particionamento=None, recriar=False, colunas_busca=False):
         """
         Cria as tabelas no banco de dados se elas não existirem.
+
+        Args:
+            particionamento: Layout de emprestimos (ver
+                partitioning.opcoes_particionamento). None mantém o layout da
+                tabela existente (ou cria a tabela única), False pede a tabela
+                única e o intervalo ('mes', 'trimestre', 'ano') ou um
+                dicionário com intervalo e particoes_hash pede a tabela
+                particionada por faixa de data_emprestimo.
+            recriar: Se emprestimos existir com outro layout, remove a tabela
+                (com os dados) e a cria de novo. Sem ele, a diferença gera
+                ValueError.
+            colunas_busca: Adiciona a livros as colunas geradas de
+                COLUNAS_BUSCA_LIVROS, se ainda não existirem (em uma tabela já
+                carregada, a tabela é reescrita)
         """
         schema_sql = """
         -- Tabela de usuários da biblioteca
@@ -71,27 +405,61 @@ class BibliotecaDataGenerator:
             publicado_em DATE,
             disponivel BOOLEAN DEFAULT TRUE
         );
-
-        -- Tabela de empréstimos
-        CREATE TABLE IF NOT EXISTS emprestimos (
-            id SERIAL PRIMARY KEY,
-            livro_id INTEGER NOT NULL REFERENCES livros(id),
-            usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
-            data_emprestimo DATE NOT NULL,
-            data_devolucao DATE,
-            status VARCHAR(20) NOT NULL
-        );
         """
         execute_query(schema_sql)
+        if colunas_busca:
+            for coluna, definicao in COLUNAS_BUSCA_LIVROS.items():
+                execute_query(f"ALTER TABLE livros ADD COLUMN IF NOT EXISTS {coluna} {definicao}")
+
+        desejado = opcoes_particionamento(particionamento)
+        layout = layout_emprestimos()
+        if layout is not None and particionamento is not None and layout != (desejado or False):
+            if not recriar:
+                raise ValueError(
+                    f"emprestimos já existe com outro layout ({layout or 'tabela única'}). "
+                    f"Use clear=True (ou recriar=True) para recriá-la"
+                )
+            print("Recriando a tabela emprestimos com o novo layout...")
+            execute_query("DROP TABLE emprestimos")
+            layout = None
+
+        if layout is None and desejado:
+            execute_query(sql_emprestimos_particionada(desejado, self.gerador_lotes.hoje))
+        elif layout is None:
+            execute_query(
+                """
+                -- Tabela de empréstimos
+                CREATE TABLE emprestimos (
+                    id SERIAL PRIMARY KEY,
+                    livro_id INTEGER NOT NULL REFERENCES livros(id),
+                    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+                    data_emprestimo DATE NOT NULL,
+                    data_devolucao DATE,
+                    status VARCHAR(20) NOT NULL
+                );
+                """
+            )
         print("Esquema criado com sucesso.")
 
-    def gerar_cpf(self):
-        """Gera um CPF formatado"""
-        return f"{random.randint(100, 999)}.{random.randint(100, 999)}.{random.randint(100, 999)}-{random.randint(10, 99)}"
+    def gerar_cpf(self, numero=None):
+        """
+        Gera um CPF formatado, com os dígitos verificadores corretos. Com o
+        número de sequência da linha o CPF é único (ver GeradorChaves); sem
+        ele, é sorteado e pode se repetir.
+        """
+        if numero is None:
+            numero = random.randrange(ESPACO_CPF)
+        return self.gerador_chaves.cpfs([numero])[0]
 
-    def gerar_isbn(self):
-        """Gera um ISBN-13 formatado"""
-        return f"978-{random.randint(0, 9)}-{random.randint(100000, 999999)}-{random.randint(10, 99)}-{random.randint(0, 9)}"
+    def gerar_isbn(self, numero=None):
+        """
+        Gera um ISBN-13 formatado, com o dígito verificador correto. Com o
+        número de sequência da linha o ISBN é único (ver GeradorChaves); sem
+        ele, é sorteado e pode se repetir.
+        """
+        if numero is None:
+            numero = random.randrange(ESPACO_ISBN)
+        return self.gerador_chaves.isbns([numero])[0]
 
     def gerar_poligono_dimensao(self):
         """Gera um polígono para representar dimensões do livro (L,A,P)"""
@@ -114,11 +482,72 @@ class BibliotecaDataGenerator:
         polygon_str = f"((0,0),({largura},0),({largura},{altura}),(0, {altura}), (0,0))"
         return polygon_str
 
-    def gerar_usuario(self):
-        """Gera dados para um usuário"""
-        nome = self.fake.name()
-        email = self.fake.email()
-        cpf = self.gerar_cpf()
+    def _parametros_vocabulario(self):
+        """
+        Retorna (seed, tamanhos) do vocabulário em uso, para os workers
+        carregarem o mesmo cache, ou None se o Faker é chamado diretamente.
+        """
+        if self.vocabulario is None:
+            return None
+        return (self.vocabulario.seed, self.vocabulario.tamanhos)
+
+    def _texto(self, pool):
+        """
+        Gera um texto do tipo do pool ('nomes', 'emails', 'empresas', 'titulos'
+        ou 'frases'), pelo vocabulário em disco se houver, ou pelo Faker.
+        """
+        if self.vocabulario is None:
+            return GERADORES_POOL[pool](self.fake)
+
+        return self.vocabulario.sortear(pool, random)
+
+    def _textos(self, pool, quantidade):
+        """
+        Versão em lote de _texto, usada pelos lotes colunares.
+        """
+        if self.vocabulario is None:
+            gerar = GERADORES_POOL[pool]
+            return [gerar(self.fake) for _ in range(quantidade)]
+
+        return self.vocabulario.amostrar(pool, quantidade, self.gerador_lotes.rng)
+
+    def _numeros(self, numero, quantidade, espaco):
+        """
+        Números de sequência de um lote que começa em `numero`. Sem número, são
+        sorteados do espaço de chaves (as chaves podem se repetir).
+        """
+        if numero is None:
+            return self.gerador_lotes.rng.integers(0, espaco, size=quantidade)
+        return np.arange(numero, numero + quantidade)
+
+    def _proximo_numero(self, tabela):
+        """
+        Primeiro número de sequência livre de uma tabela: o maior id mais um.
+        Cada linha recebe um id maior ou igual ao seu número (no modo paralelo,
+        o próprio id), então os números de uma carga não repetem os das
+        anteriores.
+        """
+        return int(
+            execute_query(f"SELECT COALESCE(MAX(id), 0) + 1 AS numero FROM {tabela}").numero[0]
+        )
+
+    def _emails(self, numeros):
+        """
+        Gera e-mails únicos: nome de usuário e domínio do Faker (ou do
+        vocabulário), que se repetem, mais o código do número de sequência.
+        """
+        return self.gerador_chaves.emails(numeros, self._textos("emails", len(numeros)))
+
+    def gerar_usuario(self, email=None, cpf=None):
+        """
+        Gera dados para um usuário. E-mail e CPF são sorteados se não forem
+        informados (gerar_lote_usuarios os gera únicos, para o lote inteiro).
+        """
+        nome = self._texto("nomes")
+        if email is None:
+            email = self._emails([random.randrange(ESPACO_EMAIL)])[0]
+        if cpf is None:
+            cpf = self.gerar_cpf()
         data_nascimento = self.fake.date_of_birth(minimum_age=5, maximum_age=90)
 
         return {
@@ -128,11 +557,15 @@ class BibliotecaDataGenerator:
             "data_nascimento": data_nascimento,
         }
 
-    def gerar_livro(self):
-        """Gera dados para um livro"""
-        titulo = self.fake.catch_phrase()
-        autor = self.fake.name()
-        isbn = self.gerar_isbn()
+    def gerar_livro(self, isbn=None):
+        """
+        Gera dados para um livro. O ISBN é sorteado se não for informado
+        (gerar_lote_livros os gera únicos, para o lote inteiro).
+        """
+        titulo = self._texto("titulos")
+        autor = self._texto("nomes")
+        if isbn is None:
+            isbn = self.gerar_isbn()
 
         # Selecionar apenas um gênero ao invés de múltiplos
         genero = random.choice(self.generos_possiveis)
@@ -140,7 +573,7 @@ class BibliotecaDataGenerator:
         # Gerar entre 0 e 5 citações
         num_citacoes = random.randint(0, 5)
         citacoes = (
-            [self.fake.paragraph(nb_sentences=1) for _ in range(num_citacoes)]
+            [self._texto("frases") for _ in range(num_citacoes)]
             if num_citacoes > 0
             else None
         )
@@ -148,7 +581,7 @@ class BibliotecaDataGenerator:
         # Metadados em formato JSON
         metadados = {
             "num_paginas": random.randint(50, 1000),
-            "editora": self.fake.company(),
+            "editora": self._texto("empresas"),
             "edicao": random.randint(1, 10),
             "idioma": random.choice(["Português", "Inglês", "Espanhol", "Francês"]),
             "peso": round(random.uniform(0.1, 3.0), 2),  # peso em kg
@@ -195,164 +628,642 @@ class BibliotecaDataGenerator:
             "status": status,
         }
 
-    def inserir_usuarios(self, quantidade=1000, batch_size=1000):
+    def _carregar_lote(self, tabela, params, modo_carga, sql=None, com_id=False):
         """
-        Insere usuários em lote no banco de dados.
+        Envia um lote para o banco usando o modo de carga escolhido.
 
         Args:
-            quantidade: Número de usuários a serem gerados
-            batch_size: Tamanho do lote para inserção
+            tabela: Tabela de destino ('usuarios', 'livros' ou 'emprestimos')
+            params: Lista de tuplas na ordem de ESQUEMA_CARGA[tabela] ou lote
+                colunar (dict coluna -> valores)
+            modo_carga: 'insert', 'copy' ou 'copy_binary'
+            sql: INSERT a usar no modo 'insert' (gerado a partir do esquema se omitido)
+            com_id: Se as tuplas trazem o id explícito como primeira coluna. Nesse
+                caso, conflitos de unicidade mantêm a linha de menor id.
+
+        Returns:
+            Número de linhas afetadas
         """
-        print(f"Gerando {quantidade} usuários...")
-
-        # SQL para inserção
-        sql = """
-        INSERT INTO usuarios (nome, email, cpf, data_nascimento)
-        VALUES (%s, %s, %s, %s)
-        ON CONFLICT (email) DO NOTHING
+        self._gravar_lote(tabela, params, com_id)
+        return self._enviar_lote(tabela, params, modo_carga, sql, com_id)
+
+    def _colunas_carga(self, tabela, com_id):
+        colunas, tipos, conflito = ESQUEMA_CARGA[tabela]
+        if self._sem_conflito:
+            # Duplicatas removidas ao concluir a carga rápida
+            conflito = None
+        if com_id:
+            return ("id",) + colunas, ("int4",) + tipos, conflito, "id"
+        return colunas, tipos, conflito, None
+
+    def _gravar_lote(self, tabela, params, com_id=False):
+        """
+        Grava o lote no cache de dados, se uma gravação estiver em andamento.
         """
+        if self._gravacao is not None:
+            colunas = self._colunas_carga(tabela, com_id)[0]
+            nome = f"{self._prefixo_lote}{self._lotes_gravados:06d}"
+            gravar_lote(self._gravacao, tabela, nome, params, colunas)
+            self._lotes_gravados += 1
 
-        execute_many(
-            sql,
-            [
-                (
-                    "Vitória Albuquerque",
-                    "gustavo-henrique24@example.org",
-                    "532.710.165-59",
-                    "2010-11-20",
-                )
-            ],
+    def _enviar_lote(self, tabela, params, modo_carga, sql=None, com_id=False):
+        """
+        Envia um lote ao banco (parte de _carregar_lote segura para threads).
+        """
+        colunas, tipos, conflito, manter_menor = self._colunas_carga(tabela, com_id)
+
+        if modo_carga == "insert":
+            if sql is None or self._sem_conflito:
+                sql = _sql_insert(tabela, colunas, tipos, conflito, manter_menor)
+            if isinstance(params, dict):
+                params = para_linhas(params, colunas)
+            return execute_many(sql, params)
+
+        formato = "binary" if modo_carga == "copy_binary" else "text"
+        return execute_copy(
+            tabela, colunas, params, formato, tipos, conflito, manter_menor
         )
 
-        total_inseridos = 1
+    def gerar_lote_usuarios(self, quantidade, vetorizado=False, numero=None):
+        """
+        Gera um lote de usuários.
 
-        for i in range(0, quantidade, batch_size):
-            batch_size_atual = min(batch_size, quantidade - i)
-            batch_usuarios = [self.gerar_usuario() for _ in range(batch_size_atual)]
+        Args:
+            quantidade: Tamanho do lote
+            vetorizado: Se True, retorna um lote colunar (dict coluna -> valores)
+                com as datas sorteadas pelo GeradorLotes; caso contrário, uma
+                lista de tuplas na ordem de COLUNAS_USUARIOS
+            numero: Número de sequência da primeira linha; e-mails e CPFs são
+                derivados dos números das linhas e nunca se repetem entre
+                números distintos (ver GeradorChaves). Se None, são sorteados.
+        """
+        numeros = self._numeros(numero, quantidade, min(ESPACO_CPF, ESPACO_EMAIL))
+        emails = self._emails(numeros)
+        cpfs = self.gerador_chaves.cpfs(numeros)
+
+        if vetorizado:
+            colunas = self.gerador_lotes.colunas_usuarios(quantidade)
+            return {
+                "nome": self._textos("nomes", quantidade),
+                "email": emails,
+                "cpf": cpfs,
+                "data_nascimento": colunas["data_nascimento"],
+            }
+
+        return [
+            (
+                usuario["nome"],
+                usuario["email"],
+                usuario["cpf"],
+                usuario["data_nascimento"],
+            )
+            for usuario in (
+                self.gerar_usuario(email, cpf) for email, cpf in zip(emails, cpfs)
+            )
+        ]
 
-            # Preparar os parâmetros para inserção em lote
-            params = [
-                (
-                    usuario["nome"],
-                    usuario["email"],
-                    usuario["cpf"],
-                    usuario["data_nascimento"],
+    def gerar_lote_livros(self, quantidade, vetorizado=False, numero=None):
+        """
+        Gera um lote de livros.
+
+        Args:
+            quantidade: Tamanho do lote
+            vetorizado: Se True, retorna um lote colunar com os campos numéricos,
+                de data e categóricos sorteados pelo GeradorLotes; caso
+                contrário, uma lista de tuplas na ordem de COLUNAS_LIVROS
+            numero: Número de sequência da primeira linha, de onde vêm os
+                ISBNs únicos (ver gerar_lote_usuarios)
+        """
+        isbns = self.gerador_chaves.isbns(self._numeros(numero, quantidade, ESPACO_ISBN))
+
+        if vetorizado:
+            colunas = self.gerador_lotes.colunas_livros(
+                quantidade, self.generos_possiveis
+            )
+            # Sorteia todas as citações do lote de uma vez e depois reparte
+            num_citacoes = colunas["num_citacoes"].tolist()
+            frases = iter(self._textos("frases", sum(num_citacoes)))
+            citacoes = [
+                [next(frases) for _ in range(n)] if n > 0 else None
+                for n in num_citacoes
+            ]
+            metadados = [
+                json.dumps(
+                    {
+                        "num_paginas": num_paginas,
+                        "editora": editora,
+                        "edicao": edicao,
+                        "idioma": idioma,
+                        "peso": peso,
+                    }
+                )
+                for num_paginas, editora, edicao, idioma, peso in zip(
+                    colunas["num_paginas"].tolist(),
+                    self._textos("empresas", quantidade),
+                    colunas["edicao"].tolist(),
+                    colunas["idioma"].tolist(),
+                    colunas["peso"].tolist(),
                 )
-                for usuario in batch_usuarios
             ]
+            return {
+                "isbn": isbns,
+                "titulo": self._textos("titulos", quantidade),
+                "autor": self._textos("nomes", quantidade),
+                "genero": colunas["genero"],
+                "citacoes": citacoes,
+                "metadados": metadados,
+                "dimensao": colunas["dimensao"],
+                "publicado_em": colunas["publicado_em"],
+                "disponivel": colunas["disponivel"],
+            }
+
+        return [
+            (
+                livro["isbn"],
+                livro["titulo"],
+                livro["autor"],
+                livro["genero"],  # Agora é um único valor, não um array
+                livro["citacoes"],
+                livro["metadados"],
+                livro["dimensao"],
+                livro["publicado_em"],
+                livro["disponivel"],
+            )
+            for livro in (self.gerar_livro(isbn) for isbn in isbns)
+        ]
 
-            # Executar inserção em lote
-            rows_affected = execute_many(sql, params)
-            total_inseridos += rows_affected
+    def gerar_lote_emprestimos(
+        self, quantidade, livros_ids, usuarios_ids, vetorizado=False
+    ):
+        """
+        Gera um lote de empréstimos.
+
+        Args:
+            quantidade: Tamanho do lote
+            livros_ids: Ids de livros existentes ou um AmostradorChaves
+            usuarios_ids: Ids de usuários existentes ou um AmostradorChaves
+            vetorizado: Se True, retorna um lote colunar gerado inteiramente pelo
+                GeradorLotes; caso contrário, uma lista de tuplas na ordem de
+                COLUNAS_EMPRESTIMOS
+        """
+        if vetorizado:
+            colunas = self.gerador_lotes.colunas_emprestimos(
+                quantidade, livros_ids, usuarios_ids
+            )
+            return {nome: colunas[nome] for nome in COLUNAS_EMPRESTIMOS}
 
-            # print(f"Inseridos {total_inseridos} usuários de {quantidade}...")
+        if isinstance(livros_ids, AmostradorChaves):
+            # Sorteados de uma vez pelo gerador NumPy, na distribuição escolhida
+            sorteados = zip(
+                self.gerador_lotes.sortear_ids(livros_ids, quantidade).tolist(),
+                self.gerador_lotes.sortear_ids(usuarios_ids, quantidade).tolist(),
+            )
+        else:
+            sorteados = (
+                (random.choice(livros_ids), random.choice(usuarios_ids))
+                for _ in range(quantidade)
+            )
 
-        return total_inseridos
+        lote = []
+        for livro_id, usuario_id in sorteados:
+            emprestimo = self.gerar_emprestimo(livro_id, usuario_id)
+
+            lote.append(
+                (
+                    emprestimo["livro_id"],
+                    emprestimo["usuario_id"],
+                    emprestimo["data_emprestimo"],
+                    emprestimo["data_devolucao"],
+                    emprestimo["status"],
+                )
+            )
+        return lote
 
-    def inserir_livros(self, quantidade=2000, batch_size=1000):
+    def _correlacionar(self, tabela, lote, posicao, correlacao):
         """
-        Insere livros em lote no banco de dados.
+        Substitui a coluna de data de um lote (ver DATAS_CORRELACIONADAS) por
+        datas que acompanham a posição das linhas na carga, de modo que a ordem
+        física da tabela fique correlacionada com a data. Nos empréstimos, a
+        data de devolução é deslocada junto com a de empréstimo.
 
         Args:
-            quantidade: Número de livros a serem gerados
-            batch_size: Tamanho do lote para inserção
+            lote: Lote colunar ou lista de tuplas
+            posicao: Posição da primeira linha do lote na carga
+            correlacao: None (lote inalterado) ou tupla (fator, total), com o
+                fator de 0.0 a 1.0 e o total de linhas da carga (ver
+                GeradorLotes.datas_correlacionadas)
         """
-        print(f"Gerando {quantidade} livros...")
+        if correlacao is None or tabela not in DATAS_CORRELACIONADAS:
+            return lote
+        fator, total = correlacao
+        coluna, anos = DATAS_CORRELACIONADAS[tabela]
+        hoje = self.gerador_lotes.hoje
+        quantidade = len(lote[coluna]) if isinstance(lote, dict) else len(lote)
+        datas = self.gerador_lotes.datas_correlacionadas(
+            posicao, quantidade, total, _anos_atras(hoje, anos), hoje, fator
+        )
 
-        # SQL para inserção - modificado para usar genero em vez de generos
-        sql = """
-        INSERT INTO livros (isbn, titulo, autor, genero, citacoes, metadados, dimensao, publicado_em, disponivel)
-        VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s::polygon, %s, %s)
-        ON CONFLICT (isbn) DO NOTHING
+        if isinstance(lote, dict):
+            lote = dict(lote)
+            if tabela == "emprestimos":
+                lote["data_devolucao"] = lote["data_devolucao"] + (
+                    datas - lote["data_emprestimo"]
+                )
+            lote[coluna] = datas
+            return lote
+
+        colunas = ESQUEMA_CARGA[tabela][0]
+        indice = colunas.index(coluna)
+        devolucao = colunas.index("data_devolucao") if tabela == "emprestimos" else None
+        linhas = []
+        for linha, data in zip(lote, datas.astype(object)):
+            linha = list(linha)
+            if devolucao is not None and linha[devolucao] is not None:
+                linha[devolucao] += data - linha[indice]
+            linha[indice] = data
+            linhas.append(tuple(linha))
+        return linhas
+
+    def _inserir_usuario_fixo(self):
         """
+        Insere o usuário fixo usado pela consulta do experimento de hash. O CPF
+        dele não é válido e o e-mail não tem código, então nunca coincidem com
+        as chaves geradas.
 
-        total_inseridos = 0
+        Returns:
+            Número de linhas inseridas (0 se ele já existia)
+        """
+        email = "gustavo-henrique24@example.org"
+        inseridos = self._enviar_lote(
+            "usuarios",
+            [("Vitória Albuquerque", email, "532.710.165-59", "2010-11-20")],
+            "insert",
+            SQL_INSERIR_USUARIOS,
+        )
+        if self._sem_conflito:
+            # Sem o ON CONFLICT o usuário fixo se repete a cada carga; removido
+            # já aqui para que o maior id (base dos shards) não mude
+            inseridos -= execute_query(
+                "DELETE FROM usuarios WHERE email = %s "
+                "AND id > (SELECT MIN(id) FROM usuarios WHERE email = %s)",
+                (email, email),
+            )
+        return inseridos
+
+    def inserir_usuarios(
+        self,
+        quantidade=1000,
+        batch_size=1000,
+        modo_carga="insert",
+        vetorizado=False,
+        pipeline=None,
+    ):
+        """
+        Insere usuários em lote no banco de dados.
 
-        for i in range(0, quantidade, batch_size):
-            batch_size_atual = min(batch_size, quantidade - i)
-            batch_livros = [self.gerar_livro() for _ in range(batch_size_atual)]
+        Args:
+            quantidade: Número de usuários a serem gerados
+            batch_size: Tamanho do lote para inserção
+            modo_carga: 'insert' (executemany), 'copy' ou 'copy_binary'
+            vetorizado: Gera os lotes em formato colunar com NumPy
+            pipeline: Sobrepõe geração e escrita (ver _carregar_lotes)
+        """
+        print(f"Gerando {quantidade} usuários...")
 
-            # Preparar os parâmetros para inserção em lote
-            params = [
-                (
-                    livro["isbn"],
-                    livro["titulo"],
-                    livro["autor"],
-                    livro["genero"],  # Agora é um único valor, não um array
-                    livro["citacoes"],
-                    livro["metadados"],
-                    livro["dimensao"],
-                    livro["publicado_em"],
-                    livro["disponivel"],
-                )
-                for livro in batch_livros
-            ]
+        inseridos = self._inserir_usuario_fixo()
 
-            # Executar inserção em lote
-            rows_affected = execute_many(sql, params)
-            total_inseridos += rows_affected
+        numero = self._proximo_numero("usuarios")
+        lotes = (
+            self.gerar_lote_usuarios(
+                min(batch_size, quantidade - i), vetorizado, numero + i
+            )
+            for i in range(0, quantidade, batch_size)
+        )
+        return inseridos + self._carregar_lotes(
+            "usuarios", lotes, modo_carga, SQL_INSERIR_USUARIOS, pipeline
+        )
 
-            # print(f"Inseridos {total_inseridos} livros de {quantidade}...")
+    def inserir_livros(
+        self,
+        quantidade=2000,
+        batch_size=1000,
+        modo_carga="insert",
+        vetorizado=False,
+        pipeline=None,
+        correlacao=None,
+    ):
+        """
+        Insere livros em lote no banco de dados.
+
+        Args:
+            quantidade: Número de livros a serem gerados
+            batch_size: Tamanho do lote para inserção
+            modo_carga: 'insert' (executemany), 'copy' ou 'copy_binary'
+            vetorizado: Gera os lotes em formato colunar com NumPy
+            pipeline: Sobrepõe geração e escrita (ver _carregar_lotes)
+            correlacao: Correlação entre publicado_em e a ordem de inserção
+                (ver popular_banco)
+        """
+        print(f"Gerando {quantidade} livros...")
 
-        return total_inseridos
+        correlacao = None if correlacao is None else (correlacao, quantidade)
+        numero = self._proximo_numero("livros")
+        lotes = (
+            self._correlacionar(
+                "livros",
+                self.gerar_lote_livros(
+                    min(batch_size, quantidade - i), vetorizado, numero + i
+                ),
+                i,
+                correlacao,
+            )
+            for i in range(0, quantidade, batch_size)
+        )
+        return self._carregar_lotes(
+            "livros", lotes, modo_carga, SQL_INSERIR_LIVROS, pipeline
+        )
 
-    def inserir_emprestimos(self, quantidade=50000, batch_size=5000):
+    def inserir_emprestimos(
+        self,
+        quantidade=50000,
+        batch_size=5000,
+        modo_carga="insert",
+        vetorizado=False,
+        distribuicao=None,
+        pipeline=None,
+        correlacao=None,
+    ):
         """
         Insere empréstimos em lote no banco de dados.
 
         Args:
             quantidade: Número de empréstimos a serem gerados
             batch_size: Tamanho do lote para inserção
+            modo_carga: 'insert' (executemany), 'copy' ou 'copy_binary'
+            vetorizado: Gera os lotes em formato colunar com NumPy
+            distribuicao: Se informada, as chaves estrangeiras são sorteadas
+                das faixas de ids com um AmostradorChaves ('uniforme', 'zipf',
+                'quente' ou dicionário de opções, ver opcoes_distribuicao), sem
+                carregar todos os ids no cliente
+            pipeline: Sobrepõe geração e escrita (ver _carregar_lotes)
+            correlacao: Correlação entre data_emprestimo e a ordem de inserção
+                (ver popular_banco)
         """
         print(f"Gerando {quantidade} empréstimos...")
 
-        # Primeiro, obtém os IDs de usuários e livros disponíveis
-        usuarios_ids = execute_query("SELECT id FROM usuarios").id.tolist()
-        livros_ids = execute_query("SELECT id FROM livros").id.tolist()
+        if distribuicao is not None:
+            amostradores = amostradores_emprestimos(distribuicao)
+            if amostradores is None:
+                print(
+                    "Não há usuários ou livros suficientes no banco para gerar empréstimos."
+                )
+                return 0
+            usuarios_ids, livros_ids = amostradores
+        else:
+            # Primeiro, obtém os IDs de usuários e livros disponíveis
+            usuarios_ids = carregar_ids("usuarios")
+            livros_ids = carregar_ids("livros")
 
-        if not usuarios_ids or not livros_ids:
-            print(
-                "Não há usuários ou livros suficientes no banco para gerar empréstimos."
+            if not len(usuarios_ids) or not len(livros_ids):
+                print(
+                    "Não há usuários ou livros suficientes no banco para gerar empréstimos."
+                )
+                return 0
+
+        if not vetorizado and distribuicao is None:
+            # random.choice devolveria inteiros NumPy, que o psycopg2 não adapta
+            usuarios_ids = usuarios_ids.tolist()
+            livros_ids = livros_ids.tolist()
+
+        correlacao = None if correlacao is None else (correlacao, quantidade)
+        lotes = (
+            self._correlacionar(
+                "emprestimos",
+                self.gerar_lote_emprestimos(
+                    min(batch_size, quantidade - i), livros_ids, usuarios_ids, vetorizado
+                ),
+                i,
+                correlacao,
             )
-            return 0
+            for i in range(0, quantidade, batch_size)
+        )
+        return self._carregar_lotes(
+            "emprestimos", lotes, modo_carga, SQL_INSERIR_EMPRESTIMOS, pipeline
+        )
 
-        # SQL para inserção
-        sql = """
-        INSERT INTO emprestimos (livro_id, usuario_id, data_emprestimo, data_devolucao, status)
-        VALUES (%s, %s, %s, %s, %s)
+    def _carregar_lotes(self, tabela, lotes, modo_carga, sql, pipeline=None):
+        """
+        Carrega os lotes de uma tabela: um a um, alternando geração e escrita,
+        ou em pipeline (ver PipelineCarga), com a geração desta thread
+        sobreposta à escrita de outras.
+
+        Args:
+            lotes: Iterável que gera os lotes
+            pipeline: None, número de escritores ou dicionário de opções do
+                PipelineCarga (escritores, profundidade)
+
+        Returns:
+            Número de linhas afetadas
         """
+        if pipeline is None:
+            total = 0
+            lotes = iter(lotes)
+            while True:
+                inicio = time.perf_counter()
+                params = next(lotes, None)
+                if params is None:
+                    break
+                tempo_geracao = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                total += self._carregar_lote(tabela, params, modo_carga, sql)
+                REGISTRO.registrar_lote(
+                    tabela, tamanho_lote(params), tempo_geracao, time.perf_counter() - inicio
+                )
+            return total
+
+        if not isinstance(pipeline, dict):
+            pipeline = {"escritores": pipeline}
+        carga = PipelineCarga(**pipeline)
+
+        def gerar_e_gravar():
+            # A gravação no cache acontece na geração, na ordem dos lotes
+            lotes_iter = iter(lotes)
+            while True:
+                inicio = time.perf_counter()
+                params = next(lotes_iter, None)
+                if params is None:
+                    return
+                REGISTRO.registrar_lote(
+                    tabela, tamanho_lote(params), geracao_s=time.perf_counter() - inicio
+                )
+                self._gravar_lote(tabela, params)
+                yield params
+
+        def enviar(params):
+            inicio = time.perf_counter()
+            linhas = self._enviar_lote(tabela, params, modo_carga, sql)
+            REGISTRO.registrar_lote(tabela, carga_s=time.perf_counter() - inicio)
+            return linhas
+
+        total = carga.executar(gerar_e_gravar(), enviar)
+        estatisticas = carga.estatisticas
+        self.estatisticas_pipeline[tabela] = estatisticas
+        print(
+            f"Pipeline de {tabela}: geração "
+            f"{estatisticas['linhas_por_segundo_geracao']:.0f} linhas/s, escrita "
+            f"{estatisticas['linhas_por_segundo_escrita']:.0f} linhas/s "
+            f"({estatisticas['escritores']} escritores), gargalo: "
+            f"{estatisticas['gargalo']}"
+        )
+        return total
+
+    def inserir_em_paralelo(
+        self,
+        tabela,
+        quantidade,
+        num_workers,
+        tamanho_shard=TAMANHO_SHARD,
+        modo_carga="insert",
+        vetorizado=False,
+        distribuicao=None,
+        correlacao=None,
+    ):
+        """
+        Gera e insere registros de uma tabela dividindo o trabalho em shards
+        processados por um pool de processos.
 
-        total_inseridos = 0
+        O trabalho é dividido em shards de tamanho fixo e cada shard recebe uma
+        semente derivada de (seed, tabela, índice do shard) e uma faixa própria
+        de ids. E-mails, CPFs e ISBNs são derivados dos ids (ver
+        GeradorChaves), então não se repetem entre shards; conflitos com linhas
+        geradas por outra semente mantêm a linha de menor id. Assim, a mesma
+        seed gera o mesmo conjunto de dados independentemente do número de
+        workers. Cada worker usa sua própria conexão com o banco.
 
-        for i in range(0, quantidade, batch_size):
-            batch_size_atual = min(batch_size, quantidade - i)
-            batch_params = []
+        Args:
+            tabela: 'usuarios', 'livros' ou 'emprestimos'
+            quantidade: Número de registros a serem gerados
+            num_workers: Número de processos do pool
+            tamanho_shard: Número de registros por shard
+            modo_carga: 'insert' (executemany), 'copy' ou 'copy_binary'
+            vetorizado: Gera os lotes em formato colunar com NumPy
+            distribuicao: Distribuição das chaves estrangeiras dos empréstimos
+                (ver inserir_emprestimos)
+            correlacao: Correlação entre a coluna de data e a ordem dos ids
+                (ver popular_banco); cada shard calcula as datas da sua faixa
+
+        Returns:
+            Número de linhas inseridas
+        """
+        print(f"Gerando {quantidade} {tabela} com {num_workers} processos...")
 
-            for _ in range(batch_size_atual):
-                livro_id = random.choice(livros_ids)
-                usuario_id = random.choice(usuarios_ids)
-                emprestimo = self.gerar_emprestimo(livro_id, usuario_id)
+        usuarios_ids = livros_ids = None
+        total_inicial = int(
+            execute_query(f"SELECT COUNT(*) AS total FROM {tabela}").total[0]
+        )
 
-                batch_params.append(
-                    (
-                        emprestimo["livro_id"],
-                        emprestimo["usuario_id"],
-                        emprestimo["data_emprestimo"],
-                        emprestimo["data_devolucao"],
-                        emprestimo["status"],
-                    )
+        if tabela == "usuarios":
+            self._inserir_usuario_fixo()
+        elif tabela == "emprestimos" and distribuicao is not None:
+            # Os workers recebem só as faixas de ids
+            amostradores = amostradores_emprestimos(distribuicao)
+            if amostradores is None:
+                print(
+                    "Não há usuários ou livros suficientes no banco para gerar empréstimos."
                 )
+                return 0
+            usuarios_ids, livros_ids = amostradores
+        elif tabela == "emprestimos":
+            # Listas ordenadas para que a escolha das chaves seja determinística
+            usuarios_ids = carregar_ids("usuarios", ordenar=True)
+            livros_ids = carregar_ids("livros", ordenar=True)
+
+            if not len(usuarios_ids) or not len(livros_ids):
+                print(
+                    "Não há usuários ou livros suficientes no banco para gerar empréstimos."
+                )
+                return 0
 
-            # Executar inserção em lote
-            rows_affected = execute_many(sql, batch_params)
-            total_inseridos += rows_affected
+        id_base = int(
+            execute_query(f"SELECT COALESCE(MAX(id), 0) AS id FROM {tabela}").id[0]
+        )
 
-            # print(f"Inseridos {total_inseridos} empréstimos de {quantidade}...")
+        # Opções da carga, iguais para todos os shards e lidas pelo nome em
+        # _carregar_shard: uma opção nova é só mais uma chave
+        opcoes = {
+            "tabela": tabela,
+            "locales": self.locales,
+            "modo_carga": modo_carga,
+            "vetorizado": vetorizado,
+            "parametros_vocabulario": self._parametros_vocabulario(),
+            "pasta_cache": self._gravacao,
+            "sem_conflito": self._sem_conflito,
+            "correlacao": None if correlacao is None else (correlacao, quantidade),
+            "seed_chaves": self.seed,
+        }
+        primeiro_shard = self._proximo_shard[tabela]
+        tarefas = [
+            {
+                "opcoes": opcoes,
+                "inicio": inicio,
+                "quantidade": min(tamanho_shard, quantidade - inicio),
+                "seed": derivar_seed(self.seed, tabela, shard),
+                "id_inicial": id_base + inicio + 1,
+            }
+            for shard, inicio in enumerate(
+                range(0, quantidade, tamanho_shard), start=primeiro_shard
+            )
+        ]
+        self._proximo_shard[tabela] = primeiro_shard + len(tarefas)
+
+        contexto = multiprocessing.get_context("spawn")
+        pool = contexto.Pool(
+            num_workers,
+            initializer=_inicializar_worker,
+            initargs=(usuarios_ids, livros_ids),
+        )
+        try:
+            for _, metricas in pool.imap_unordered(_carregar_shard, tarefas):
+                REGISTRO.mesclar(metricas)
+            pool.close()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        # Os workers escrevem em outros processos, fora do cache deste
+        invalidate_result_cache([tabela])
+
+        # Ids explícitos não avançam a sequência do SERIAL
+        execute_query(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+            f"GREATEST(MAX(id), 1), MAX(id) IS NOT NULL) FROM {tabela}"
+        )
 
-        return total_inseridos
+        # Linhas substituídas em conflitos também contam como afetadas pelos
+        # shards, então o total é medido pela contagem da tabela
+        total_final = int(
+            execute_query(f"SELECT COUNT(*) AS total FROM {tabela}").total[0]
+        )
+        return total_final - total_inicial
 
     def popular_banco(
-        self, num_usuarios=2000, num_livros=4000, num_emprestimos=6000, clear=False
+        self,
+        num_usuarios=2000,
+        num_livros=4000,
+        num_emprestimos=6000,
+        clear=False,
+        modo_carga="insert",
+        num_workers=None,
+        tamanho_shard=TAMANHO_SHARD,
+        vetorizado=False,
+        cache=False,
+        distribuicao=None,
+        pipeline=None,
+        carga_rapida=False,
+        correlacao=None,
+        particionamento=None,
+        colunas_busca=False,
     ):
         """
         Popula o banco de dados com a quantidade desejada de registros.
@@ -361,22 +1272,259 @@ class BibliotecaDataGenerator:
             num_usuarios: Número de usuários a serem gerados
             num_livros: Número de livros a serem gerados
             num_emprestimos: Número de empréstimos a serem gerados
+            modo_carga: 'insert' (executemany), 'copy' (COPY texto) ou
+                'copy_binary' (COPY binário)
+            num_workers: Se informado, gera e carrega os dados em shards
+                distribuídos entre num_workers processos (ver inserir_em_paralelo)
+            tamanho_shard: Número de registros por shard no modo paralelo
+            vetorizado: Sorteia datas, categorias, chaves estrangeiras e campos
+                numéricos em colunas inteiras com NumPy (GeradorLotes)
+            cache: Grava os lotes gerados em Parquet (ver CacheDados). Se a
+                mesma chamada já foi gravada (mesma semente, localidades,
+                quantidades, opções, chamadas anteriores e estado inicial do
+                banco), os lotes são lidos do disco em vez de gerados.
+            distribuicao: Distribuição de acesso das chaves estrangeiras dos
+                empréstimos: 'uniforme', 'zipf', 'quente' ou dicionário de
+                opções do AmostradorChaves (ver inserir_emprestimos). Se None,
+                os ids são carregados e sorteados de forma uniforme.
+            pipeline: Sobrepõe a geração dos lotes à escrita no banco, com
+                escritores lendo de uma fila limitada: número de escritores ou
+                dicionário com escritores e profundidade (ver PipelineCarga).
+                As estatísticas de cada estágio ficam em estatisticas_pipeline.
+                Não se aplica ao modo paralelo, em que cada processo já gera e
+                escreve seus shards.
+            carga_rapida: Adia restrições UNIQUE, chaves estrangeiras e índices
+                secundários para depois da carga (ver CargaRapida). Aceita True
+                ou um dicionário de opções (ex: {'unlogged': True,
+                'synchronous_commit': False}). Cada tabela é concluída
+                (duplicatas removidas, restrições e índices reconstruídos,
+                ANALYZE) antes da seguinte; os tempos ficam em
+                estatisticas_carga_rapida.
+            correlacao: Controla a correlação física entre a ordem das linhas
+                e livros.publicado_em / emprestimos.data_emprestimo, para
+                avaliar índices BRIN. 1.0 gera as datas em ordem crescente de
+                id; valores menores embaralham essa fração das linhas (0.0
+                equivale a datas aleatórias). None mantém o sorteio normal.
+            particionamento: Layout de emprestimos passado a create_schema:
+                'mes', 'trimestre', 'ano' ou dicionário com intervalo e
+                particoes_hash (ex: {'intervalo': 'mes', 'particoes_hash': 4});
+                False volta à tabela única e None mantém o layout atual. Com
+                clear=True a tabela é recriada se o layout mudar. As linhas são
+                carregadas na tabela pai e o PostgreSQL as encaminha para as
+                partições.
+            colunas_busca: Cria em livros as colunas pré-calculadas de busca
+                (tsvector do título, dimensão como box e como ponto), para
+                indexá-las no lugar das expressões (ver create_schema)
         """
+        if modo_carga not in MODOS_CARGA:
+            raise ValueError(
+                f"Modo de carga inválido: {modo_carga}. Use um de {MODOS_CARGA}"
+            )
+        if correlacao is not None and not 0.0 <= correlacao <= 1.0:
+            raise ValueError(f"Correlação inválida: {correlacao}. Use um valor entre 0 e 1")
+
         print("Iniciando populamento do banco de dados...")
-        self.create_schema()
+        self.create_schema(particionamento, recriar=clear, colunas_busca=colunas_busca)
 
         if clear:
             print("Limpando o banco de dados...")
             self.limpar_banco()
             print("Banco de dados limpo.")
 
-        usuarios_inseridos = self.inserir_usuarios(num_usuarios)
+        # Tempo e taxa de carga de cada tabela, para comparar os modos de carga
+        self.estatisticas_carga = {}
+        self.estatisticas_pipeline = {}
+        self.estatisticas_carga_rapida = {}
+
+        if carga_rapida:
+            opcoes = carga_rapida if isinstance(carga_rapida, dict) else {}
+            self._carga_rapida = CargaRapida(
+                {tabela: esquema[2] for tabela, esquema in ESQUEMA_CARGA.items()},
+                **opcoes,
+            )
+            self._carga_rapida.preparar()
+            self._sem_conflito = True
+
+        try:
+            return self._popular_banco(
+                num_usuarios,
+                num_livros,
+                num_emprestimos,
+                modo_carga,
+                num_workers,
+                tamanho_shard,
+                vetorizado,
+                cache,
+                distribuicao,
+                pipeline,
+                correlacao,
+            )
+        finally:
+            if self._carga_rapida is not None:
+                carga, self._carga_rapida = self._carga_rapida, None
+                self._sem_conflito = False
+                self.estatisticas_carga_rapida = carga.concluir()
+
+    def _popular_banco(
+        self,
+        num_usuarios,
+        num_livros,
+        num_emprestimos,
+        modo_carga,
+        num_workers,
+        tamanho_shard,
+        vetorizado,
+        cache,
+        distribuicao,
+        pipeline,
+        correlacao,
+    ):
+        """
+        Corpo de popular_banco após a criação do esquema: cache de dados e carga.
+        """
+        # Opções que mudam os dados gerados; junto com as chamadas anteriores,
+        # compõem a chave do cache de dados
+        contagens = (num_usuarios, num_livros, num_emprestimos)
+        variante = {
+            "vetorizado": vetorizado,
+            "shards": tamanho_shard if num_workers else None,
+            "vocabulario": self._parametros_vocabulario(),
+            "distribuicao": distribuicao,
+            "correlacao": correlacao,
+            # Chaves únicas por número de sequência (os caches gravados antes
+            # delas tinham chaves sorteadas)
+            "chaves": "sequencia",
+        }
+        historico = list(self._historico_carga)
+        self._historico_carga.append([contagens, variante])
+
+        cache_dados = None
+        if cache:
+            estado_inicial = {
+                tabela: int(
+                    execute_query(
+                        f"SELECT COALESCE(MAX(id), 0) AS id FROM {tabela}"
+                    ).id[0]
+                )
+                for tabela in ESQUEMA_CARGA
+            }
+            cache_dados = CacheDados(
+                chave_dados(
+                    self.locales,
+                    self.seed,
+                    contagens,
+                    variante,
+                    historico + [estado_inicial],
+                )
+            )
+
+            if cache_dados.existe():
+                print(f"Reproduzindo dados do cache {cache_dados.chave}...")
+                self._reproduzido = True
+                resultado = {}
+                for tabela in ESQUEMA_CARGA:
+                    inicio = time.perf_counter()
+                    resultado[tabela] = self._reproduzir_cache(
+                        cache_dados, tabela, modo_carga
+                    )
+                    resultado[tabela] -= self._concluir_carga_rapida(tabela)
+                    self._registrar_taxa(tabela, resultado[tabela], inicio)
+                print("Populamento do banco de dados concluído!")
+                return resultado
+
+            if self._reproduzido:
+                # O estado aleatório do gerador não avançou nas chamadas
+                # reproduzidas, então os dados gerados agora não são os que uma
+                # execução sem cache produziria e não devem ser gravados
+                print(
+                    "Cache de dados ignorado: chamadas anteriores foram "
+                    "reproduzidas do cache."
+                )
+                cache_dados = None
+            else:
+                self._gravacao = cache_dados.iniciar()
+                self._lotes_gravados = 0
+
+        try:
+            resultado = self._popular_tabelas(
+                num_usuarios,
+                num_livros,
+                num_emprestimos,
+                modo_carga,
+                num_workers,
+                tamanho_shard,
+                vetorizado,
+                distribuicao,
+                pipeline,
+                correlacao,
+            )
+        except Exception:
+            if cache_dados is not None:
+                cache_dados.descartar()
+            raise
+        finally:
+            self._gravacao = None
+
+        if cache_dados is not None:
+            cache_dados.concluir({"linhas": resultado})
+        return resultado
+
+    def _popular_tabelas(
+        self,
+        num_usuarios,
+        num_livros,
+        num_emprestimos,
+        modo_carga,
+        num_workers,
+        tamanho_shard,
+        vetorizado,
+        distribuicao=None,
+        pipeline=None,
+        correlacao=None,
+    ):
+        """
+        Gera e carrega as três tabelas (corpo de popular_banco).
+        """
+
+        def inserir(tabela, quantidade, inserir_serial, **opcoes):
+            inicio = time.perf_counter()
+            if num_workers:
+                inseridos = self.inserir_em_paralelo(
+                    tabela,
+                    quantidade,
+                    num_workers,
+                    tamanho_shard,
+                    modo_carga,
+                    vetorizado,
+                    **opcoes,
+                )
+            else:
+                inseridos = inserir_serial(
+                    quantidade,
+                    modo_carga=modo_carga,
+                    vetorizado=vetorizado,
+                    pipeline=pipeline,
+                    **opcoes,
+                )
+            inseridos -= self._concluir_carga_rapida(tabela)
+            self._registrar_taxa(tabela, inseridos, inicio)
+            return inseridos
+
+        usuarios_inseridos = inserir("usuarios", num_usuarios, self.inserir_usuarios)
         print(f"Total de {usuarios_inseridos} usuários inseridos.")
 
-        livros_inseridos = self.inserir_livros(num_livros)
+        livros_inseridos = inserir(
+            "livros", num_livros, self.inserir_livros, correlacao=correlacao
+        )
         print(f"Total de {livros_inseridos} livros inseridos.")
 
-        emprestimos_inseridos = self.inserir_emprestimos(num_emprestimos)
+        emprestimos_inseridos = inserir(
+            "emprestimos",
+            num_emprestimos,
+            self.inserir_emprestimos,
+            distribuicao=distribuicao,
+            correlacao=correlacao,
+        )
         print(f"Total de {emprestimos_inseridos} empréstimos inseridos.")
 
         print("Populamento do banco de dados concluído!")
@@ -387,6 +1535,62 @@ class BibliotecaDataGenerator:
             "emprestimos": emprestimos_inseridos,
         }
 
+    def _concluir_carga_rapida(self, tabela):
+        """
+        Conclui a carga rápida de uma tabela recém-carregada (restrições,
+        índices e estatísticas), para que a próxima tabela possa referenciá-la.
+
+        Returns:
+            Número de duplicatas removidas, já contadas como inseridas
+        """
+        if self._carga_rapida is None:
+            return 0
+        self._carga_rapida.concluir_tabela(tabela)
+        return self._carga_rapida.estatisticas[tabela]["duplicatas_removidas"]
+
+    def _reproduzir_cache(self, cache_dados, tabela, modo_carga):
+        """
+        Carrega os lotes de uma tabela gravados no cache de dados.
+
+        Returns:
+            Número de linhas inseridas
+        """
+        total_inicial = int(
+            execute_query(f"SELECT COUNT(*) AS total FROM {tabela}").total[0]
+        )
+        if tabela == "usuarios":
+            self._inserir_usuario_fixo()
+
+        ids_explicitos = False
+        for lote, com_id in cache_dados.lotes(tabela):
+            self._carregar_lote(tabela, lote, modo_carga, com_id=com_id)
+            ids_explicitos = ids_explicitos or com_id
+
+        if ids_explicitos:
+            # Lotes gerados em paralelo trazem os ids, que não avançam a sequência
+            execute_query(
+                f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+                f"GREATEST(MAX(id), 1), MAX(id) IS NOT NULL) FROM {tabela}"
+            )
+
+        total_final = int(
+            execute_query(f"SELECT COUNT(*) AS total FROM {tabela}").total[0]
+        )
+        return total_final - total_inicial
+
+    def _registrar_taxa(self, tabela, linhas, inicio):
+        """
+        Registra o tempo e a taxa (linhas/s) da carga de uma tabela.
+        """
+        tempo = time.perf_counter() - inicio
+        taxa = linhas / tempo if tempo > 0 else 0.0
+        self.estatisticas_carga[tabela] = {
+            "linhas": linhas,
+            "tempo": tempo,
+            "linhas_por_segundo": taxa,
+        }
+        print(f"Carga de {tabela}: {tempo:.2f}s ({taxa:.0f} linhas/s)")
+
     def limpar_banco(self):
         """
         Limpa todas as tabelas do banco de dados.
@@ -0,0 +1,152 @@
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Diretório padrão do cache de dados gerados (na raiz do projeto)
+DIRETORIO_DADOS = os.path.join(os.path.dirname(__file__), "..", ".cache", "dados")
+
+
+def chave_dados(locales, seed, contagens, variante="", historico=()):
+    """
+    Retorna a chave de cache de uma chamada a popular_banco.
+
+    Os dados gerados dependem do estado do gerador, então a chave inclui, além
+    da semente, localidades e quantidades, o histórico de chamadas anteriores na
+    mesma instância e o estado inicial do banco (maiores ids de cada tabela).
+
+    Args:
+        locales: Localidades do Faker
+        seed: Semente do gerador
+        contagens: Tupla (num_usuarios, num_livros, num_emprestimos)
+        variante: Opções que mudam os dados gerados (ex: 'vetorizado')
+        historico: Sequência serializável com o estado do gerador e do banco
+    """
+    resumo = json.dumps([variante, list(historico)], sort_keys=True, default=str)
+    digest = hashlib.sha1(resumo.encode("utf-8")).hexdigest()[:12]
+    tamanhos = "-".join(str(quantidade) for quantidade in contagens)
+    return f"{'-'.join(locales)}_{seed}_{tamanhos}_{digest}"
+
+
+def gravar_lote(pasta, tabela, nome, lote, colunas):
+    """
+    Grava um lote (lista de tuplas ou lote colunar) em um arquivo Parquet.
+
+    Args:
+        pasta: Pasta do cache em construção
+        tabela: Tabela do lote; cada tabela tem sua subpasta
+        nome: Nome do arquivo (a ordem alfabética é a ordem de reprodução)
+        lote: Lista de tuplas na ordem de colunas ou dict coluna -> valores
+        colunas: Colunas do lote
+    """
+    if not isinstance(lote, dict):
+        valores = list(zip(*lote)) if lote else [() for _ in colunas]
+        lote = dict(zip(colunas, valores))
+
+    arrays = {}
+    for coluna in colunas:
+        valores = lote[coluna]
+        if isinstance(valores, np.ndarray) and np.issubdtype(valores.dtype, np.datetime64):
+            valores = valores.astype("datetime64[D]")
+        elif not isinstance(valores, np.ndarray):
+            valores = list(valores)
+        arrays[coluna] = pa.array(valores)
+
+    destino = os.path.join(pasta, tabela)
+    os.makedirs(destino, exist_ok=True)
+    pq.write_table(pa.table(arrays), os.path.join(destino, f"{nome}.parquet"))
+
+
+def _coluna_numpy(coluna):
+    """
+    Converte uma coluna Arrow para o formato dos lotes colunares: arrays NumPy
+    para números, booleanos e datas, listas Python para o restante.
+    """
+    tipo = coluna.type
+    if pa.types.is_date(tipo):
+        datas = coluna.cast(pa.date32()).to_numpy(zero_copy_only=False)
+        return np.asarray(datas, dtype="datetime64[D]")
+    numerico = pa.types.is_integer(tipo) or pa.types.is_floating(tipo) or pa.types.is_boolean(tipo)
+    if numerico and coluna.null_count == 0:
+        return coluna.to_numpy()
+    return coluna.to_pylist()
+
+
+class CacheDados:
+    """
+    Cache em disco dos lotes gerados por popular_banco, em arquivos Parquet.
+
+    Cada chamada ao popular_banco com cache=True grava os lotes exatamente como
+    foram enviados ao banco. Uma chamada posterior com a mesma chave lê os
+    arquivos com memory-map e os envia pelo mesmo caminho de carga, sem gerar
+    nenhum dado.
+    """
+
+    def __init__(self, chave, diretorio=None):
+        self.chave = chave
+        self.pasta = os.path.join(diretorio or DIRETORIO_DADOS, chave)
+        self.temporaria = f"{self.pasta}.{os.getpid()}.tmp"
+
+    def existe(self):
+        """
+        Indica se o cache está completo em disco.
+        """
+        return os.path.exists(os.path.join(self.pasta, "metadados.json"))
+
+    def metadados(self):
+        with open(os.path.join(self.pasta, "metadados.json")) as f:
+            return json.load(f)
+
+    def iniciar(self):
+        """
+        Prepara a pasta temporária onde os lotes são gravados durante a geração.
+
+        Returns:
+            Caminho da pasta temporária
+        """
+        if os.path.exists(self.temporaria):
+            shutil.rmtree(self.temporaria)
+        os.makedirs(self.temporaria)
+        return self.temporaria
+
+    def concluir(self, metadados):
+        """
+        Publica o cache gravado na pasta temporária, de forma atômica.
+        """
+        metadados = dict(metadados, chave=self.chave)
+        metadados["criado_em"] = datetime.now().isoformat(timespec="seconds")
+        with open(os.path.join(self.temporaria, "metadados.json"), "w") as f:
+            json.dump(metadados, f, indent=2)
+        if os.path.exists(self.pasta):
+            shutil.rmtree(self.pasta)
+        os.replace(self.temporaria, self.pasta)
+
+    def descartar(self):
+        """
+        Remove a pasta temporária de uma geração que não terminou.
+        """
+        if os.path.exists(self.temporaria):
+            shutil.rmtree(self.temporaria)
+
+    def lotes(self, tabela):
+        """
+        Percorre os lotes gravados de uma tabela, na ordem em que foram gerados.
+
+        Yields:
+            Tuplas (lote colunar, com_id), onde com_id indica que o lote traz
+            os ids explícitos (lotes gerados em paralelo)
+        """
+        pasta = os.path.join(self.pasta, tabela)
+        if not os.path.isdir(pasta):
+            return
+        for arquivo in sorted(os.listdir(pasta)):
+            tabela_arrow = pq.read_table(os.path.join(pasta, arquivo), memory_map=True)
+            lote = {
+                nome: _coluna_numpy(tabela_arrow.column(nome))
+                for nome in tabela_arrow.column_names
+            }
+            yield lote, "id" in lote
@@ -1,40 +1,87 @@
+import io
 import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 from psycopg2 import pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN, encodings
 from configparser import ConfigParser
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from utils.copy_loader import copy_rows, clausula_on_conflict, tabela_staging, tamanho_lote
+from utils.metrics import REGISTRO, rotulo_consulta
+from utils.result_cache import (
+    CacheResultados,
+    MAX_ENTRADAS_PADRAO,
+    tabelas_escritas,
+    tabelas_lidas,
+)
+
+# Configuração usada quando o database.ini não tem a seção [pool]
+DEFAULT_POOL_CONFIG = {
+    'minconn': 1,
+    'maxconn': 10,
+    'timeout': 30.0,  # segundos de espera por uma conexão livre
+    'ping': False,    # executa SELECT 1 antes de entregar cada conexão
+}
 
 class DatabaseConnection:
     """
     Classe para gerenciar conexões com o banco de dados PostgreSQL.
+
+    O pool é seguro para uso por várias threads: quando todas as conexões estão
+    em uso, get_connection espera até o tempo limite configurado em vez de falhar.
     """
     
     _connection_pool = None
+    _semaforo = None
+    _lock = threading.Lock()
+    _pool_config = dict(DEFAULT_POOL_CONFIG)
     
     @classmethod
-    def init_connection_pool(cls, config_file='database.ini', section='postgresql'):
+    def init_connection_pool(cls, config_file='database.ini', section='postgresql', pool_section='pool'):
         """
         Inicializa o pool de conexões usando os parâmetros do arquivo de configuração.
+
+        Os tamanhos do pool e o tempo limite de espera vêm da seção `pool_section`
+        (opcional; na ausência dela são usados os valores de DEFAULT_POOL_CONFIG).
         """
-        if cls._connection_pool is None:
-            params = cls._get_db_params(config_file, section)
-            
-            cls._connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1,  # min_connections
-                10, # max_connections
-                **params
-            )
-            
-            print("Pool de conexão inicializado com sucesso")
+        with cls._lock:
+            if cls._connection_pool is None:
+                params = cls._get_db_params(config_file, section)
+                config = cls._get_pool_config(config_file, pool_section)
+                
+                cls._connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                    config['minconn'],
+                    config['maxconn'],
+                    **params
+                )
+                cls._semaforo = threading.BoundedSemaphore(config['maxconn'])
+                cls._pool_config = config
+                
+                print("Pool de conexão inicializado com sucesso")
+    
+    @classmethod
+    def _read_config(cls, config_file='database.ini'):
+        parser = ConfigParser()
+        config_path = os.path.join(os.path.dirname(__file__), '..', config_file)
+        parser.read(config_path)
+        return parser
     
     @classmethod
     def _get_db_params(cls, config_file='database.ini', section='postgresql'):
         """
         Lê os parâmetros de conexão do arquivo de configuração.
         """
-        parser = ConfigParser()
-        config_path = os.path.join(os.path.dirname(__file__), '..', config_file)
-        parser.read(config_path)
+        parser = cls._read_config(config_file)
         
         db_params = {}
         if parser.has_section(section):
@@ -47,32 +94,313 @@ class DatabaseConnection:
         return db_params
     
     @classmethod
-    def get_connection(cls):
+    def _get_pool_config(cls, config_file='database.ini', section='pool'):
+        """
+        Lê a configuração do pool (minconn, maxconn, timeout, ping).
+        """
+        parser = cls._read_config(config_file)
+        config = dict(DEFAULT_POOL_CONFIG)
+        
+        if parser.has_section(section):
+            secao = parser[section]
+            config['minconn'] = secao.getint('minconn', config['minconn'])
+            config['maxconn'] = secao.getint('maxconn', config['maxconn'])
+            config['timeout'] = secao.getfloat('timeout', config['timeout'])
+            config['ping'] = secao.getboolean('ping', config['ping'])
+        
+        if config['minconn'] > config['maxconn']:
+            raise ValueError('minconn não pode ser maior que maxconn na configuração do pool')
+        
+        return config
+    
+    @classmethod
+    def pool_size(cls):
+        """
+        Retorna o número máximo de conexões do pool.
+        """
+        if cls._connection_pool is None:
+            cls.init_connection_pool()
+        return cls._pool_config['maxconn']
+    
+    @classmethod
+    def _is_healthy(cls, connection):
+        """
+        Verifica se uma conexão do pool ainda pode ser usada.
+        """
+        if connection.closed:
+            return False
+        if connection.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if cls._pool_config['ping']:
+            try:
+                cursor = connection.cursor()
+                cursor.execute('SELECT 1')
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+    
+    @classmethod
+    def get_connection(cls, timeout=None):
         """
         Retorna uma conexão do pool.
+
+        Espera até `timeout` segundos (padrão: o timeout da configuração do pool)
+        por uma conexão livre. Conexões quebradas são descartadas e substituídas
+        por novas.
         """
         if cls._connection_pool is None:
             cls.init_connection_pool()
         
-        return cls._connection_pool.getconn()
+        if timeout is None:
+            timeout = cls._pool_config['timeout']
+        inicio = time.perf_counter()
+        if not cls._semaforo.acquire(timeout=timeout):
+            raise pool.PoolError(f'Nenhuma conexão livre no pool após {timeout} segundos')
+        
+        try:
+            # Cada descarte libera uma vaga, então maxconn + 1 tentativas bastam
+            # para trocar todas as conexões quebradas
+            for _ in range(cls._pool_config['maxconn'] + 1):
+                connection = cls._connection_pool.getconn()
+                if cls._is_healthy(connection):
+                    # Espera pelo pool da chamada instrumentada em andamento
+                    _chamada.espera = (getattr(_chamada, 'espera', None) or 0.0) + (
+                        time.perf_counter() - inicio
+                    )
+                    return connection
+                cls._connection_pool.putconn(connection, close=True)
+            raise psycopg2.OperationalError('Não foi possível obter uma conexão válida do pool')
+        except Exception:
+            cls._semaforo.release()
+            raise
     
     @classmethod
     def return_connection(cls, connection):
         """
         Devolve uma conexão ao pool.
+
+        Transações deixadas abertas são desfeitas; conexões quebradas são fechadas.
+        """
+        if cls._connection_pool is None:
+            return
+        
+        descartar = bool(connection.closed)
+        if not descartar and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                descartar = True
+        
+        cls._connection_pool.putconn(connection, close=descartar)
+        cls._semaforo.release()
+    
+    @classmethod
+    @contextmanager
+    def connection(cls, timeout=None):
+        """
+        Context manager que obtém uma conexão do pool e sempre a devolve.
+
+        Exemplo:
+            with DatabaseConnection.connection() as conn:
+                cursor = conn.cursor()
+                ...
+                conn.commit()
+
+        Em caso de exceção a transação é desfeita antes de devolver a conexão.
         """
-        cls._connection_pool.putconn(connection)
+        conn = cls.get_connection(timeout)
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            cls.return_connection(conn)
     
     @classmethod
     def close_all_connections(cls):
         """
         Fecha todas as conexões no pool.
         """
-        if cls._connection_pool is not None:
-            cls._connection_pool.closeall()
-            cls._connection_pool = None
+        with cls._lock:
+            if cls._connection_pool is not None:
+                cls._connection_pool.closeall()
+                cls._connection_pool = None
+                cls._semaforo = None
+
 
+# Estado da chamada instrumentada em andamento nesta thread: profundidade
+# (chamadas internas não são registradas de novo), rótulo definido com
+# statement_label, espera pelo pool e bytes transferidos
+_chamada = threading.local()
+
+
+@contextmanager
+def statement_label(label):
+    """
+    Context manager que rotula as chamadas feitas nesta thread nas métricas
+    (ver utils.metrics.REGISTRO), no lugar do rótulo derivado do SQL.
+
+    Exemplo:
+        with statement_label("painel:generos"):
+            fetch_dataframe(query)
+    """
+    anterior = getattr(_chamada, "rotulo", None)
+    _chamada.rotulo = label
+    try:
+        yield
+    finally:
+        _chamada.rotulo = anterior
+
+
+def _linhas_resultado(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return len(resultado)
+    if isinstance(resultado, pa.Table):
+        return resultado.num_rows
+    if isinstance(resultado, tuple):
+        return resultado[0]
+    if isinstance(resultado, int) and not isinstance(resultado, bool) and resultado >= 0:
+        return resultado
+    return None
+
+
+def _rotulo_sql(*args, **kwargs):
+    return rotulo_consulta(args[0] if args else kwargs.get("query"))
+
+
+def _instrumented(operacao, rotular=_rotulo_sql):
+    """
+    Decorador que registra latência, linhas, bytes, espera pelo pool e erros
+    de cada chamada no registro de métricas. Os bytes são informados pela
+    própria função em _chamada.bytes.
+    """
 
+    def decorar(funcao):
+        @wraps(funcao)
+        def instrumentada(*args, **kwargs):
+            if getattr(_chamada, "profundidade", 0) or not REGISTRO.ativo:
+                return funcao(*args, **kwargs)
+            _chamada.profundidade = 1
+            _chamada.espera = None
+            _chamada.bytes = None
+            resultado = erro = None
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*args, **kwargs)
+                return resultado
+            except Exception as e:
+                erro = e
+                raise
+            finally:
+                latencia = time.perf_counter() - inicio
+                _chamada.profundidade = 0
+                REGISTRO.registrar_chamada(
+                    operacao,
+                    getattr(_chamada, "rotulo", None) or rotular(*args, **kwargs),
+                    latencia,
+                    _linhas_resultado(resultado),
+                    _chamada.bytes,
+                    _chamada.espera,
+                    erro,
+                )
+
+        return instrumentada
+
+    return decorar
+
+
+# Cache de resultados do fetch_dataframe: desligado até enable_result_cache
+_result_cache = None
+_bypass = threading.local()
+
+
+def enable_result_cache(max_entries=MAX_ENTRADAS_PADRAO, max_bytes=None):
+    """
+    Liga o cache LRU de resultados do fetch_dataframe (ver CacheResultados).
+
+    Resultados de consultas repetidas (mesmo SQL normalizado e mesmos
+    parâmetros) passam a vir da memória até que uma escrita feita por
+    execute_query, execute_many, execute_copy ou execute_prepared altere
+    alguma das tabelas lidas. Escritas feitas diretamente em um cursor ou por
+    outros processos precisam chamar invalidate_result_cache.
+
+    Consultas sem tabelas identificáveis (ex: SELECT now()) não são guardadas;
+    consultas com funções voláteis sobre tabelas (random(), now()) devem usar
+    use_cache=False.
+
+    Args:
+        max_entries: Número máximo de resultados guardados
+        max_bytes: Memória máxima ocupada pelos DataFrames guardados
+    """
+    global _result_cache
+    _result_cache = CacheResultados(max_entries, max_bytes)
+
+
+def disable_result_cache():
+    """
+    Desliga o cache de resultados e descarta as entradas.
+    """
+    global _result_cache
+    _result_cache = None
+
+
+def result_cache_stats():
+    """
+    Retorna acertos, faltas, taxa de acerto, entradas e invalidações do cache
+    de resultados (None se desligado).
+    """
+    if _result_cache is None:
+        return None
+    return _result_cache.estatisticas()
+
+
+def invalidate_result_cache(tables=None):
+    """
+    Remove do cache os resultados que leem alguma das tabelas (todos, se None).
+
+    Returns:
+        Número de entradas removidas
+    """
+    if _result_cache is None:
+        return 0
+    if isinstance(tables, str):
+        tables = [tables]
+    return _result_cache.invalidar(tables)
+
+
+@contextmanager
+def bypass_result_cache():
+    """
+    Context manager em que fetch_dataframe sempre consulta o banco, sem ler
+    nem guardar resultados no cache, nesta thread. Usado pelos benchmarks, que
+    medem o banco e não a memória do cliente. As escritas continuam
+    invalidando o cache.
+    """
+    anterior = getattr(_bypass, "ativo", False)
+    _bypass.ativo = True
+    try:
+        yield
+    finally:
+        _bypass.ativo = anterior
+
+
+def _invalidate_writes(query):
+    """
+    Invalida as entradas afetadas por um comando já confirmado.
+    """
+    if _result_cache is None:
+        return
+    tabelas = tabelas_escritas(query) if isinstance(query, str) else None
+    if tabelas is None:
+        _result_cache.invalidar()
+    elif tabelas:
+        _result_cache.invalidar(tabelas)
+
+
+@_instrumented("execute_query")
 def execute_query(query, params=None):
     """
     Executa uma consulta SQL e retorna o resultado.
@@ -82,19 +410,23 @@ def execute_query(query, params=None):
         conn = DatabaseConnection.get_connection()
         cursor = conn.cursor()
         cursor.execute(query, params)
+        # Bytes enviados: o SQL com os parâmetros interpolados
+        _chamada.bytes = len(cursor.query or b"")
         
         try:
             result = cursor.fetchall()
             cols = [desc[0] for desc in cursor.description]
-            return pd.DataFrame(result, columns=cols)
+            resultado = pd.DataFrame(result, columns=cols)
         except Exception:
             # Não há resultados a retornar (ex: INSERT, UPDATE, DELETE)
             conn.commit()
-            return cursor.rowcount
-        
+            resultado = cursor.rowcount
+        _invalidate_writes(query)
+        return resultado
+
     except Exception as e:
         print(f"Erro ao executar consulta: {e}")
-        if conn:
+        if conn and not conn.closed:
             conn.rollback()
         raise
     finally:
@@ -102,6 +434,7 @@ def execute_query(query, params=None):
             DatabaseConnection.return_connection(conn)
 
 
+@_instrumented("execute_many")
 def execute_many(query, params_list):
     """
     Executa uma consulta SQL múltiplas vezes com diferentes parâmetros.
@@ -112,11 +445,84 @@ def execute_many(query, params_list):
         conn = DatabaseConnection.get_connection()
         cursor = conn.cursor()
         cursor.executemany(query, params_list)
+        if cursor.query and hasattr(params_list, "__len__"):
+            # Estimativa: cursor.query guarda só a última execução
+            _chamada.bytes = len(cursor.query) * len(params_list)
         conn.commit()
+        _invalidate_writes(query)
         return cursor.rowcount
     except Exception as e:
         print(f"Erro ao executar consulta múltipla: {e}")
+        if conn and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
         if conn:
+            DatabaseConnection.return_connection(conn)
+
+
+@_instrumented("execute_copy", lambda table, *args, **kwargs: f"copy:{table}")
+def execute_copy(
+    table, columns, rows, formato="text", tipos=None, conflito=None, manter_menor=None
+):
+    """
+    Carrega linhas em lote usando COPY ... FROM STDIN.
+
+    Args:
+        table: Tabela de destino
+        columns: Colunas na ordem das tuplas
+        rows: Lista de tuplas com os valores ou lote colunar (dict coluna -> valores)
+        formato: 'text' ou 'binary'
+        tipos: Tipos das colunas (obrigatório no formato binário)
+        conflito: Colunas do ON CONFLICT. Quando informado, as linhas passam por
+            uma tabela temporária e são inseridas com ON CONFLICT DO NOTHING.
+        manter_menor: Coluna usada para resolver conflitos de forma
+            determinística (ver clausula_on_conflict)
+
+    Returns:
+        Número de linhas inseridas na tabela de destino.
+    """
+    conn = None
+    try:
+        conn = DatabaseConnection.get_connection()
+        cursor = conn.cursor()
+        colunas = ", ".join(columns)
+
+        if conflito is None:
+            _chamada.bytes = copy_rows(cursor, table, columns, rows, formato, tipos)
+            inseridos = tamanho_lote(rows)
+        else:
+            staging = tabela_staging(table, columns)
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+                f"AS SELECT {colunas} FROM {table} WITH NO DATA"
+            )
+            # A tabela temporária é reaproveitada entre lotes e o PostgreSQL
+            # pode gravar linhas novas no espaço livre de páginas anteriores,
+            # então a ordem de entrada é guardada explicitamente
+            cursor.execute(
+                f"ALTER TABLE {staging} ADD COLUMN IF NOT EXISTS _ordem BIGSERIAL"
+            )
+            _chamada.bytes = copy_rows(cursor, staging, columns, rows, formato, tipos)
+
+            selecao = f"SELECT {colunas} FROM {staging} ORDER BY _ordem"
+            if manter_menor is not None:
+                # Um mesmo comando não pode atualizar a mesma linha duas vezes
+                alvo = ", ".join(conflito)
+                selecao = (
+                    f"SELECT DISTINCT ON ({alvo}) {colunas} FROM {staging} "
+                    f"ORDER BY {alvo}, {manter_menor}"
+                )
+            acao = clausula_on_conflict(table, columns, conflito, manter_menor)
+            cursor.execute(f"INSERT INTO {table} ({colunas}) {selecao} {acao}")
+            inseridos = cursor.rowcount
+
+        conn.commit()
+        invalidate_result_cache([table])
+        return inseridos
+    except Exception as e:
+        print(f"Erro ao executar COPY: {e}")
+        if conn and not conn.closed:
             conn.rollback()
         raise
     finally:
@@ -124,8 +530,498 @@ def execute_many(query, params_list):
             DatabaseConnection.return_connection(conn)
 
 
-def fetch_dataframe(query, params=None):
+def iter_query(query, params=None, itersize=10000, as_dataframe=True):
+    """
+    Executa uma consulta com um cursor nomeado (do lado do servidor) e devolve
+    os resultados em blocos, sem trazer o resultado inteiro para o cliente.
+
+    Args:
+        query: Consulta SQL (deve retornar linhas)
+        params: Parâmetros da consulta
+        itersize: Número de linhas buscadas do servidor a cada bloco
+        as_dataframe: Se True, cada bloco é um DataFrame; se False, uma lista de tuplas
+
+    Yields:
+        Blocos de até itersize linhas
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = DatabaseConnection.get_connection()
+        cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cursor.itersize = itersize
+        cursor.execute(query, params)
+
+        cols = None
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                break
+            if not as_dataframe:
+                yield rows
+                continue
+            if cols is None:
+                cols = [desc[0] for desc in cursor.description]
+            yield pd.DataFrame(rows, columns=cols)
+
+        cursor.close()
+        cursor = None
+        conn.commit()
+    except Exception as e:
+        print(f"Erro ao executar consulta em blocos: {e}")
+        raise
+    finally:
+        if conn:
+            # Cobre também o caso em que o consumidor abandona o gerador no meio
+            if cursor is not None and not conn.closed:
+                conn.rollback()
+            DatabaseConnection.return_connection(conn)
+
+
+@_instrumented("drain_query")
+def drain_query(query, params=None, itersize=10000):
+    """
+    Executa uma consulta e consome todas as linhas sem materializá-las, útil
+    para medir a latência da consulta sem o custo de montar um DataFrame.
+
+    Returns:
+        Tupla (número de linhas, tempo em segundos)
+    """
+    inicio = time.perf_counter()
+    total = 0
+    for rows in iter_query(query, params, itersize, as_dataframe=False):
+        total += len(rows)
+    return total, time.perf_counter() - inicio
+
+
+# Tipos do PostgreSQL (OID) lidos como colunas tipadas no caminho via COPY;
+# os demais (text, varchar, jsonb, arrays, tipos geométricos...) chegam como texto
+_COPY_ARROW_TYPES = {
+    16: pa.bool_(),             # bool
+    20: pa.int64(),             # int8
+    21: pa.int16(),             # int2
+    23: pa.int32(),             # int4
+    26: pa.int64(),             # oid
+    700: pa.float32(),          # float4
+    701: pa.float64(),          # float8
+    1700: pa.float64(),         # numeric
+    1082: pa.date32(),          # date
+    1114: pa.timestamp("us"),   # timestamp
+}
+
+
+# Literais e comentários de linha, para achar o que sobra fora deles
+_LITERAL_OU_COMENTARIO_RE = re.compile(
+    r"'(?:[^']|'')*'|\$(\w*)\$.*?\$\1\$|\"[^\"]*\"|--[^\n]*", re.DOTALL
+)
+
+
+def _copy_sql(sql):
+    """
+    Prepara a consulta para ser usada como subconsulta do COPY, removendo o
+    ';' final.
+
+    Returns:
+        Consulta ajustada ou None se ela tem comentários de linha (que
+        engoliriam o parêntese de fechamento) ou mais de um comando
+    """
+    sql = sql.strip().rstrip(";")
+    fora_de_literais = _LITERAL_OU_COMENTARIO_RE.sub(
+        lambda m: m.group(0) if m.group(0).startswith("--") else "''", sql
+    )
+    if "--" in fora_de_literais or ";" in fora_de_literais:
+        return None
+    return sql
+
+
+def fetch_arrow(query, params=None):
+    """
+    Executa uma consulta com COPY (consulta) TO STDOUT em CSV e lê o resultado
+    direto em uma tabela Arrow, sem criar um objeto Python por valor.
+
+    Os tipos das colunas vêm da descrição da consulta: inteiros, números,
+    booleanos, datas e timestamps viram colunas tipadas; os demais tipos
+    (inclusive JSONB, arrays e POLYGON) chegam com a representação em texto do
+    PostgreSQL. NULL vira nulo e a string vazia continua vazia.
+
+    Returns:
+        pyarrow.Table
+
+    Raises:
+        ValueError: Se a consulta tem colunas com o mesmo nome, comentários de
+            linha ou mais de um comando (use fetch_dataframe, que nesses
+            casos usa o caminho normal)
+    """
+    tabela = _fetch_arrow(query, params)
+    if tabela is None:
+        raise ValueError(
+            "Consulta sem suporte no COPY: colunas com o mesmo nome, "
+            "comentários de linha ou mais de um comando"
+        )
+    return tabela
+
+
+@_instrumented("fetch_arrow")
+def _fetch_arrow(query, params):
+    # Retorna None, sem executar o COPY, se a consulta não pode usá-lo
+    conn = None
+    try:
+        conn = DatabaseConnection.get_connection()
+        cursor = conn.cursor()
+        # COPY não aceita parâmetros: os valores são interpolados no cliente
+        sql = _copy_sql(cursor.mogrify(query, params).decode(encodings[conn.encoding]))
+        if sql is None:
+            return None
+
+        cursor.execute(f"SELECT * FROM ({sql}) AS consulta LIMIT 0")
+        colunas = [desc[0] for desc in cursor.description]
+        if len(set(colunas)) != len(colunas):
+            # A subconsulta do COPY e a leitura do CSV exigem nomes distintos
+            conn.rollback()
+            return None
+        tipos = {
+            nome: _COPY_ARROW_TYPES.get(desc[1], pa.string())
+            for nome, desc in zip(colunas, cursor.description)
+        }
+
+        buffer = io.BytesIO()
+        cursor.copy_expert(
+            f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, ENCODING 'UTF8')", buffer
+        )
+        _chamada.bytes = buffer.tell()
+        conn.commit()
+    except Exception as e:
+        print(f"Erro ao executar consulta via COPY: {e}")
+        if conn and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            DatabaseConnection.return_connection(conn)
+
+    if buffer.tell() == 0:
+        return pa.table({nome: pa.array([], type=tipo) for nome, tipo in tipos.items()})
+
+    buffer.seek(0)
+    return pa_csv.read_csv(
+        buffer,
+        read_options=pa_csv.ReadOptions(column_names=colunas),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=tipos,
+            # No CSV do COPY, NULL é o campo vazio sem aspas e '' vem entre aspas
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=["t"],
+            false_values=["f"],
+        ),
+    )
+
+
+def fetch_dataframe(
+    query,
+    params=None,
+    chunksize=None,
+    use_copy=False,
+    dtype_backend="numpy",
+    use_cache=True,
+):
     """
     Executa uma consulta SQL e retorna os resultados como um DataFrame do pandas.
+
+    Se chunksize for informado, retorna um iterador de DataFrames com até
+    chunksize linhas cada (ver iter_query), como o chunksize do pandas.read_sql.
+
+    Args:
+        use_copy: Lê o resultado com COPY TO STDOUT (ver fetch_arrow), bem mais
+            rápido e econômico em memória para resultados grandes. Consultas
+            que o COPY não aceita usam o caminho normal.
+        dtype_backend: No caminho via COPY, 'numpy' (tipos NumPy; datas como
+            datetime64) ou 'pyarrow' (colunas ArrowDtype, sem cópia)
+        use_cache: Com o cache de resultados ligado (ver enable_result_cache),
+            False consulta sempre o banco. Resultados em blocos (chunksize)
+            nunca são guardados, nem os de consultas cujas tabelas não foram
+            todas identificadas ou que usam funções voláteis (ver
+            tabelas_lidas).
+    """
+    if chunksize is not None:
+        return iter_query(query, params, itersize=chunksize)
+    if dtype_backend not in ("numpy", "pyarrow"):
+        raise ValueError("Use dtype_backend 'numpy' ou 'pyarrow'")
+
+    cache = _result_cache
+    tabelas = None
+    if cache is not None and use_cache and not getattr(_bypass, "ativo", False):
+        # Só leituras são guardadas (tabelas_escritas vazio)
+        if tabelas_escritas(query) == frozenset():
+            tabelas = tabelas_lidas(query)
+    if not tabelas:
+        return _fetch_dataframe(query, params, use_copy, dtype_backend)
+
+    chave = cache.chave(query, params, use_copy, dtype_backend)
+    resultado = cache.obter(chave)
+    if resultado is None:
+        versao = cache.versao(tabelas)
+        resultado = _fetch_dataframe(query, params, use_copy, dtype_backend)
+        cache.guardar(chave, tabelas, resultado, versao)
+    # Cópia para que alterações no DataFrame retornado não mudem o cache
+    return resultado.copy()
+
+
+def _fetch_dataframe(query, params, use_copy, dtype_backend):
+    tabela = _fetch_arrow(query, params) if use_copy else None
+    if tabela is None:
+        return execute_query(query, params)
+    if dtype_backend == "pyarrow":
+        return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+    return tabela.to_pandas(date_as_object=False)
+
+
+# Instruções preparadas de cada conexão: nome da instrução no servidor -> consulta.
+# Instruções preparadas valem para a sessão, então o cache acompanha a conexão
+# e desaparece com ela.
+_prepared_statements = weakref.WeakKeyDictionary()
+
+_PLACEHOLDER_RE = re.compile(r"%%|%s")
+
+# Valores de plan_cache_mode aceitos (PostgreSQL 12+)
+PLAN_CACHE_MODES = ("auto", "force_generic_plan", "force_custom_plan")
+
+
+def _to_positional(query):
+    """
+    Converte os marcadores %s do psycopg2 em $1, $2... usados pelo PREPARE.
+
+    Returns:
+        Tupla (consulta convertida, número de parâmetros)
+    """
+    contador = [0]
+
+    def substituir(marcador):
+        if marcador.group(0) == "%%":
+            return "%"
+        contador[0] += 1
+        return f"${contador[0]}"
+
+    sql = _PLACEHOLDER_RE.sub(substituir, query.strip().rstrip(";"))
+    return sql, contador[0]
+
+
+@contextmanager
+def _connection_or_pool(conn=None):
+    # Usa a conexão informada (sem devolvê-la) ou uma conexão do pool
+    if conn is not None:
+        yield conn
+    else:
+        with DatabaseConnection.connection() as conn:
+            yield conn
+
+
+def _statement_name(query, name=None):
+    # Nome informado ou derivado do texto da consulta
+    return name or f"ps_{hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]}"
+
+
+def prepare_statement(conn, query, name=None):
+    """
+    Prepara uma consulta na conexão com PREPARE, uma única vez por nome de
+    instrução em cada conexão.
+
+    Args:
+        conn: Conexão em que a instrução é preparada
+        query: Consulta com marcadores %s
+        name: Nome da instrução (padrão: derivado do texto da consulta)
+
+    Returns:
+        Nome da instrução preparada
+
+    Raises:
+        ValueError: Se o nome já foi usado na conexão para outra consulta
+    """
+    cache = _prepared_statements.setdefault(conn, {})
+    name = _statement_name(query, name)
+    preparada = cache.get(name)
+    if preparada is not None:
+        if preparada != query:
+            raise ValueError(
+                f"A instrução '{name}' já foi preparada nesta conexão para outra consulta: {preparada}"
+            )
+        return name
+
+    sql, _ = _to_positional(query)
+    cursor = conn.cursor()
+    # PREPARE não é desfeito por rollback, então a instrução continua
+    # disponível mesmo que a transação atual falhe depois
+    cursor.execute(f"PREPARE {name} AS {sql}")
+    cache[name] = query
+    return name
+
+
+def _execute_statement(name, params):
+    if not params:
+        return f"EXECUTE {name}"
+    return f"EXECUTE {name} ({', '.join(['%s'] * len(params))})"
+
+
+@_instrumented("execute_prepared")
+def execute_prepared(query, params=None, name=None, plan_cache_mode=None, conn=None):
+    """
+    Executa uma consulta como instrução preparada, preparando-a na conexão na
+    primeira vez. As execuções seguintes na mesma conexão não passam de novo
+    pela análise sintática e, quando o servidor escolhe o plano genérico,
+    também não pelo planejamento.
+
+    Args:
+        query: Consulta com marcadores %s
+        params: Parâmetros da consulta
+        name: Nome da instrução (ver prepare_statement)
+        plan_cache_mode: 'auto', 'force_generic_plan' ou 'force_custom_plan'
+            (vale só para esta execução)
+        conn: Conexão a usar (padrão: uma conexão do pool). Use a mesma conexão
+            para medir execuções repetidas da mesma instrução.
+
+    Returns:
+        DataFrame com o resultado ou o número de linhas afetadas
+    """
+    if plan_cache_mode is not None and plan_cache_mode not in PLAN_CACHE_MODES:
+        raise ValueError(f"plan_cache_mode inválido: {plan_cache_mode}. Use um de {PLAN_CACHE_MODES}")
+
+    with _connection_or_pool(conn) as conexao:
+        nome = prepare_statement(conexao, query, name)
+        cursor = conexao.cursor()
+        if plan_cache_mode is not None:
+            cursor.execute("SET LOCAL plan_cache_mode = %s", (plan_cache_mode,))
+        cursor.execute(_execute_statement(nome, params), params)
+        _chamada.bytes = len(cursor.query or b"")
+        if cursor.description is not None:
+            cols = [desc[0] for desc in cursor.description]
+            resultado = pd.DataFrame(cursor.fetchall(), columns=cols)
+        else:
+            resultado = cursor.rowcount
+        conexao.commit()
+        _invalidate_writes(query)
+        return resultado
+
+
+def explain_prepared(query, params=None, plan_cache_mode=None, conn=None):
+    """
+    Executa EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) EXECUTE sobre a instrução
+    preparada da consulta.
+
+    O 'Planning Time' do resultado é o tempo gasto pelo servidor para obter o
+    plano: praticamente zero quando o plano genérico em cache é reutilizado.
+
+    Returns:
+        Plano completo (dicionário com 'Plan', 'Planning Time', 'Execution Time'...)
+    """
+    with _connection_or_pool(conn) as conexao:
+        nome = prepare_statement(conexao, query)
+        cursor = conexao.cursor()
+        if plan_cache_mode is not None:
+            cursor.execute("SET LOCAL plan_cache_mode = %s", (plan_cache_mode,))
+        cursor.execute(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {_execute_statement(nome, params)}",
+            params,
+        )
+        resultado = cursor.fetchone()[0][0]
+        # EXPLAIN ANALYZE executa a consulta; escritas não devem permanecer
+        conexao.rollback()
+        return resultado
+
+
+def prepared_statement_stats(conn, query, name=None):
+    """
+    Retorna quantas vezes a instrução preparada da consulta usou um plano
+    genérico e um plano customizado na conexão (PostgreSQL 14+).
+
+    Args:
+        name: Nome da instrução, se foi preparada com um nome explícito
+
+    Returns:
+        Dicionário com generic_plans e custom_plans (zeros se não preparada)
     """
-    return execute_query(query, params)
+    nome = _statement_name(query, name)
+    if _prepared_statements.get(conn, {}).get(nome) != query:
+        return {"generic_plans": 0, "custom_plans": 0}
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT generic_plans, custom_plans FROM pg_prepared_statements WHERE name = %s",
+        (nome.lower(),),  # nomes sem aspas são guardados em minúsculas
+    )
+    linha = cursor.fetchone()
+    conn.rollback()
+    if linha is None:
+        return {"generic_plans": 0, "custom_plans": 0}
+    return {"generic_plans": linha[0], "custom_plans": linha[1]}
+
+
+def deallocate_prepared(conn):
+    """
+    Remove as instruções preparadas de uma conexão (DEALLOCATE ALL).
+    """
+    conn.cursor().execute("DEALLOCATE ALL")
+    _prepared_statements.pop(conn, None)
+
+
+def execute_concurrently(queries, max_workers=None, return_results=False):
+    """
+    Executa uma lista de consultas em paralelo, uma por conexão do pool.
+
+    Args:
+        queries: Lista de consultas SQL ou de tuplas (consulta, parâmetros)
+        max_workers: Número de threads (padrão: tamanho máximo do pool)
+        return_results: Se True, inclui o DataFrame de cada consulta na coluna 'resultado'
+
+    Returns:
+        DataFrame com uma linha por consulta, na ordem recebida, com o tempo de
+        espera por uma conexão, o tempo de execução, o número de linhas e o erro
+        (se houver).
+    """
+    tarefas = [(query, None) if isinstance(query, str) else tuple(query) for query in queries]
+    if max_workers is None:
+        max_workers = DatabaseConnection.pool_size()
+    
+    def executar(indice, query, params):
+        registro = {'indice': indice, 'query': query, 'params': params}
+        resultado = None
+        inicio = time.perf_counter()
+        obtida = inicio
+        try:
+            with DatabaseConnection.connection() as conn:
+                obtida = time.perf_counter()
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                if cursor.description is not None:
+                    rows = cursor.fetchall()
+                    linhas = len(rows)
+                    if return_results:
+                        cols = [desc[0] for desc in cursor.description]
+                        resultado = pd.DataFrame(rows, columns=cols)
+                else:
+                    linhas = cursor.rowcount
+                conn.commit()
+                _invalidate_writes(query)
+            erro = None
+        except Exception as e:
+            linhas = None
+            erro = str(e)
+        fim = time.perf_counter()
+        
+        registro.update({
+            'tempo_espera': obtida - inicio,
+            'tempo_execucao': fim - obtida,
+            'linhas': linhas,
+            'erro': erro,
+        })
+        if return_results:
+            registro['resultado'] = resultado
+        return registro
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = [
+            executor.submit(executar, indice, query, params)
+            for indice, (query, params) in enumerate(tarefas)
+        ]
+        registros = [futuro.result() for futuro in futuros]
+    
+    return pd.DataFrame(registros)
@@ -0,0 +1,254 @@
+import os
+import time
+from utils.db_connection import DatabaseConnection, execute_query, invalidate_result_cache
+from utils.partitioning import tabelas_folha
+
+# Opção de sessão passada ao servidor por todas as conexões novas (ver PGOPTIONS)
+OPCAO_SYNCHRONOUS_COMMIT = "-c synchronous_commit=off"
+
+# Restrições UNIQUE e FOREIGN KEY das tabelas (as chaves primárias são mantidas)
+SQL_RESTRICOES = """
+    SELECT
+        c.conrelid::regclass::text AS tabela,
+        c.conname AS nome,
+        c.contype AS tipo,
+        pg_get_constraintdef(c.oid) AS definicao,
+        c.confrelid::regclass::text AS referenciada,
+        ARRAY(
+            SELECT a.attname FROM unnest(c.conkey) WITH ORDINALITY AS k(numero, ordem)
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.numero
+            ORDER BY k.ordem
+        ) AS colunas
+    FROM pg_constraint c
+    WHERE c.conrelid::regclass::text = ANY(%s) AND c.contype IN ('u', 'f')
+    ORDER BY c.contype, c.conname
+"""
+
+# Índices secundários que não pertencem a nenhuma restrição. Índices UNIQUE
+# avulsos ficam: podem ser de expressões, que a deduplicação não cobre
+SQL_INDICES = """
+    SELECT t.relname AS tabela, i.relname AS nome, pg_get_indexdef(i.oid) AS definicao
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    WHERE t.oid::regclass::text = ANY(%s)
+      AND NOT x.indisprimary
+      AND NOT x.indisunique
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_constraint c
+          WHERE c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+      )
+    ORDER BY i.relname
+"""
+
+
+class CargaRapida:
+    """
+    Modo de carga rápida: antes da carga remove as restrições UNIQUE, as
+    chaves estrangeiras e os índices secundários (as chaves primárias e os
+    índices UNIQUE avulsos ficam), opcionalmente torna as tabelas UNLOGGED e
+    desliga o synchronous_commit. Ao fim de cada tabela, as duplicatas que o
+    ON CONFLICT DO NOTHING ou as restrições UNIQUE removidas teriam recusado
+    são removidas (mantida a linha de menor id), a tabela volta a
+    ser LOGGED, as restrições e índices são reconstruídos, as chaves
+    estrangeiras são recriadas como NOT VALID e validadas, e a tabela é
+    analisada.
+
+    As tabelas referenciadas precisam ser concluídas antes de gerar as linhas
+    que as referenciam, para que as chaves sorteadas não apontem para
+    duplicatas removidas.
+    """
+
+    def __init__(self, deduplicar, unlogged=False, synchronous_commit=True, analisar=True):
+        """
+        Args:
+            deduplicar: Dicionário tabela -> colunas do ON CONFLICT (ou None),
+                na ordem de carga
+            unlogged: Carrega em tabelas UNLOGGED (sem WAL), voltando a LOGGED
+                ao concluir
+            synchronous_commit: Se False, desliga o synchronous_commit nas
+                sessões abertas durante a carga por este processo e pelos
+                workers que ele criar; as demais sessões do banco não mudam
+            analisar: Executa ANALYZE em cada tabela concluída
+        """
+        self.deduplicar = dict(deduplicar)
+        self.tabelas = list(self.deduplicar)
+        self.unlogged = unlogged
+        self.synchronous_commit = synchronous_commit
+        self.analisar = analisar
+        self.restricoes = []
+        self.indices = []
+        self.estatisticas = {}
+        self._id_inicial = {}
+        self._concluidas = set()
+        self._fks_pendentes = []
+        self._particionadas = set()
+        self._pgoptions = None
+
+    def _definir_synchronous_commit(self, desligar):
+        # A opção vai no PGOPTIONS, lido pela libpq a cada conexão nova e
+        # herdado pelos workers: vale só para as sessões da carga e some com o
+        # processo, mesmo que ele termine antes de concluir
+        if desligar:
+            self._pgoptions = os.environ.get("PGOPTIONS")
+            os.environ["PGOPTIONS"] = " ".join(
+                filter(None, [self._pgoptions, OPCAO_SYNCHRONOUS_COMMIT])
+            )
+        elif self._pgoptions is None:
+            os.environ.pop("PGOPTIONS", None)
+        else:
+            os.environ["PGOPTIONS"] = self._pgoptions
+        # As conexões abertas mantêm a configuração antiga
+        DatabaseConnection.close_all_connections()
+
+    def preparar(self):
+        """
+        Remove restrições e índices secundários e aplica as opções de carga.
+        """
+        inicio = time.perf_counter()
+        self.restricoes = execute_query(SQL_RESTRICOES, (self.tabelas,)).to_dict("records")
+        self.indices = execute_query(SQL_INDICES, (self.tabelas,)).to_dict("records")
+        for indice in self.indices:
+            # Em tabelas particionadas a definição vem com ON ONLY, que criaria
+            # o índice sem as partições
+            indice["definicao"] = indice["definicao"].replace(" ON ONLY ", " ON ", 1)
+        self._fks_pendentes = [r for r in self.restricoes if r["tipo"] == "f"]
+        self._particionadas = {t for t in self.tabelas if tabelas_folha(t) != [t]}
+
+        for tabela in self.tabelas:
+            self._id_inicial[tabela] = int(
+                execute_query(f"SELECT COALESCE(MAX(id), 0) AS id FROM {tabela}").id[0]
+            )
+
+        # Chaves estrangeiras primeiro ('f' < 'u' no ORDER BY)
+        for restricao in self.restricoes:
+            execute_query(
+                f"ALTER TABLE {restricao['tabela']} DROP CONSTRAINT {restricao['nome']}"
+            )
+        for indice in self.indices:
+            execute_query(f"DROP INDEX IF EXISTS {indice['nome']}")
+
+        if self.unlogged:
+            # Sem chaves estrangeiras entre elas, a ordem não importa. Em tabelas
+            # particionadas só as partições folha guardam dados
+            for tabela in self.tabelas:
+                for folha in tabelas_folha(tabela):
+                    execute_query(f"ALTER TABLE {folha} SET UNLOGGED")
+        if not self.synchronous_commit:
+            self._definir_synchronous_commit(desligar=True)
+
+        self.estatisticas["preparacao"] = {"tempo_s": time.perf_counter() - inicio}
+        print(
+            f"Carga rápida: {len(self.restricoes)} restrições e {len(self.indices)} "
+            f"índices adiados"
+        )
+
+    def _remover_duplicatas(self, tabela):
+        # Colunas do ON CONFLICT e de cada restrição UNIQUE removida, que
+        # precisa ser recriada sem violações
+        grupos = []
+        for colunas in [self.deduplicar.get(tabela)] + [
+            restricao["colunas"]
+            for restricao in self.restricoes
+            if restricao["tabela"] == tabela and restricao["tipo"] == "u"
+        ]:
+            if colunas and tuple(colunas) not in grupos:
+                grupos.append(tuple(colunas))
+        if not grupos:
+            return 0
+
+        removidas = 0
+        with DatabaseConnection.connection() as conn:
+            cursor = conn.cursor()
+            for colunas in grupos:
+                iguais = " AND ".join(f"a.{coluna} = b.{coluna}" for coluna in colunas)
+                # Só as linhas desta carga podem ser duplicatas
+                cursor.execute(
+                    f"DELETE FROM {tabela} a USING {tabela} b "
+                    f"WHERE a.id > %s AND a.id > b.id AND {iguais}",
+                    (self._id_inicial[tabela],),
+                )
+                removidas += cursor.rowcount
+            conn.commit()
+        invalidate_result_cache([tabela])
+        return removidas
+
+    def concluir_tabela(self, tabela):
+        """
+        Deixa uma tabela carregada novamente com todas as restrições, índices e
+        estatísticas, e valida as chaves estrangeiras que já podem ser recriadas.
+        """
+        if tabela in self._concluidas:
+            return
+        tempos = {}
+
+        inicio = time.perf_counter()
+        removidas = self._remover_duplicatas(tabela)
+        tempos["tempo_deduplicacao_s"] = time.perf_counter() - inicio
+
+        if self.unlogged:
+            inicio = time.perf_counter()
+            for folha in tabelas_folha(tabela):
+                execute_query(f"ALTER TABLE {folha} SET LOGGED")
+            tempos["tempo_logged_s"] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for restricao in self.restricoes:
+            if restricao["tabela"] == tabela and restricao["tipo"] == "u":
+                execute_query(
+                    f"ALTER TABLE {tabela} ADD CONSTRAINT {restricao['nome']} "
+                    f"{restricao['definicao']}"
+                )
+        for indice in self.indices:
+            if indice["tabela"] == tabela:
+                execute_query(indice["definicao"])
+        tempos["tempo_indices_s"] = time.perf_counter() - inicio
+        self._concluidas.add(tabela)
+
+        inicio = time.perf_counter()
+        pendentes = []
+        for fk in self._fks_pendentes:
+            if fk["tabela"] in self._concluidas and fk["referenciada"] in self._concluidas:
+                if fk["tabela"] in self._particionadas:
+                    # Tabelas particionadas não aceitam chaves estrangeiras
+                    # NOT VALID: a restrição é criada já validada
+                    execute_query(
+                        f"ALTER TABLE {fk['tabela']} ADD CONSTRAINT {fk['nome']} "
+                        f"{fk['definicao']}"
+                    )
+                    continue
+                # NOT VALID cria a restrição sem varrer a tabela; o VALIDATE
+                # faz a verificação com um lock mais fraco
+                execute_query(
+                    f"ALTER TABLE {fk['tabela']} ADD CONSTRAINT {fk['nome']} "
+                    f"{fk['definicao']} NOT VALID"
+                )
+                execute_query(f"ALTER TABLE {fk['tabela']} VALIDATE CONSTRAINT {fk['nome']}")
+            else:
+                pendentes.append(fk)
+        self._fks_pendentes = pendentes
+        tempos["tempo_fks_s"] = time.perf_counter() - inicio
+
+        if self.analisar:
+            inicio = time.perf_counter()
+            execute_query(f"ANALYZE {tabela}")
+            tempos["tempo_analyze_s"] = time.perf_counter() - inicio
+
+        tempos["duplicatas_removidas"] = removidas
+        self.estatisticas[tabela] = tempos
+        print(f"Carga rápida: {tabela} concluída ({removidas} duplicatas removidas)")
+
+    def concluir(self):
+        """
+        Conclui as tabelas restantes e restaura o synchronous_commit.
+
+        Returns:
+            Estatísticas da preparação e de cada tabela concluída
+        """
+        try:
+            for tabela in self.tabelas:
+                self.concluir_tabela(tabela)
+        finally:
+            if not self.synchronous_commit:
+                self._definir_synchronous_commit(desligar=False)
+        return self.estatisticas
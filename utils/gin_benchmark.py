@@ -0,0 +1,131 @@
+import pandas as pd
+from utils.db_connection import execute_query
+from utils.index_cost import comparar_configuracoes
+
+# Parâmetros das consultas, tirados do primeiro livro que os tem, para que as
+# consultas sempre encontrem alguma linha nos dados gerados
+SQL_PARAMETROS = {
+    "citacao": """
+        SELECT citacoes[1] AS valor FROM livros
+        WHERE cardinality(citacoes) > 0 ORDER BY id LIMIT 1
+    """,
+    "metadados": """
+        SELECT jsonb_build_object(
+            'editora', metadados->'editora', 'idioma', metadados->'idioma'
+        )::text AS valor
+        FROM livros WHERE metadados IS NOT NULL ORDER BY id LIMIT 1
+    """,
+    "palavra": """
+        SELECT palavra AS valor
+        FROM (SELECT id, titulo FROM livros ORDER BY id LIMIT 100) l,
+             regexp_split_to_table(lower(l.titulo), '\\W+') AS palavra
+        WHERE length(palavra) > 4
+        ORDER BY l.id, length(palavra) DESC
+        LIMIT 1
+    """,
+}
+
+# Cargas de trabalho GIN: consulta, parâmetro (chave de SQL_PARAMETROS) e
+# configurações de índices comparadas
+CARGAS_GIN = {
+    "citacoes_contem": {
+        "query": "SELECT id, titulo FROM livros WHERE citacoes @> ARRAY[%s]::text[]",
+        "parametro": "citacao",
+        "configuracoes": {
+            "gin": [
+                "CREATE INDEX idx_gin_livros_citacoes ON livros USING gin (citacoes)"
+            ],
+        },
+    },
+    "metadados_contem": {
+        "query": "SELECT id, titulo FROM livros WHERE metadados @> %s::jsonb",
+        "parametro": "metadados",
+        "configuracoes": {
+            "gin_jsonb_ops": [
+                "CREATE INDEX idx_gin_livros_metadados ON livros USING gin (metadados)"
+            ],
+            "gin_jsonb_path_ops": [
+                "CREATE INDEX idx_gin_livros_metadados_path ON livros "
+                "USING gin (metadados jsonb_path_ops)"
+            ],
+        },
+    },
+    # Todas as linhas têm as mesmas chaves nos metadados; a busca por uma
+    # chave ausente mede o caso em que o índice descarta a tabela inteira.
+    # jsonb_path_ops não suporta o operador ?
+    "metadados_chave": {
+        "query": "SELECT id, titulo FROM livros WHERE metadados ? %s",
+        "parametro": None,
+        "params": ("premios",),
+        "configuracoes": {
+            "gin_jsonb_ops": [
+                "CREATE INDEX idx_gin_livros_metadados ON livros USING gin (metadados)"
+            ],
+        },
+    },
+    "titulo_texto": {
+        "query": (
+            "SELECT id, titulo FROM livros "
+            "WHERE to_tsvector('portuguese', titulo) @@ plainto_tsquery('portuguese', %s)"
+        ),
+        "parametro": "palavra",
+        "configuracoes": {
+            "gin": [
+                "CREATE INDEX idx_gin_livros_titulo ON livros "
+                "USING gin (to_tsvector('portuguese', titulo))"
+            ],
+            "gist": [
+                "CREATE INDEX idx_gist_livros_titulo ON livros "
+                "USING gist (to_tsvector('portuguese', titulo))"
+            ],
+        },
+    },
+}
+
+
+def parametros_carga(carga):
+    """
+    Retorna os parâmetros de uma carga de trabalho de CARGAS_GIN, sorteados
+    dos dados atuais do banco.
+
+    Raises:
+        ValueError: Se não houver livros com o valor necessário
+    """
+    if carga["parametro"] is None:
+        return carga["params"]
+    resultado = execute_query(SQL_PARAMETROS[carga["parametro"]])
+    if len(resultado) == 0:
+        raise ValueError(
+            f"Não há livros para sortear o parâmetro '{carga['parametro']}'"
+        )
+    return (resultado.valor[0],)
+
+
+def executar_gin(cargas=None, aquecimento=2, repeticoes=10):
+    """
+    Executa as cargas de trabalho GIN sobre os dados já carregados, comparando
+    cada configuração com a consulta sem índices (ver comparar_configuracoes).
+
+    Args:
+        cargas: Nomes das cargas de CARGAS_GIN (padrão: todas)
+        aquecimento: Execuções descartadas antes de cada medição
+        repeticoes: Repetições de cada medição
+
+    Returns:
+        DataFrame com uma linha por carga e configuração
+    """
+    resultados = []
+    for nome in cargas or CARGAS_GIN:
+        carga = CARGAS_GIN[nome]
+        params = parametros_carga(carga)
+        print(f"\n[gin] Carga {nome} com parâmetros {params}")
+        resultado = comparar_configuracoes(
+            carga["query"],
+            carga["configuracoes"],
+            params,
+            aquecimento=aquecimento,
+            repeticoes=repeticoes,
+        )
+        resultado.insert(0, "carga", nome)
+        resultados.append(resultado)
+    return pd.concat(resultados, ignore_index=True)
@@ -0,0 +1,674 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import psycopg2
+from utils.db_connection import execute_query
+from utils.benchmark import comandos_remocao, medir_consulta
+from utils.index_cost import construir_indices
+from utils.gin_benchmark import CARGAS_GIN, parametros_carga
+from utils.brin_benchmark import CARGAS_BRIN, FRACAO_PADRAO, intervalo_consulta
+
+# Consultas dos notebooks 01 a 04, com os valores fixos usados em cada um
+CONSULTAS_NOTEBOOKS = {
+    "01_btree": """
+        SELECT l.titulo, l.publicado_em
+        FROM livros l
+        WHERE l.genero = 'História'
+        AND l.publicado_em >= '2010-01-01'
+        ORDER BY l.publicado_em DESC
+    """,
+    "02_hash": """
+        SELECT l.*
+        FROM livros l
+        WHERE l.genero = 'Aventura'
+        AND NOT EXISTS (
+            SELECT 1
+            FROM emprestimos e
+            INNER JOIN usuarios u ON u.id = e.usuario_id AND u.cpf = '532.710.165-59'
+            WHERE e.livro_id = l.id
+        )
+    """,
+    "03_gist": """
+        SELECT l.*
+        FROM livros l
+        WHERE daterange('2001-01-01', CURRENT_DATE, '[]') @> l.publicado_em
+        AND to_tsvector('portuguese', l.titulo) @@ to_tsquery('portuguese', 'liberdade & evoluir')
+    """,
+    "04_spgist": """
+        SELECT id, titulo, dimensao
+        FROM livros
+        WHERE dimensao <@ polygon '((0,0),(25,0),(25,35),(0,35),(0,0))'
+    """,
+}
+
+# Condições do plano de onde saem as chaves dos candidatos
+CONDICOES_PLANO = (
+    "Filter",
+    "Index Cond",
+    "Recheck Cond",
+    "Hash Cond",
+    "Merge Cond",
+    "Join Filter",
+)
+
+# Operadores procurados nas condições -> comutador, usado quando a chave
+# está à direita (ex: daterange(...) @> publicado_em equivale a
+# publicado_em <@ daterange(...)); None se o operador não tem comutador
+COMUTADORES = {
+    "=": "=",
+    "<": ">",
+    ">": "<",
+    "<=": ">=",
+    ">=": "<=",
+    "@>": "<@",
+    "<@": "@>",
+    "&&": "&&",
+    "@@": "@@",
+    "?": None,
+    "?|": None,
+    "?&": None,
+}
+
+# Operadores de faixa: as colunas comparadas com eles vão depois das de
+# igualdade nos candidatos compostos
+OPERADORES_FAIXA = {"<", ">", "<=", ">="}
+
+# O EXPLAIN sempre separa operadores binários com espaços
+_OPERADOR_RE = re.compile(r"\s(<=|>=|<@|@>|&&|@@|\?\||\?&|\?|=|<|>)\s")
+
+# Operando à esquerda e à direita do operador: coluna (talvez qualificada
+# pelo alias), coluna convertida ((cpf)::text) ou chamada de função sem
+# parênteses aninhados
+_OPERANDO = r"(?:\w+\.)?\w+(?:\([^()]*\))?"
+_ESQUERDA_RE = re.compile(rf"(?:\(((?:\w+\.)?\w+)\)::[\w ]+|({_OPERANDO})(?:::[\w ]+)?)$")
+_DIREITA_RE = re.compile(rf"^(?:\(((?:\w+\.)?\w+)\)::[\w ]+|({_OPERANDO}))")
+
+# Constante à direita de uma igualdade, usada no predicado dos índices parciais
+_LITERAL_RE = re.compile(r"^('(?:[^']|'')*'(?:::[\w ]+)?|-?\d+(?:\.\d+)?)\)")
+
+_TEXTO_RE = re.compile(r"'(?:[^']|'')*'")
+_REFERENCIA_RE = re.compile(r"\b(?:(\w+)\.)?(\w+)\b")
+_ORDEM_RE = re.compile(r"^(?:(\w+)\.)?(\w+)( DESC)?$")
+_DEFINICAO_RE = re.compile(r"USING (\w+) \((.*?)\)(?: WHERE \((.*)\))?$")
+# Início de um CREATE INDEX até o ON, com o nome do índice se houver (o
+# PostgreSQL gera um nome quando ele é omitido)
+_CREATE_INDEX_RE = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"(?:(?!ON\b)(\w+)\s+)?(?=ON\b)",
+    re.IGNORECASE,
+)
+_TABELA_RE = re.compile(r"\bON\s+(?:ONLY\s+)?(\w+)", re.IGNORECASE)
+_METODO_RE = re.compile(r"\bUSING\s+(\w+)", re.IGNORECASE)
+
+# Classes de operadores de cada método que atendem aos operadores do tipo
+# informado (inclusive por conversão binária, como varchar -> text)
+SQL_CLASSES = """
+    SELECT a.amname AS metodo, c.opcname AS classe, c.opcdefault AS padrao
+    FROM pg_type t
+    JOIN pg_opclass c ON (
+        c.opcintype = t.oid
+        OR (c.opcintype = 'anyarray'::regtype AND t.typcategory = 'A')
+        OR (c.opcintype = 'anyrange'::regtype AND t.typtype = 'r')
+        OR EXISTS (
+            SELECT 1 FROM pg_cast k
+            WHERE k.castsource = t.oid AND k.casttarget = c.opcintype
+              AND k.castmethod = 'b'
+        )
+    )
+    JOIN pg_am a ON a.oid = c.opcmethod
+    WHERE t.oid = %s::regtype
+      AND EXISTS (
+          SELECT 1 FROM pg_amop o JOIN pg_operator p ON p.oid = o.amopopr
+          WHERE o.amopfamily = c.opcfamily AND o.amoppurpose = 's'
+            AND p.oprname = ANY(%s)
+      )
+    ORDER BY a.amname, c.opcdefault DESC, c.opcname
+"""
+
+SQL_COLUNAS = """
+    SELECT attname AS coluna, atttypid::regtype::text AS tipo
+    FROM pg_attribute
+    WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+"""
+
+# Tabela raiz de cada relação lida pelo plano (partições -> tabela particionada)
+SQL_RAIZES = """
+    SELECT r AS relacao, COALESCE(pg_partition_root(r::regclass)::text, r) AS tabela
+    FROM unnest(%s::text[]) AS r
+"""
+
+SQL_INDICES_EXISTENTES = """
+    SELECT pg_get_indexdef(x.indexrelid) AS definicao
+    FROM pg_index x
+    WHERE x.indrelid = %s::regclass
+"""
+
+
+def carga_notebooks(fracao=FRACAO_PADRAO):
+    """
+    Monta a carga de trabalho dos notebooks: as consultas de
+    CONSULTAS_NOTEBOOKS e as cargas de CARGAS_GIN (05_gin) e CARGAS_BRIN
+    (06_brin), com os parâmetros sorteados dos dados atuais. Cargas sem dados
+    para os parâmetros são ignoradas.
+
+    Returns:
+        Dicionário nome -> {query, params, peso}, no formato aceito por
+        recomendar_indices
+    """
+    carga = {
+        nome: {"query": query, "params": None, "peso": 1.0}
+        for nome, query in CONSULTAS_NOTEBOOKS.items()
+    }
+    for nome, opcoes in CARGAS_GIN.items():
+        try:
+            params = parametros_carga(opcoes)
+        except ValueError as e:
+            print(f"[advisor] Carga 05_gin_{nome} ignorada: {e}")
+            continue
+        carga[f"05_gin_{nome}"] = {"query": opcoes["query"], "params": params, "peso": 1.0}
+    for nome, (tabela, coluna) in CARGAS_BRIN.items():
+        try:
+            params = intervalo_consulta(tabela, coluna, fracao)
+        except ValueError as e:
+            print(f"[advisor] Carga 06_brin_{nome} ignorada: {e}")
+            continue
+        carga[f"06_brin_{nome}"] = {
+            "query": f"SELECT id, {coluna} FROM {tabela} WHERE {coluna} BETWEEN %s AND %s",
+            "params": params,
+            "peso": 1.0,
+        }
+    return carga
+
+
+def _normalizar_carga(consultas):
+    """
+    Aceita, para cada consulta, o SQL, uma tupla (SQL, params) ou um
+    dicionário com query, params e peso (frequência relativa na carga).
+    """
+    carga = {}
+    for nome, consulta in consultas.items():
+        if isinstance(consulta, str):
+            consulta = {"query": consulta}
+        elif isinstance(consulta, tuple):
+            consulta = {"query": consulta[0], "params": consulta[1]}
+        peso = float(consulta.get("peso", 1.0))
+        if peso <= 0:
+            raise ValueError(f"O peso da consulta {nome} deve ser positivo")
+        carga[nome] = {"query": consulta["query"], "params": consulta.get("params"), "peso": peso}
+    if not carga:
+        raise ValueError("A carga de trabalho não tem consultas")
+    return carga
+
+
+@lru_cache(maxsize=None)
+def _colunas(tabela):
+    return dict(execute_query(SQL_COLUNAS, (tabela,)).itertuples(index=False))
+
+
+@lru_cache(maxsize=None)
+def _classes(tipo, operadores):
+    """
+    Retorna (método, classe) para cada método de acesso capaz de atender a
+    algum dos operadores no tipo: a classe padrão do método (None) se ela
+    atende, senão cada classe não padrão que atende (ex: kd_point_ops).
+    """
+    resultado = execute_query(SQL_CLASSES, (tipo, sorted(operadores)))
+    classes = []
+    for metodo, grupo in resultado.groupby("metodo", sort=False):
+        if grupo["padrao"].any():
+            classes.append((metodo, None))
+        else:
+            classes.extend((metodo, classe) for classe in grupo["classe"])
+    return classes
+
+
+def _tipo_expressao(tabela, expressao):
+    return execute_query(
+        f"SELECT pg_typeof({expressao})::text AS tipo "
+        f"FROM (SELECT 1) u LEFT JOIN (SELECT * FROM {tabela} LIMIT 0) t ON true"
+    ).tipo[0]
+
+
+def _nos(no):
+    yield no
+    for filho in no.get("Plans", []):
+        yield from _nos(filho)
+
+
+def _plano(query, params=None):
+    """
+    Retorna os nós do plano estimado da consulta e a tabela raiz de cada
+    relação lida por eles.
+    """
+    plano = execute_query(f"EXPLAIN (FORMAT JSON) {query}", params).iloc[0, 0][0]["Plan"]
+    nos = list(_nos(plano))
+    relacoes = sorted({no["Relation Name"] for no in nos if "Relation Name" in no})
+    if not relacoes:
+        return nos, {}
+    return nos, dict(execute_query(SQL_RAIZES, (relacoes,)).itertuples(index=False))
+
+
+def _resolver(operando, tabela_no, tabelas_alias):
+    """
+    Identifica a tabela e a chave (coluna ou expressão sem o alias) de um
+    operando da condição, ou None se ele não referencia nenhuma coluna.
+    """
+    tabelas = set()
+    for alias, nome in _REFERENCIA_RE.findall(_TEXTO_RE.sub("", operando)):
+        tabela = tabelas_alias.get(alias) if alias else tabela_no
+        if tabela is not None and nome in _colunas(tabela):
+            tabelas.add((tabela, alias))
+    if len(tabelas) != 1:
+        return None
+    tabela, alias = tabelas.pop()
+    chave = re.sub(rf"\b{alias}\.", "", operando) if alias else operando
+    return tabela, chave, "(" in chave
+
+
+def condicoes_consulta(query, params=None):
+    """
+    Extrai do plano da consulta (EXPLAIN sem ANALYZE) as chaves que um índice
+    poderia atender: colunas e expressões comparadas nos filtros e nas
+    condições de junção, com os operadores usados, e as colunas de ordenação.
+
+    Returns:
+        Dicionário tabela -> {chave: {expressao, operadores, literal, ordem}},
+        com as chaves na ordem em que aparecem no plano
+    """
+    nos, raizes = _plano(query, params)
+    tabelas_alias = {
+        no["Alias"]: raizes[no["Relation Name"]] for no in nos if "Relation Name" in no
+    }
+
+    condicoes = {}
+
+    def registrar(tabela, chave, expressao):
+        chaves = condicoes.setdefault(tabela, {})
+        return chaves.setdefault(
+            chave,
+            {"expressao": expressao, "operadores": set(), "literal": None, "ordem": None},
+        )
+
+    for no in nos:
+        tabela_no = raizes.get(no.get("Relation Name"))
+        for campo in CONDICOES_PLANO:
+            texto = no.get(campo)
+            if not texto:
+                continue
+            for encontrado in _OPERADOR_RE.finditer(texto):
+                operador = encontrado.group(1)
+                esquerda = _ESQUERDA_RE.search(texto[: encontrado.start()])
+                direita = _DIREITA_RE.search(texto[encontrado.end() :])
+                lados = [(esquerda, operador), (direita, COMUTADORES[operador])]
+                for lado, (operando, operador_chave) in enumerate(lados):
+                    if operando is None or operador_chave is None:
+                        continue
+                    resolvido = _resolver(
+                        operando.group(1) or operando.group(2),
+                        tabela_no,
+                        tabelas_alias,
+                    )
+                    if resolvido is None:
+                        continue
+                    tabela, chave, expressao = resolvido
+                    registro = registrar(tabela, chave, expressao)
+                    registro["operadores"].add(operador_chave)
+                    literal = _LITERAL_RE.search(texto[encontrado.end() :])
+                    if lado == 0 and operador == "=" and literal and not expressao:
+                        registro["literal"] = literal.group(1)
+        for ordem in no.get("Sort Key", []):
+            encontrado = _ORDEM_RE.match(ordem)
+            if encontrado is None:
+                continue
+            alias, coluna, desc = encontrado.groups()
+            tabela = tabelas_alias.get(alias) if alias else tabela_no
+            if tabela is None and len(set(tabelas_alias.values())) == 1:
+                tabela = next(iter(tabelas_alias.values()))
+            if tabela is not None and coluna in _colunas(tabela):
+                registrar(tabela, coluna, False)["ordem"] = "DESC" if desc else "ASC"
+    return condicoes
+
+
+def _indices_existentes(tabela):
+    """
+    Retorna (método, colunas, predicado) dos índices da tabela, no formato
+    do pg_get_indexdef, para descartar candidatos iguais a eles.
+    """
+    existentes = set()
+    for definicao in execute_query(SQL_INDICES_EXISTENTES, (tabela,)).definicao:
+        encontrado = _DEFINICAO_RE.search(definicao)
+        if encontrado is not None:
+            existentes.add(encontrado.groups())
+    return existentes
+
+
+def _elemento(chave, opcoes, classe=None, ordem=None):
+    elemento = f"({chave})" if opcoes["expressao"] else chave
+    if classe is not None:
+        elemento += f" {classe}"
+    if ordem == "DESC":
+        elemento += " DESC"
+    return elemento
+
+
+def gerar_candidatos(carga, metodos=None):
+    """
+    Gera os índices candidatos para as consultas da carga, a partir das
+    chaves de cada uma (ver condicoes_consulta):
+
+    - simples: um índice por chave e por método de acesso (B-tree, hash,
+      GiST, SP-GiST, GIN, BRIN) cuja classe de operadores atende aos
+      operadores usados com a chave
+    - composto: B-tree com as colunas comparadas por igualdade (com
+      constante e depois de junção), a primeira de faixa e a de ordenação,
+      se a consulta usa mais de uma
+    - parcial: para cada igualdade com constante, um índice sobre outra
+      chave da consulta restrito às linhas com aquele valor
+
+    Candidatos iguais a índices existentes ou repetidos entre consultas
+    aparecem uma vez, com todas as consultas que os motivaram.
+
+    Args:
+        carga: Carga de trabalho normalizada (ver recomendar_indices)
+        metodos: Métodos de acesso considerados (padrão: todos)
+
+    Returns:
+        Lista de dicionários com nome, tabela, tipo, metodo, colunas,
+        predicado, sql e consultas
+    """
+    _colunas.cache_clear()
+    candidatos = {}
+    existentes = {}
+
+    def adicionar(consulta, tabela, tipo, metodo, colunas, predicado=None):
+        if metodos is not None and metodo not in metodos:
+            return
+        chave = (tabela, metodo, colunas, predicado)
+        if tabela not in existentes:
+            existentes[tabela] = _indices_existentes(tabela)
+        if chave[1:] in existentes[tabela]:
+            return
+        if chave not in candidatos:
+            candidatos[chave] = {
+                "tabela": tabela,
+                "tipo": tipo,
+                "metodo": metodo,
+                "colunas": colunas,
+                "predicado": predicado,
+                "consultas": [],
+            }
+        if consulta not in candidatos[chave]["consultas"]:
+            candidatos[chave]["consultas"].append(consulta)
+
+    for consulta, opcoes_consulta in carga.items():
+        condicoes = condicoes_consulta(opcoes_consulta["query"], opcoes_consulta["params"])
+        for tabela, chaves in condicoes.items():
+            colunas = _colunas(tabela)
+            metodos_chave = {}
+            for chave, opcoes in chaves.items():
+                tipo = _tipo_expressao(tabela, chave) if opcoes["expressao"] else colunas[chave]
+                operadores = set(opcoes["operadores"])
+                if opcoes["ordem"] is not None:
+                    operadores.add("<")
+                metodos_chave[chave] = _classes(tipo, frozenset(operadores))
+                for metodo, classe in metodos_chave[chave]:
+                    adicionar(
+                        consulta, tabela, "simples", metodo, _elemento(chave, opcoes, classe)
+                    )
+
+            def btree(chave):
+                return ("btree", None) in metodos_chave[chave]
+
+            # Igualdades com constante primeiro, depois as de junção
+            igualdade = sorted(
+                (
+                    chave
+                    for chave, opcoes in chaves.items()
+                    if "=" in opcoes["operadores"] and btree(chave)
+                ),
+                key=lambda chave: chaves[chave]["literal"] is None,
+            )
+            faixa = [
+                chave
+                for chave, opcoes in chaves.items()
+                if opcoes["operadores"] & OPERADORES_FAIXA and btree(chave)
+            ]
+            ordenacao = [chave for chave, opcoes in chaves.items() if opcoes["ordem"]]
+            composto = list(igualdade)
+            for chave in faixa[:1] + ordenacao[:1]:
+                if chave not in composto:
+                    composto.append(chave)
+            if len(composto) > 1:
+                adicionar(
+                    consulta,
+                    tabela,
+                    "composto",
+                    "btree",
+                    ", ".join(
+                        _elemento(chave, chaves[chave], ordem=chaves[chave]["ordem"])
+                        for chave in composto
+                    ),
+                )
+
+            for coluna, opcoes in chaves.items():
+                if opcoes["literal"] is None:
+                    continue
+                predicado = f"{coluna} = {opcoes['literal']}"
+                for chave, outras in chaves.items():
+                    if chave == coluna or not metodos_chave[chave]:
+                        continue
+                    metodo, classe = (
+                        ("btree", None) if btree(chave) else metodos_chave[chave][0]
+                    )
+                    ordem = outras["ordem"] if metodo == "btree" else None
+                    adicionar(
+                        consulta,
+                        tabela,
+                        "parcial",
+                        metodo,
+                        _elemento(chave, outras, classe, ordem),
+                        predicado,
+                    )
+
+    resultado = []
+    for numero, candidato in enumerate(candidatos.values(), start=1):
+        candidato["nome"] = (
+            f"idx_candidato_{numero:03d}_{candidato['tabela']}_{candidato['metodo']}"
+        )
+        sql = (
+            f"CREATE INDEX {candidato['nome']} ON {candidato['tabela']} "
+            f"USING {candidato['metodo']} ({candidato['colunas']})"
+        )
+        if candidato["predicado"] is not None:
+            sql += f" WHERE {candidato['predicado']}"
+        candidato["sql"] = sql
+        resultado.append(candidato)
+    return resultado
+
+
+def _nomes_indice(nome):
+    # Em tabelas particionadas o plano mostra os índices das partições
+    return set(
+        execute_query(
+            "SELECT relid::regclass::text AS nome FROM pg_partition_tree(%s::regclass)",
+            (nome,),
+        ).nome
+    ) | {nome}
+
+
+def _medir(carga, nome, aquecimento, repeticoes):
+    opcoes = carga[nome]
+    medidas = pd.DataFrame(
+        medir_consulta(
+            opcoes["query"], opcoes["params"], aquecimento=aquecimento, repeticoes=repeticoes
+        )
+    )
+    return {
+        "consulta": nome,
+        "linhas": int(medidas["linhas"].iloc[0]),
+        "latencia_cliente_ms": float(medidas["latencia_cliente_ms"].median()),
+        "latencia_servidor_ms": float(medidas["latencia_servidor_ms"].median()),
+        "paginas_lidas": (medidas["shared_hit"] + medidas["shared_read"]).mean(),
+        "indices_usados": medidas["indices_usados"].iloc[0],
+    }
+
+
+def _candidato_extra(sql, numero):
+    """
+    Monta o candidato de um CREATE INDEX informado pelo usuário, com o nome
+    trocado por um nome de candidato.
+    """
+    # O nome informado é trocado por um de candidato: os candidatos são
+    # removidos ao fim, e um índice existente com o mesmo nome seria perdido
+    indice = _CREATE_INDEX_RE.match(sql)
+    tabela = _TABELA_RE.search(sql)
+    if indice is None or tabela is None:
+        raise ValueError(
+            f"Candidato extra não é um CREATE INDEX ... ON tabela reconhecível: {sql}"
+        )
+    tabela = tabela.group(1)
+    metodo = _METODO_RE.search(sql)
+    metodo = metodo.group(1).lower() if metodo else "btree"
+    nome = f"idx_candidato_{numero:03d}_{tabela}_{metodo}"
+    if indice.group(1) is None:
+        # Sem nome (CREATE INDEX ON ...): o nome gerado entra antes do ON
+        sql = f"{sql[: indice.end()]}{nome} {sql[indice.end() :]}"
+    else:
+        sql = sql[: indice.start(1)] + nome + sql[indice.end(1) :]
+    return {
+        "nome": nome,
+        "nome_informado": indice.group(1),
+        "tabela": tabela,
+        "tipo": "extra",
+        "metodo": metodo,
+        "colunas": None,
+        "predicado": None,
+        "sql": sql,
+        "consultas": [],
+    }
+
+
+def recomendar_indices(
+    consultas=None,
+    candidatos_extras=None,
+    metodos=None,
+    aquecimento=2,
+    repeticoes=5,
+):
+    """
+    Recomenda índices para uma carga de trabalho sobre os dados atuais:
+    gera os candidatos (ver gerar_candidatos), mede a carga com os índices
+    existentes e, para cada candidato, constrói o índice, mede as consultas
+    que leem a tabela dele e o remove. Cada candidato é medido sozinho, sem
+    os demais; combinações aparecem só como candidatos compostos.
+
+    O ranking ordena os candidatos usados pelo planejador pela economia de
+    latência nas consultas que os usaram (soma ponderada pelos pesos),
+    desempatando pelo tamanho.
+
+    Args:
+        consultas: Dicionário nome -> SQL, (SQL, params) ou {query, params,
+            peso} (padrão: carga_notebooks())
+        candidatos_extras: Comandos CREATE INDEX medidos além dos gerados,
+            construídos com um nome de candidato (o nome informado, se houver,
+            fica na coluna nome_informado, e um índice existente com ele não é
+            tocado). Comandos que não são CREATE INDEX ... ON tabela geram
+            ValueError.
+        metodos: Métodos de acesso dos candidatos gerados (padrão: todos)
+        aquecimento: Execuções descartadas antes de cada medição
+        repeticoes: Repetições de cada medição
+
+    Returns:
+        Tupla (ranking, medidas) de DataFrames: uma linha por candidato, com
+        tamanho, tempo de construção, consultas que o usaram, ganho e economia
+        na carga e posição no ranking; e uma linha por candidato e consulta
+        medida (a referência é o candidato 'atual')
+    """
+    carga = _normalizar_carga(consultas if consultas is not None else carga_notebooks())
+    candidatos = gerar_candidatos(carga, metodos)
+    for numero, sql in enumerate(candidatos_extras or [], start=len(candidatos) + 1):
+        candidatos.append(_candidato_extra(sql, numero))
+    print(f"[advisor] {len(carga)} consultas e {len(candidatos)} candidatos")
+
+    tabelas = {
+        nome: set(_plano(opcoes["query"], opcoes["params"])[1].values())
+        for nome, opcoes in carga.items()
+    }
+    for candidato in candidatos:
+        for sql in comandos_remocao([candidato["sql"]]):
+            execute_query(sql)
+
+    print("[advisor] Medindo a carga com os índices atuais")
+    referencia = {}
+    medidas = []
+    for nome in carga:
+        registro = _medir(carga, nome, aquecimento, repeticoes)
+        referencia[nome] = registro["latencia_servidor_ms"]
+        medidas.append({"candidato": "atual", **registro})
+
+    ranking = []
+    for candidato in candidatos:
+        print(f"[advisor] Candidato {candidato['nome']}: {candidato['sql']}")
+        registro = {
+            chave: candidato[chave]
+            for chave in ("nome", "tabela", "tipo", "metodo", "colunas", "predicado", "sql")
+        }
+        registro["nome_informado"] = candidato.get("nome_informado")
+        registro["consultas_alvo"] = ",".join(candidato["consultas"])
+        afetadas = [nome for nome in carga if candidato["tabela"] in tabelas[nome]]
+        try:
+            try:
+                construido = construir_indices([candidato["sql"]])[0]
+            except psycopg2.Error as e:
+                registro["erro"] = str(e).strip()
+                ranking.append(registro)
+                continue
+            execute_query(f"ANALYZE {candidato['tabela']}")
+            nomes = _nomes_indice(candidato["nome"])
+            usado_por = []
+            base = novo = 0.0
+            for nome in afetadas:
+                medida = _medir(carga, nome, aquecimento, repeticoes)
+                medida["candidato"] = candidato["nome"]
+                medida["ganho_latencia"] = referencia[nome] / medida["latencia_servidor_ms"]
+                medidas.append(medida)
+                # Nas consultas que não usam o índice a diferença é ruído
+                if nomes & set(filter(None, medida["indices_usados"].split(","))):
+                    usado_por.append(nome)
+                    base += carga[nome]["peso"] * referencia[nome]
+                    novo += carga[nome]["peso"] * medida["latencia_servidor_ms"]
+            registro.update(
+                {
+                    "tamanho_bytes": int(construido["tamanho_bytes"]),
+                    "tempo_construcao_s": construido["tempo_construcao_s"],
+                    "consultas_medidas": len(afetadas),
+                    "usado_por": ",".join(usado_por),
+                    "ganho_carga": base / novo if novo > 0 else np.nan,
+                    "economia_ms": base - novo,
+                }
+            )
+            ranking.append(registro)
+        finally:
+            for sql in comandos_remocao([candidato["sql"]]):
+                execute_query(sql)
+
+    ranking = pd.DataFrame(ranking)
+    for coluna in ("tamanho_bytes", "tempo_construcao_s", "economia_ms", "usado_por", "erro"):
+        if coluna not in ranking:
+            ranking[coluna] = np.nan
+    ranking["usado"] = ranking["usado_por"].fillna("").astype(bool)
+    ranking["economia_ms_por_mb"] = ranking["economia_ms"] / (
+        ranking["tamanho_bytes"] / 1024**2
+    )
+    ranking = ranking.sort_values(
+        ["usado", "economia_ms", "tamanho_bytes"],
+        ascending=[False, False, True],
+        na_position="last",
+        ignore_index=True,
+    )
+    ranking.insert(0, "posicao", range(1, len(ranking) + 1))
+
+    medidas = pd.DataFrame(medidas)
+    colunas = ["candidato"] + [coluna for coluna in medidas.columns if coluna != "candidato"]
+    return ranking, medidas[colunas]
@@ -0,0 +1,330 @@
+import time
+import numpy as np
+import pandas as pd
+from utils.db_connection import DatabaseConnection, execute_query
+from utils.benchmark import _INDICE_RE, comandos_remocao, medir_consulta
+
+# Parâmetros do servidor que influenciam a construção de índices
+PARAMETROS_MANUTENCAO = (
+    "max_parallel_maintenance_workers",
+    "maintenance_work_mem",
+    "max_parallel_workers",
+    "max_worker_processes",
+)
+
+# Em tabelas e índices particionados, os tamanhos somam todas as partições
+SQL_INDICE = """
+    SELECT
+        t.relname AS tabela,
+        am.amname AS metodo,
+        COALESCE(
+            (SELECT SUM(pg_relation_size(p.relid)) FROM pg_partition_tree(i.oid) p),
+            pg_relation_size(i.oid)
+        ) AS tamanho_bytes,
+        COALESCE(
+            (SELECT SUM(pg_relation_size(p.relid)) FROM pg_partition_tree(t.oid) p),
+            pg_relation_size(t.oid)
+        ) AS tamanho_tabela_bytes
+    FROM pg_class i
+    JOIN pg_index x ON x.indexrelid = i.oid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_am am ON am.oid = i.relam
+    WHERE i.oid = to_regclass(%s)
+"""
+
+
+def parametros_manutencao():
+    """
+    Retorna os parâmetros de manutenção atuais do servidor (workers paralelos
+    e memória de manutenção).
+    """
+    resultado = execute_query(
+        "SELECT name, setting || COALESCE(unit, '') AS valor FROM pg_settings "
+        "WHERE name = ANY(%s)",
+        (list(PARAMETROS_MANUTENCAO),),
+    )
+    return dict(resultado.itertuples(index=False))
+
+
+def posicao_wal():
+    """
+    Retorna a posição atual do WAL, usada para medir quantos bytes uma carga gerou.
+    """
+    return execute_query("SELECT pg_current_wal_lsn()::text AS lsn").iloc[0, 0]
+
+
+def bytes_wal_desde(posicao):
+    """
+    Retorna quantos bytes de WAL foram gerados desde a posição informada.
+    """
+    return int(
+        execute_query(
+            "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s::pg_lsn) AS bytes", (posicao,)
+        ).iloc[0, 0]
+    )
+
+
+def descrever_indice(nome):
+    """
+    Retorna tabela, método de acesso e tamanhos (índice e tabela) de um índice.
+    """
+    resultado = execute_query(SQL_INDICE, (nome,))
+    if len(resultado) == 0:
+        raise ValueError(f"Índice não encontrado: {nome}")
+    return resultado.iloc[0].to_dict()
+
+
+def construir_indices(criar_indices, workers_manutencao=None, maintenance_work_mem=None):
+    """
+    Cria os índices um a um, medindo o tempo de construção e o tamanho de cada um.
+
+    Args:
+        criar_indices: Lista de comandos CREATE INDEX
+        workers_manutencao: Valor de max_parallel_maintenance_workers usado na
+            construção (padrão: o do servidor)
+        maintenance_work_mem: Valor de maintenance_work_mem (ex: '256MB')
+
+    Returns:
+        Lista de registros, um por índice
+    """
+    registros = []
+    for sql in criar_indices:
+        nome = _INDICE_RE.search(sql).group(1)
+        with DatabaseConnection.connection() as conn:
+            # Fora de transação para permitir CREATE INDEX CONCURRENTLY
+            conn.autocommit = True
+            cursor = conn.cursor()
+            try:
+                if workers_manutencao is not None:
+                    cursor.execute(
+                        "SET max_parallel_maintenance_workers = %s", (workers_manutencao,)
+                    )
+                if maintenance_work_mem is not None:
+                    cursor.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+                cursor.execute("SHOW max_parallel_maintenance_workers")
+                workers = int(cursor.fetchone()[0])
+                cursor.execute("SHOW maintenance_work_mem")
+                memoria = cursor.fetchone()[0]
+
+                inicio = time.perf_counter()
+                cursor.execute(sql)
+                tempo = time.perf_counter() - inicio
+            finally:
+                cursor.execute("RESET max_parallel_maintenance_workers")
+                cursor.execute("RESET maintenance_work_mem")
+                conn.autocommit = False
+
+        registro = {
+            "indice": nome,
+            "tempo_construcao_s": tempo,
+            "workers_manutencao": workers,
+            "maintenance_work_mem": memoria,
+        }
+        registro.update(descrever_indice(nome))
+        registros.append(registro)
+    return registros
+
+
+class CustoIndice:
+    """
+    Mede o custo de manter índices: tempo de construção, tamanho em disco e
+    quanto cada configuração reduz a vazão de carga do popular_banco e aumenta
+    o volume de WAL (amplificação de escrita).
+
+    A carga de referência é feita sem nenhum dos índices. Para cada
+    configuração, os índices são construídos sobre os dados já carregados, o
+    banco é esvaziado e a mesma carga é repetida com os índices presentes.
+    """
+
+    def __init__(
+        self,
+        configuracoes,
+        query=None,
+        params=None,
+        repeticoes=5,
+        workers_manutencao=None,
+        maintenance_work_mem=None,
+    ):
+        """
+        Args:
+            configuracoes: Dicionário nome -> lista de CREATE INDEX
+            query: Consulta opcional medida após cada carga, para comparar o
+                ganho de leitura com o custo de escrita
+            params: Parâmetros da consulta
+            repeticoes: Repetições da consulta em cada medição
+            workers_manutencao: max_parallel_maintenance_workers na construção
+            maintenance_work_mem: maintenance_work_mem na construção
+        """
+        self.configuracoes = {nome: list(sqls) for nome, sqls in configuracoes.items()}
+        self.query = query
+        self.params = params
+        self.repeticoes = repeticoes
+        self.workers_manutencao = workers_manutencao
+        self.maintenance_work_mem = maintenance_work_mem
+
+    def _remover_todos(self):
+        for criar_indices in self.configuracoes.values():
+            for sql in comandos_remocao(criar_indices):
+                execute_query(sql)
+
+    def _carregar(self, gerador, configuracao, carga, opcoes_carga):
+        posicao = posicao_wal()
+        inicio = time.perf_counter()
+        resultado = gerador.popular_banco(clear=True, **carga, **opcoes_carga)
+        tempo = time.perf_counter() - inicio
+        wal = bytes_wal_desde(posicao)
+        execute_query("ANALYZE")
+
+        linhas = sum(resultado.values())
+        registro = {
+            "configuracao": configuracao,
+            "linhas": linhas,
+            "tempo_carga_s": tempo,
+            "linhas_por_segundo": linhas / tempo if tempo > 0 else 0.0,
+            "wal_bytes": wal,
+            "wal_bytes_por_linha": wal / linhas if linhas else np.nan,
+        }
+        for tabela, estatisticas in gerador.estatisticas_carga.items():
+            registro[f"{tabela}_linhas_por_segundo"] = estatisticas["linhas_por_segundo"]
+
+        if self.query is not None:
+            medidas = medir_consulta(self.query, self.params, repeticoes=self.repeticoes)
+            registro["latencia_consulta_ms"] = float(
+                np.median([medida["latencia_servidor_ms"] for medida in medidas])
+            )
+        return registro
+
+    def executar(self, gerador, carga, **opcoes_carga):
+        """
+        Executa a medição completa.
+
+        Args:
+            gerador: BibliotecaDataGenerator usado nas cargas
+            carga: Dicionário com num_usuarios, num_livros e num_emprestimos
+            opcoes_carga: Argumentos extras repassados a popular_banco
+                (ex: modo_carga, num_workers, vetorizado)
+
+        Returns:
+            Tupla (construcao, cargas): DataFrame com um registro por índice
+            construído e DataFrame com uma linha por configuração carregada,
+            incluindo as razões em relação à carga sem índices
+        """
+        manutencao = parametros_manutencao()
+        print(f"Parâmetros de manutenção: {manutencao}")
+
+        self._remover_todos()
+        cargas = [self._carregar(gerador, "sem_indices", carga, opcoes_carga)]
+        construcao = []
+
+        for nome, criar_indices in self.configuracoes.items():
+            print(f"\n[custo] Configuração {nome}")
+            try:
+                for registro in construir_indices(
+                    criar_indices, self.workers_manutencao, self.maintenance_work_mem
+                ):
+                    registro["configuracao"] = nome
+                    construcao.append(registro)
+
+                registro = self._carregar(gerador, nome, carga, opcoes_carga)
+                tamanhos = [
+                    descrever_indice(_INDICE_RE.search(sql).group(1))["tamanho_bytes"]
+                    for sql in criar_indices
+                ]
+                registro["tamanho_indices_apos_carga_bytes"] = sum(tamanhos)
+                cargas.append(registro)
+            finally:
+                for sql in comandos_remocao(criar_indices):
+                    execute_query(sql)
+
+        cargas = pd.DataFrame(cargas)
+        referencia = cargas.iloc[0]
+        cargas["razao_vazao"] = cargas["linhas_por_segundo"] / referencia["linhas_por_segundo"]
+        cargas["amplificacao_wal"] = cargas["wal_bytes"] / referencia["wal_bytes"]
+        if self.query is not None:
+            cargas["ganho_leitura"] = (
+                referencia["latencia_consulta_ms"] / cargas["latencia_consulta_ms"]
+            )
+
+        construcao = pd.DataFrame(construcao)
+        for parametro, valor in manutencao.items():
+            construcao[f"servidor_{parametro}"] = valor
+        return construcao, cargas
+
+
+def comparar_configuracoes(
+    query,
+    configuracoes,
+    params=None,
+    aquecimento=2,
+    repeticoes=10,
+    analisar=True,
+):
+    """
+    Compara configurações de índices para uma mesma consulta, sobre os dados
+    já carregados: mede a consulta sem índices e, para cada configuração,
+    constrói os índices, mede a consulta de novo e os remove.
+
+    Diferente do CustoIndice, não recarrega o banco: serve para comparar
+    métodos de acesso (B-tree, GIN, BRIN...) pelo tamanho, tempo de
+    construção e custo de leitura.
+
+    Args:
+        query: Consulta medida
+        configuracoes: Dicionário nome -> lista de CREATE INDEX
+        params: Parâmetros da consulta
+        aquecimento: Execuções descartadas antes de cada medição
+        repeticoes: Repetições de cada medição
+        analisar: Executa ANALYZE nas tabelas indexadas após a construção
+            (necessário para índices de expressão)
+
+    Returns:
+        DataFrame com uma linha por configuração (a primeira é 'sem_indices'):
+        tamanho dos índices e da tabela, tempo de construção, mediana das
+        latências, média das páginas lidas e índices usados pelo plano
+    """
+    for criar_indices in configuracoes.values():
+        for sql in comandos_remocao(criar_indices):
+            execute_query(sql)
+
+    def medir(nome, indices):
+        medidas = pd.DataFrame(
+            medir_consulta(query, params, aquecimento=aquecimento, repeticoes=repeticoes)
+        )
+        return {
+            "configuracao": nome,
+            "metodos": ",".join(sorted({indice["metodo"] for indice in indices})),
+            "tamanho_indices_bytes": sum(indice["tamanho_bytes"] for indice in indices),
+            "tamanho_tabela_bytes": max(
+                (indice["tamanho_tabela_bytes"] for indice in indices), default=np.nan
+            ),
+            "tempo_construcao_s": sum(indice["tempo_construcao_s"] for indice in indices),
+            "linhas": int(medidas["linhas"].iloc[0]),
+            "latencia_cliente_ms": float(medidas["latencia_cliente_ms"].median()),
+            "latencia_servidor_ms": float(medidas["latencia_servidor_ms"].median()),
+            "shared_hit": medidas["shared_hit"].mean(),
+            "shared_read": medidas["shared_read"].mean(),
+            "paginas_lidas": (medidas["shared_hit"] + medidas["shared_read"]).mean(),
+            "no_mais_lento": medidas["no_mais_lento"].iloc[0],
+            "indices_usados": medidas["indices_usados"].iloc[0],
+        }
+
+    print("\n[comparação] Configuração sem_indices")
+    registros = [medir("sem_indices", [])]
+    for nome, criar_indices in configuracoes.items():
+        print(f"[comparação] Configuração {nome}")
+        try:
+            indices = construir_indices(criar_indices)
+            if analisar:
+                for tabela in sorted({indice["tabela"] for indice in indices}):
+                    execute_query(f"ANALYZE {tabela}")
+            registros.append(medir(nome, indices))
+        finally:
+            for sql in comandos_remocao(criar_indices):
+                execute_query(sql)
+
+    resultado = pd.DataFrame(registros)
+    referencia = resultado.iloc[0]
+    resultado["ganho_latencia"] = (
+        referencia["latencia_servidor_ms"] / resultado["latencia_servidor_ms"]
+    )
+    return resultado
@@ -0,0 +1,168 @@
+import math
+import json
+import hashlib
+import numpy as np
+from utils.db_connection import execute_query
+
+# Distribuições de acesso aceitas pelo AmostradorChaves
+DISTRIBUICOES = ("uniforme", "zipf", "quente")
+
+# Agrupa ids consecutivos em faixas (ilhas) sem trazer os ids para o cliente
+SQL_FAIXAS = """
+    SELECT MIN(id) AS inicio, MAX(id) AS fim
+    FROM (SELECT id, id - ROW_NUMBER() OVER (ORDER BY id) AS grupo FROM {tabela}) ids
+    GROUP BY grupo
+    ORDER BY inicio
+"""
+
+
+def _multiplicador_coprimo(n):
+    """
+    Retorna um multiplicador primo com n, usado para embaralhar posições com a
+    bijeção (a * k) mod n sem guardar uma permutação em memória.
+    """
+    a = int(n * 0.6180339887) | 1
+    while math.gcd(a, n) != 1:
+        a += 2
+    return a
+
+
+class AmostradorChaves:
+    """
+    Sorteia chaves estrangeiras a partir das faixas de ids de uma tabela, com
+    distribuição uniforme, Zipf ou de conjunto quente (hot set).
+
+    Só as faixas de ids consecutivos ficam no cliente: o sorteio escolhe uma
+    posição (0 a total - 1) segundo a distribuição e a converte no id
+    correspondente. Na Zipf e no conjunto quente as posições mais acessadas
+    são espalhadas pela tabela (embaralhar=True), para que as chaves quentes
+    não fiquem todas nas primeiras páginas.
+    """
+
+    def __init__(
+        self,
+        faixas,
+        tipo="uniforme",
+        expoente=1.1,
+        fracao_quente=0.1,
+        prob_quente=0.9,
+        embaralhar=True,
+    ):
+        """
+        Args:
+            faixas: Lista de tuplas (inicio, fim) de ids consecutivos (inclusivas)
+            tipo: 'uniforme', 'zipf' ou 'quente'
+            expoente: Expoente s da Zipf (P(k) proporcional a 1 / k^s)
+            fracao_quente: Fração das chaves no conjunto quente
+            prob_quente: Probabilidade de um sorteio cair no conjunto quente
+            embaralhar: Espalha as chaves mais acessadas pela faixa de ids
+        """
+        if tipo not in DISTRIBUICOES:
+            raise ValueError(f"Distribuição inválida: {tipo}. Use uma de {DISTRIBUICOES}")
+
+        faixas = np.asarray(faixas, dtype=np.int64).reshape(-1, 2)
+        self.inicios = faixas[:, 0]
+        tamanhos = faixas[:, 1] - faixas[:, 0] + 1
+        # Posição acumulada em que cada faixa começa
+        self.deslocamentos = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+        self.total = int(tamanhos.sum())
+        if self.total == 0:
+            raise ValueError("Não há ids para sortear")
+
+        self.tipo = tipo
+        self.expoente = expoente
+        self.fracao_quente = fracao_quente
+        self.prob_quente = prob_quente
+        self.embaralhar = embaralhar
+        self._multiplicador = _multiplicador_coprimo(self.total)
+        self._cdf = None
+
+    @classmethod
+    def da_tabela(cls, tabela, **opcoes):
+        """
+        Monta o amostrador a partir das faixas de ids de uma tabela do banco.
+
+        Returns:
+            AmostradorChaves ou None se a tabela estiver vazia
+        """
+        faixas = execute_query(SQL_FAIXAS.format(tabela=tabela))
+        if len(faixas) == 0:
+            return None
+        return cls(faixas[["inicio", "fim"]].to_numpy(dtype=np.int64), **opcoes)
+
+    def _cdf_zipf(self):
+        # Calculada uma única vez: 8 bytes por chave
+        if self._cdf is None:
+            pesos = np.arange(1, self.total + 1, dtype=np.float64) ** -self.expoente
+            self._cdf = np.cumsum(pesos)
+            self._cdf /= self._cdf[-1]
+        return self._cdf
+
+    def posicoes(self, n, rng):
+        """
+        Sorteia n posições (0 a total - 1) segundo a distribuição.
+
+        Args:
+            n: Quantidade de sorteios
+            rng: numpy.random.Generator
+        """
+        if self.tipo == "uniforme":
+            return rng.integers(0, self.total, size=n)
+
+        if self.tipo == "zipf":
+            posicoes = np.searchsorted(self._cdf_zipf(), rng.random(n), side="right")
+            posicoes = np.minimum(posicoes, self.total - 1)
+        else:
+            quentes = max(1, int(self.total * self.fracao_quente))
+            frias = self.total - quentes
+            no_quente = (rng.random(n) < self.prob_quente) | (frias == 0)
+            posicoes = np.where(
+                no_quente,
+                rng.integers(0, quentes, size=n),
+                quentes + rng.integers(0, max(frias, 1), size=n),
+            )
+
+        if self.embaralhar:
+            posicoes = (posicoes * self._multiplicador) % self.total
+        return posicoes
+
+    def amostrar(self, n, rng):
+        """
+        Sorteia n ids.
+
+        Returns:
+            Array NumPy int64 com os ids sorteados
+        """
+        posicoes = self.posicoes(n, rng)
+        faixa = np.searchsorted(self.deslocamentos, posicoes, side="right") - 1
+        return self.inicios[faixa] + (posicoes - self.deslocamentos[faixa])
+
+
+def opcoes_distribuicao(distribuicao, tabela):
+    """
+    Normaliza a especificação de distribuição aceita pelos geradores.
+
+    Args:
+        distribuicao: Nome da distribuição ('uniforme', 'zipf', 'quente'), um
+            dicionário de opções do AmostradorChaves com a chave 'tipo', ou um
+            dicionário por tabela ({'livros': ..., 'usuarios': ...})
+        tabela: Tabela cujas opções são retornadas
+
+    Returns:
+        Dicionário de opções para AmostradorChaves
+    """
+    if isinstance(distribuicao, str):
+        return {"tipo": distribuicao}
+    if tabela in distribuicao:
+        return opcoes_distribuicao(distribuicao[tabela], tabela)
+    return dict(distribuicao)
+
+
+def nome_distribuicao(distribuicao):
+    """
+    Retorna um nome curto da distribuição, usado nas chaves de snapshot.
+    """
+    if isinstance(distribuicao, str):
+        return distribuicao
+    resumo = json.dumps(distribuicao, sort_keys=True, default=str)
+    return f"dist{hashlib.sha1(resumo.encode('utf-8')).hexdigest()[:8]}"
@@ -0,0 +1,364 @@
+import time
+import random
+import threading
+import numpy as np
+import pandas as pd
+from utils.db_connection import DatabaseConnection, execute_query, invalidate_result_cache
+from utils.benchmark import PERCENTIS, comandos_remocao
+from utils.key_sampler import AmostradorChaves, opcoes_distribuicao
+
+# Operações disponíveis para a carga: consulta SQL e chaves da amostra usadas
+# como parâmetros
+OPERACOES = {
+    "busca_cpf": ("SELECT * FROM usuarios WHERE cpf = %s", ("cpfs",)),
+    "busca_isbn": ("SELECT * FROM livros WHERE isbn = %s", ("isbns",)),
+    "emprestimo": (
+        "INSERT INTO emprestimos (livro_id, usuario_id, data_emprestimo, status) "
+        "VALUES (%s, %s, CURRENT_DATE, 'Em Andamento')",
+        ("livros_ids", "usuarios_ids"),
+    ),
+}
+
+# Mistura padrão: 90% de buscas por chave e 10% de novos empréstimos
+MIX_PADRAO = {"busca_cpf": 0.45, "busca_isbn": 0.45, "emprestimo": 0.10}
+
+# Colunas registradas por transação (ver CargaConcorrente._cliente)
+COLUNAS_TRANSACOES = ["cliente", "operacao", "instante", "latencia_ms", "espera_pool_ms", "erro"]
+
+# Limites superiores (ms) das faixas do histograma de latência
+LIMITES_HISTOGRAMA_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+SQL_ESPERAS = """
+    SELECT
+        COUNT(*) FILTER (WHERE wait_event_type = 'Lock') AS esperando_lock,
+        COUNT(*) FILTER (WHERE wait_event_type = 'LWLock') AS esperando_lwlock,
+        COUNT(*) FILTER (WHERE state = 'active') AS ativos
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid()
+"""
+
+SQL_DEADLOCKS = "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+
+
+def _normalizar_mix(mix):
+    desconhecidas = set(mix) - set(OPERACOES)
+    if desconhecidas:
+        raise ValueError(f"Operações desconhecidas no mix: {sorted(desconhecidas)}")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Os pesos do mix devem somar um valor positivo")
+    nomes = list(mix)
+    return nomes, [mix[nome] / total for nome in nomes]
+
+
+def amostrar_chaves(tamanho=1000, seed=42):
+    """
+    Sorteia no banco as chaves usadas como parâmetros das operações.
+
+    O sorteio usa setseed para que a mesma semente escolha as mesmas chaves
+    sobre os mesmos dados.
+
+    Returns:
+        Dicionário com listas de cpfs, isbns, usuarios_ids e livros_ids
+    """
+    with DatabaseConnection.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT setseed(%s)", (random.Random(seed).random() * 2 - 1,))
+        cursor.execute("SELECT id, cpf FROM usuarios ORDER BY random() LIMIT %s", (tamanho,))
+        usuarios = cursor.fetchall()
+        cursor.execute("SELECT id, isbn FROM livros ORDER BY random() LIMIT %s", (tamanho,))
+        livros = cursor.fetchall()
+        conn.rollback()
+
+    if not usuarios or not livros:
+        raise ValueError("Não há usuários ou livros no banco para gerar carga")
+
+    return {
+        "usuarios_ids": [id_ for id_, _ in usuarios],
+        "cpfs": [cpf for _, cpf in usuarios],
+        "livros_ids": [id_ for id_, _ in livros],
+        "isbns": [isbn for _, isbn in livros],
+    }
+
+
+def resumir_carga(transacoes, esperas=None):
+    """
+    Resume uma execução de carga: vazão (transações por segundo) e percentis
+    de latência por configuração e operação, além das esperas por lock.
+
+    Args:
+        transacoes: DataFrame de transações (ver CargaConcorrente.executar)
+        esperas: DataFrame de amostras do pg_stat_activity
+
+    Returns:
+        DataFrame com uma linha por configuração e operação ('total' agrega
+        todas as operações)
+    """
+    linhas = []
+    for configuracao, df_configuracao in transacoes.groupby("configuracao", sort=False):
+        duracao = df_configuracao["duracao"].iloc[0]
+        grupos = [("total", df_configuracao)] + list(
+            df_configuracao.groupby("operacao", sort=False)
+        )
+        for operacao, df in grupos:
+            ok = df[df["erro"].isna()]
+            latencias = ok["latencia_ms"].to_numpy()
+            linha = {
+                "configuracao": configuracao,
+                "operacao": operacao,
+                "clientes": df_configuracao["cliente"].nunique(),
+                "transacoes": len(ok),
+                "erros": int(df["erro"].notna().sum()),
+                "tps": len(ok) / duracao,
+                "latencia_media_ms": latencias.mean() if len(latencias) else np.nan,
+                "espera_pool_media_ms": ok["espera_pool_ms"].mean(),
+            }
+            for percentil in PERCENTIS:
+                linha[f"latencia_p{percentil}_ms"] = (
+                    np.percentile(latencias, percentil) if len(latencias) else np.nan
+                )
+            linha["latencia_max_ms"] = latencias.max() if len(latencias) else np.nan
+
+            if esperas is not None and len(esperas):
+                amostras = esperas[esperas["configuracao"] == configuracao]
+                linha["esperando_lock_media"] = amostras["esperando_lock"].mean()
+                linha["esperando_lock_max"] = amostras["esperando_lock"].max()
+                linha["amostras_com_lock"] = amostras["esperando_lock"].gt(0).mean()
+                linha["deadlocks"] = amostras["deadlocks"].max()
+            linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def histograma_latencias(transacoes, limites_ms=LIMITES_HISTOGRAMA_MS):
+    """
+    Conta as transações bem-sucedidas por faixa de latência.
+
+    Returns:
+        DataFrame com configuracao, operacao, faixa (limite superior em ms,
+        inf para a última) e transacoes
+    """
+    limites = [0.0, *limites_ms, np.inf]
+    ok = transacoes[transacoes["erro"].isna()]
+    faixas = pd.cut(ok["latencia_ms"], limites, labels=limites[1:])
+    return (
+        ok.assign(faixa=faixas)
+        .groupby(["configuracao", "operacao", "faixa"], observed=False)
+        .size()
+        .rename("transacoes")
+        .reset_index()
+    )
+
+
+class CargaConcorrente:
+    """
+    Gerador de carga no estilo do pgbench: num_clientes threads executam um mix
+    de operações sobre o esquema da biblioteca durante um tempo fixo, cada
+    transação com uma conexão do pool do projeto.
+
+    Uma thread de monitoramento amostra o pg_stat_activity durante a execução
+    para medir quantas sessões estão esperando por locks.
+    """
+
+    def __init__(
+        self,
+        mix=None,
+        num_clientes=None,
+        duracao=10.0,
+        seed=42,
+        tamanho_amostra=1000,
+        intervalo_monitor=0.1,
+        limpar=True,
+        distribuicao=None,
+    ):
+        """
+        Args:
+            mix: Dicionário operação -> peso (padrão: MIX_PADRAO)
+            num_clientes: Número de clientes simultâneos (padrão: tamanho do
+                pool menos a conexão do monitor)
+            duracao: Duração de cada execução em segundos
+            seed: Semente do sorteio de chaves e das escolhas de cada cliente
+            tamanho_amostra: Quantidade de usuários e livros sorteados como chaves
+            intervalo_monitor: Intervalo entre amostras do pg_stat_activity (s)
+            limpar: Remove os empréstimos inseridos ao fim de cada execução, para
+                que as configurações comparadas partam dos mesmos dados
+            distribuicao: Distribuição de acesso às chaves da amostra:
+                'uniforme', 'zipf', 'quente' ou dicionário de opções do
+                AmostradorChaves, geral ou por lista de chaves (ex:
+                {'cpfs': 'zipf', 'isbns': {'tipo': 'quente'}}). Se None, cada
+                chave é escolhida com a mesma probabilidade.
+        """
+        self.operacoes, self.pesos = _normalizar_mix(mix or MIX_PADRAO)
+        self.num_clientes = num_clientes or max(DatabaseConnection.pool_size() - 1, 1)
+        self.duracao = duracao
+        self.seed = seed
+        self.tamanho_amostra = tamanho_amostra
+        self.intervalo_monitor = intervalo_monitor
+        self.limpar = limpar
+        self.distribuicao = distribuicao
+
+    def _escolher_chave(self, nome, chaves, rng, amostradores):
+        if amostradores is None:
+            return rng.choice(chaves[nome])
+        # Posição na amostra sorteada com a distribuição de acesso
+        posicao = amostradores[nome].posicoes(1, amostradores["rng"])[0]
+        return chaves[nome][posicao]
+
+    def _cliente(self, indice, chaves, fim, registros):
+        rng = random.Random(f"{self.seed}:{indice}")
+        amostradores = None
+        if self.distribuicao is not None:
+            amostradores = {
+                nome: AmostradorChaves(
+                    [(0, len(valores) - 1)],
+                    **opcoes_distribuicao(self.distribuicao, nome),
+                )
+                for nome, valores in chaves.items()
+            }
+            amostradores["rng"] = np.random.default_rng([self.seed, indice])
+        while time.perf_counter() < fim:
+            operacao = rng.choices(self.operacoes, self.pesos)[0]
+            sql, parametros = OPERACOES[operacao]
+            params = tuple(
+                self._escolher_chave(nome, chaves, rng, amostradores)
+                for nome in parametros
+            )
+
+            inicio = time.perf_counter()
+            obtida = inicio
+            try:
+                with DatabaseConnection.connection() as conn:
+                    obtida = time.perf_counter()
+                    cursor = conn.cursor()
+                    cursor.execute(sql, params)
+                    if cursor.description is not None:
+                        cursor.fetchall()
+                    conn.commit()
+                erro = None
+            except Exception as e:
+                erro = str(e)
+            termino = time.perf_counter()
+
+            registros.append(
+                {
+                    "cliente": indice,
+                    "operacao": operacao,
+                    "instante": inicio,
+                    "latencia_ms": (termino - obtida) * 1000,
+                    "espera_pool_ms": (obtida - inicio) * 1000,
+                    "erro": erro,
+                }
+            )
+
+    def _monitorar(self, parar, amostras):
+        deadlocks_inicial = execute_query(SQL_DEADLOCKS).iloc[0, 0]
+        while not parar.wait(self.intervalo_monitor):
+            with DatabaseConnection.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SQL_ESPERAS)
+                esperando_lock, esperando_lwlock, ativos = cursor.fetchone()
+                cursor.execute(SQL_DEADLOCKS)
+                deadlocks = cursor.fetchone()[0] - deadlocks_inicial
+                conn.rollback()
+            amostras.append(
+                {
+                    "instante": time.perf_counter(),
+                    "esperando_lock": esperando_lock,
+                    "esperando_lwlock": esperando_lwlock,
+                    "ativos": ativos,
+                    "deadlocks": deadlocks,
+                }
+            )
+
+    def executar(self, configuracao="atual"):
+        """
+        Executa a carga uma vez sobre o estado atual do banco.
+
+        Returns:
+            Tupla (transacoes, esperas): DataFrame com uma linha por transação
+            e DataFrame com as amostras de esperas do pg_stat_activity
+        """
+        chaves = amostrar_chaves(self.tamanho_amostra, self.seed)
+        ultimo_emprestimo = execute_query("SELECT COALESCE(MAX(id), 0) FROM emprestimos").iloc[0, 0]
+
+        registros = [[] for _ in range(self.num_clientes)]
+        amostras = []
+        parar = threading.Event()
+        monitor = threading.Thread(target=self._monitorar, args=(parar, amostras))
+
+        inicio = time.perf_counter()
+        fim = inicio + self.duracao
+        clientes = [
+            threading.Thread(target=self._cliente, args=(indice, chaves, fim, registros[indice]))
+            for indice in range(self.num_clientes)
+        ]
+        monitor.start()
+        for cliente in clientes:
+            cliente.start()
+        for cliente in clientes:
+            cliente.join()
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        monitor.join()
+        # Os clientes escrevem direto em seus cursores
+        invalidate_result_cache()
+
+        if self.limpar:
+            execute_query("DELETE FROM emprestimos WHERE id > %s", (int(ultimo_emprestimo),))
+
+        # As colunas são explícitas para o caso de nenhum cliente ter concluído
+        # uma transação dentro da duração
+        transacoes = pd.DataFrame(
+            [registro for lista in registros for registro in lista],
+            columns=COLUNAS_TRANSACOES,
+        )
+        transacoes["instante"] -= inicio
+        transacoes["configuracao"] = configuracao
+        transacoes["duracao"] = duracao
+
+        esperas = pd.DataFrame(
+            amostras,
+            columns=["instante", "esperando_lock", "esperando_lwlock", "ativos", "deadlocks"],
+        )
+        esperas["instante"] -= inicio
+        esperas["configuracao"] = configuracao
+        return transacoes, esperas
+
+    def comparar(self, configuracoes, analisar=True):
+        """
+        Executa a carga em cada configuração de índices.
+
+        Args:
+            configuracoes: Dicionário nome -> lista de CREATE INDEX (lista vazia
+                mede o banco sem índices extras)
+            analisar: Executa ANALYZE após criar os índices
+
+        Returns:
+            Tupla (transacoes, esperas) com as execuções de todas as configurações
+        """
+        todas_transacoes, todas_esperas = [], []
+        for nome, criar_indices in configuracoes.items():
+            remover_indices = comandos_remocao(criar_indices)
+            print(f"\n[carga] Configuração {nome}: {self.num_clientes} clientes por {self.duracao}s")
+            for sql in remover_indices + list(criar_indices):
+                execute_query(sql)
+            if analisar:
+                execute_query("ANALYZE")
+            try:
+                transacoes, esperas = self.executar(nome)
+            finally:
+                for sql in remover_indices:
+                    execute_query(sql)
+            # Vazão da linha 'total' de resumir_carga: só transações concluídas,
+            # sobre a duração medida
+            resumo = resumir_carga(transacoes)
+            if len(resumo):
+                total = resumo[resumo["operacao"] == "total"].iloc[0]
+                print(f"{total['tps']:.0f} transações/s ({total['erros']} com erro)")
+            else:
+                print("Nenhuma transação registrada")
+            todas_transacoes.append(transacoes)
+            todas_esperas.append(esperas)
+        return (
+            pd.concat(todas_transacoes, ignore_index=True),
+            pd.concat(todas_esperas, ignore_index=True),
+        )
@@ -0,0 +1,382 @@
+import re
+import json
+import bisect
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Prefixo das métricas no formato de texto do Prometheus
+PREFIXO_PROMETHEUS = "biblioteca"
+
+# Limites (inclusivos) dos baldes dos histogramas de cada unidade
+LIMITES_SEGUNDOS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+LIMITES_LINHAS = (0, 1, 10, 100, 1000, 5000, 10000, 100000, 1000000)
+LIMITES_BYTES = tuple(1024 * 4**expoente for expoente in range(11))
+
+# Histogramas conhecidos: nome -> (limites, descrição)
+HISTOGRAMAS = {
+    "db_latencia_segundos": (LIMITES_SEGUNDOS, "Latência de cada chamada à camada de banco"),
+    "db_espera_pool_segundos": (LIMITES_SEGUNDOS, "Espera por uma conexão livre do pool"),
+    "db_linhas": (LIMITES_LINHAS, "Linhas retornadas ou afetadas por chamada"),
+    "db_bytes": (LIMITES_BYTES, "Bytes enviados ou recebidos por chamada"),
+    "lote_geracao_segundos": (LIMITES_SEGUNDOS, "Tempo de geração de cada lote"),
+    "lote_carga_segundos": (LIMITES_SEGUNDOS, "Tempo de carga de cada lote no banco"),
+    "lote_linhas": (LIMITES_LINHAS, "Linhas por lote gerado"),
+}
+
+# Contadores conhecidos: nome -> descrição
+CONTADORES = {
+    "db_chamadas_total": "Chamadas à camada de banco",
+    "db_erros_total": "Chamadas à camada de banco que falharam",
+    "lote_linhas_total": "Linhas geradas nos lotes",
+}
+
+# Primeira palavra da instrução, depois de comentários
+_COMANDO_RE = re.compile(r"^(?:\s+|--[^\n]*|/\*.*?\*/)*(\w+)", re.DOTALL)
+_ALVO_RE = {
+    "select": re.compile(r"\bFROM\s+(?:ONLY\s+)?([\w.\"]+)", re.IGNORECASE),
+    "with": re.compile(r"\bFROM\s+(?:ONLY\s+)?([\w.\"]+)", re.IGNORECASE),
+    "insert": re.compile(r"\bINTO\s+([\w.\"]+)", re.IGNORECASE),
+    "update": re.compile(r"^\s*UPDATE\s+(?:ONLY\s+)?([\w.\"]+)", re.IGNORECASE),
+    "delete": re.compile(r"\bFROM\s+(?:ONLY\s+)?([\w.\"]+)", re.IGNORECASE),
+    "copy": re.compile(r"^\s*COPY\s+([\w.\"]+)", re.IGNORECASE),
+    "truncate": re.compile(r"\bTRUNCATE\s+(?:TABLE\s+)?([\w.\"]+)", re.IGNORECASE),
+    "alter": re.compile(r"\bTABLE\s+(?:IF\s+EXISTS\s+)?([\w.\"]+)", re.IGNORECASE),
+    "create": re.compile(r"\bON\s+([\w.\"]+)|\bTABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.\"]+)", re.IGNORECASE),
+}
+
+
+@lru_cache(maxsize=1024)
+def rotulo_consulta(query):
+    """
+    Deriva o rótulo de uma instrução SQL: o comando e a tabela principal
+    (ex: 'select:livros', 'insert:usuarios', 'analyze').
+    """
+    if not isinstance(query, str):
+        return "sql"
+    comando = _COMANDO_RE.match(query)
+    if comando is None:
+        return "sql"
+    comando = comando.group(1).lower()
+    padrao = _ALVO_RE.get(comando)
+    alvo = padrao.search(query) if padrao is not None else None
+    if alvo is None:
+        return comando
+    tabela = next(grupo for grupo in alvo.groups() if grupo)
+    return f"{comando}:{tabela.split('.')[-1].strip(chr(34)).lower()}"
+
+
+class Histograma:
+    """
+    Histograma com baldes fixos, no modelo do Prometheus: contagem por balde,
+    soma e contagem total, além do mínimo e do máximo observados.
+    """
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = tuple(limites)
+        # Último balde: acima do maior limite (+Inf)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.soma += valor
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def percentil(self, p):
+        """
+        Estima o percentil p (0 a 100) interpolando dentro do balde, como o
+        histogram_quantile do Prometheus.
+        """
+        if self.total == 0:
+            return np.nan
+        alvo = self.total * p / 100
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem > 0:
+                inferior = self.limites[indice - 1] if indice > 0 else 0.0
+                superior = (
+                    self.limites[indice] if indice < len(self.limites) else self.maximo
+                )
+                estimado = inferior + (superior - inferior) * (alvo - acumulado) / contagem
+                return float(min(max(estimado, self.minimo), self.maximo))
+            acumulado += contagem
+        return float(self.maximo)
+
+    def exportar(self):
+        return {
+            "limites": list(self.limites),
+            "contagens": list(self.contagens),
+            "total": self.total,
+            "soma": self.soma,
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+        }
+
+    def mesclar(self, dados):
+        """
+        Soma ao histograma um histograma exportado com os mesmos limites.
+        """
+        if tuple(dados["limites"]) != self.limites:
+            raise ValueError("Histogramas com limites diferentes não podem ser mesclados")
+        self.contagens = [a + b for a, b in zip(self.contagens, dados["contagens"])]
+        self.total += dados["total"]
+        self.soma += dados["soma"]
+        for campo, escolher in (("minimo", min), ("maximo", max)):
+            if dados[campo] is not None:
+                atual = getattr(self, campo)
+                setattr(self, campo, dados[campo] if atual is None else escolher(atual, dados[campo]))
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class RegistroMetricas:
+    """
+    Registro de métricas do processo: histogramas e contadores identificados
+    por (métrica, rótulo), além de ganchos chamados a cada evento.
+
+    A camada de banco (db_connection) registra latência, linhas, bytes e
+    espera pelo pool de cada chamada, rotuladas pela instrução; o gerador
+    registra o tempo de geração e de carga de cada lote, rotulados pela
+    tabela. Workers do modo paralelo têm registros próprios, mesclados no do
+    processo principal ao fim de cada shard.
+    """
+
+    def __init__(self):
+        self.ativo = True
+        self._histogramas = {}
+        self._contadores = {}
+        self._ganchos = []
+        self._lock = threading.Lock()
+
+    def observar(self, metrica, rotulo, valor):
+        """
+        Registra um valor no histograma (metrica, rotulo).
+        """
+        if not self.ativo or valor is None:
+            return
+        with self._lock:
+            histograma = self._histogramas.get((metrica, rotulo))
+            if histograma is None:
+                limites = HISTOGRAMAS.get(metrica, (LIMITES_SEGUNDOS, ""))[0]
+                histograma = self._histogramas[(metrica, rotulo)] = Histograma(limites)
+            histograma.observar(valor)
+
+    def incrementar(self, metrica, rotulo, valor=1):
+        """
+        Soma um valor ao contador (metrica, rotulo).
+        """
+        if not self.ativo:
+            return
+        with self._lock:
+            chave = (metrica, rotulo)
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def adicionar_gancho(self, gancho):
+        """
+        Registra uma função chamada com o dicionário de cada evento (chamada
+        ao banco ou lote carregado). O gancho roda na thread que gerou o
+        evento e não deve lançar exceções.
+        """
+        self._ganchos.append(gancho)
+
+    def remover_gancho(self, gancho):
+        self._ganchos.remove(gancho)
+
+    def _notificar(self, evento):
+        for gancho in list(self._ganchos):
+            try:
+                gancho(evento)
+            except Exception as e:
+                print(f"Erro no gancho de métricas {gancho!r}: {e}")
+
+    def registrar_chamada(
+        self, operacao, rotulo, latencia_s, linhas=None, bytes_=None, espera_pool_s=None, erro=None
+    ):
+        """
+        Registra uma chamada à camada de banco.
+
+        Args:
+            operacao: Função chamada (ex: 'execute_query')
+            rotulo: Rótulo da instrução (ver rotulo_consulta)
+            latencia_s: Duração da chamada
+            linhas: Linhas retornadas ou afetadas
+            bytes_: Bytes enviados ou recebidos (quando conhecidos)
+            espera_pool_s: Espera por uma conexão do pool
+            erro: Exceção, se a chamada falhou
+        """
+        if not self.ativo:
+            return
+        self.incrementar("db_chamadas_total", rotulo)
+        self.observar("db_latencia_segundos", rotulo, latencia_s)
+        self.observar("db_espera_pool_segundos", rotulo, espera_pool_s)
+        if erro is not None:
+            self.incrementar("db_erros_total", rotulo)
+        else:
+            self.observar("db_linhas", rotulo, linhas)
+            self.observar("db_bytes", rotulo, bytes_)
+        if self._ganchos:
+            self._notificar(
+                {
+                    "tipo": "chamada",
+                    "operacao": operacao,
+                    "rotulo": rotulo,
+                    "latencia_s": latencia_s,
+                    "linhas": linhas,
+                    "bytes": bytes_,
+                    "espera_pool_s": espera_pool_s,
+                    "erro": None if erro is None else f"{type(erro).__name__}: {erro}",
+                }
+            )
+
+    def registrar_lote(self, tabela, linhas=None, geracao_s=None, carga_s=None):
+        """
+        Registra um lote do gerador de dados. Na carga em pipeline a geração e
+        a escrita de um lote acontecem em threads diferentes e são registradas
+        separadamente (só com geracao_s e linhas, ou só com carga_s).
+        """
+        if not self.ativo:
+            return
+        self.observar("lote_geracao_segundos", tabela, geracao_s)
+        self.observar("lote_carga_segundos", tabela, carga_s)
+        if linhas is not None:
+            self.observar("lote_linhas", tabela, linhas)
+            self.incrementar("lote_linhas_total", tabela, linhas)
+        if self._ganchos:
+            self._notificar(
+                {
+                    "tipo": "lote",
+                    "rotulo": tabela,
+                    "linhas": linhas,
+                    "geracao_s": geracao_s,
+                    "carga_s": carga_s,
+                }
+            )
+
+    def limpar(self):
+        """
+        Descarta todas as métricas (os ganchos são mantidos).
+        """
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def exportar(self):
+        """
+        Retorna as métricas em um dicionário serializável em JSON.
+        """
+        with self._lock:
+            return {
+                "histogramas": [
+                    {"metrica": metrica, "rotulo": rotulo, **histograma.exportar()}
+                    for (metrica, rotulo), histograma in sorted(self._histogramas.items())
+                ],
+                "contadores": [
+                    {"metrica": metrica, "rotulo": rotulo, "valor": valor}
+                    for (metrica, rotulo), valor in sorted(self._contadores.items())
+                ],
+            }
+
+    def mesclar(self, dados):
+        """
+        Soma ao registro as métricas exportadas por outro (ex: de um worker).
+        """
+        with self._lock:
+            for item in dados["histogramas"]:
+                chave = (item["metrica"], item["rotulo"])
+                if chave not in self._histogramas:
+                    self._histogramas[chave] = Histograma(item["limites"])
+                self._histogramas[chave].mesclar(item)
+            for item in dados["contadores"]:
+                chave = (item["metrica"], item["rotulo"])
+                self._contadores[chave] = self._contadores.get(chave, 0) + item["valor"]
+
+    def salvar_json(self, caminho):
+        """
+        Grava as métricas exportadas em um arquivo JSON.
+        """
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.exportar(), f, ensure_ascii=False, indent=2)
+
+    def prometheus(self):
+        """
+        Retorna as métricas no formato de texto de exposição do Prometheus.
+        """
+        dados = self.exportar()
+        linhas = []
+        agrupados = {}
+        for item in dados["histogramas"]:
+            agrupados.setdefault(item["metrica"], []).append(item)
+        for metrica, itens in agrupados.items():
+            nome = f"{PREFIXO_PROMETHEUS}_{metrica}"
+            linhas.append(f"# HELP {nome} {HISTOGRAMAS.get(metrica, (None, metrica))[1]}")
+            linhas.append(f"# TYPE {nome} histogram")
+            for item in itens:
+                rotulo = _escapar_rotulo(item["rotulo"])
+                acumulado = 0
+                for limite, contagem in zip(item["limites"] + ["+Inf"], item["contagens"]):
+                    acumulado += contagem
+                    linhas.append(
+                        f'{nome}_bucket{{rotulo="{rotulo}",le="{limite}"}} {acumulado}'
+                    )
+                linhas.append(f'{nome}_sum{{rotulo="{rotulo}"}} {item["soma"]}')
+                linhas.append(f'{nome}_count{{rotulo="{rotulo}"}} {item["total"]}')
+
+        contadores = {}
+        for item in dados["contadores"]:
+            contadores.setdefault(item["metrica"], []).append(item)
+        for metrica, itens in contadores.items():
+            nome = f"{PREFIXO_PROMETHEUS}_{metrica}"
+            linhas.append(f"# HELP {nome} {CONTADORES.get(metrica, metrica)}")
+            linhas.append(f"# TYPE {nome} counter")
+            for item in itens:
+                linhas.append(
+                    f'{nome}{{rotulo="{_escapar_rotulo(item["rotulo"])}"}} {item["valor"]}'
+                )
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self, caminho):
+        """
+        Grava as métricas no formato do Prometheus (ex: para o textfile
+        collector do node_exporter).
+        """
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+
+    def resumo(self):
+        """
+        Resume os histogramas em um DataFrame: contagem, soma, média, p50, p95,
+        p99 e máximo por métrica e rótulo.
+        """
+        with self._lock:
+            itens = sorted(self._histogramas.items())
+            linhas = [
+                {
+                    "metrica": metrica,
+                    "rotulo": rotulo,
+                    "total": histograma.total,
+                    "soma": histograma.soma,
+                    "media": histograma.soma / histograma.total if histograma.total else np.nan,
+                    "p50": histograma.percentil(50),
+                    "p95": histograma.percentil(95),
+                    "p99": histograma.percentil(99),
+                    "maximo": histograma.maximo,
+                }
+                for (metrica, rotulo), histograma in itens
+            ]
+        return pd.DataFrame(linhas)
+
+
+# Registro usado pela camada de banco e pelo gerador de dados
+REGISTRO = RegistroMetricas()
@@ -0,0 +1,248 @@
+import time
+from datetime import date
+import pandas as pd
+from utils.db_connection import execute_query
+from utils.benchmark import _INDICE_RE, comandos_remocao, explain_analyze, medir_consulta
+from utils.index_cost import construir_indices, descrever_indice
+from utils.plan_analyzer import analisar_plano
+from utils.partitioning import (
+    nome_particionamento,
+    particoes,
+    remover_emprestimos_antigos,
+    tamanho_indices_particoes,
+)
+
+# Layouts comparados: a tabela única é a referência
+LAYOUTS_PADRAO = (False, "ano", "mes", {"intervalo": "mes", "particoes_hash": 4})
+
+# Índices criados em cada layout (na tabela particionada, um por partição)
+INDICES_PARTICAO = [
+    "CREATE INDEX idx_emprestimos_data ON emprestimos (data_emprestimo)",
+    "CREATE INDEX idx_emprestimos_usuario ON emprestimos (usuario_id)",
+]
+
+# Consultas medidas e os parâmetros de cada uma (ver parametros_consultas).
+# As duas últimas não filtram a data: mostram o custo de consultar todas as
+# partições quando não há poda por faixa
+CONSULTAS_PARTICAO = {
+    "faixa_mes": (
+        "SELECT id, livro_id, status FROM emprestimos "
+        "WHERE data_emprestimo >= %s AND data_emprestimo < %s",
+        ("inicio_mes", "fim_mes"),
+    ),
+    "contagem_ano": (
+        "SELECT status, COUNT(*) FROM emprestimos "
+        "WHERE data_emprestimo >= %s AND data_emprestimo < %s GROUP BY status",
+        ("inicio_ano", "fim_ano"),
+    ),
+    "usuario_mes": (
+        "SELECT id, livro_id, data_emprestimo FROM emprestimos "
+        "WHERE usuario_id = %s AND data_emprestimo >= %s AND data_emprestimo < %s",
+        ("usuario", "inicio_mes", "fim_mes"),
+    ),
+    "usuario": (
+        "SELECT id, livro_id, data_emprestimo FROM emprestimos WHERE usuario_id = %s",
+        ("usuario",),
+    ),
+    "id": ("SELECT * FROM emprestimos WHERE id = %s", ("id",)),
+}
+
+
+def parametros_consultas():
+    """
+    Calcula os parâmetros das consultas a partir dos dados carregados: o mês e
+    o ano civil completos mais recentes (um ano antes da última data), o
+    usuário do primeiro empréstimo e o id do meio da tabela.
+    """
+    resultado = execute_query(
+        """
+        SELECT MAX(data_emprestimo) AS maximo, MIN(id) AS menor_id, MAX(id) AS maior_id,
+               (SELECT usuario_id FROM emprestimos ORDER BY id LIMIT 1) AS usuario
+        FROM emprestimos
+        """
+    ).iloc[0]
+    if pd.isna(resultado["maximo"]):
+        raise ValueError("Não há empréstimos carregados")
+    maximo = resultado["maximo"]
+    inicio_mes = date(maximo.year - 1, maximo.month, 1)
+    fim_mes = date(inicio_mes.year + inicio_mes.month // 12, inicio_mes.month % 12 + 1, 1)
+    return {
+        "inicio_mes": inicio_mes,
+        "fim_mes": fim_mes,
+        "inicio_ano": date(maximo.year - 1, 1, 1),
+        "fim_ano": date(maximo.year, 1, 1),
+        "usuario": int(resultado["usuario"]),
+        "id": int((resultado["menor_id"] + resultado["maior_id"]) // 2),
+    }
+
+
+def _subplanos_removidos(no):
+    # Partições descartadas durante a execução (parâmetros só conhecidos
+    # após o planejamento, como em statements preparados)
+    return no.get("Subplans Removed", 0) + sum(
+        _subplanos_removidos(filho) for filho in no.get("Plans", [])
+    )
+
+
+def medir_poda(query, params=None):
+    """
+    Executa EXPLAIN ANALYZE e conta as partições de emprestimos lidas pelo
+    plano; as partições podadas no planejamento nem aparecem no plano.
+
+    Returns:
+        Dicionário com particoes_lidas e particoes_podadas_execucao
+    """
+    plano = explain_analyze(query, params)
+    nos = analisar_plano(plano)
+    lidas = {tabela for tabela in nos["tabela"].dropna() if tabela.startswith("emprestimos")}
+    return {
+        "particoes_lidas": len(lidas),
+        "particoes_podadas_execucao": _subplanos_removidos(plano["Plan"]),
+    }
+
+
+def executar_consultas(consultas=None, aquecimento=2, repeticoes=10):
+    """
+    Mede as consultas de CONSULTAS_PARTICAO sobre os dados e o layout atuais.
+
+    Args:
+        consultas: Nomes das consultas (padrão: todas)
+        aquecimento: Execuções descartadas antes de cada medição
+        repeticoes: Repetições de cada medição
+
+    Returns:
+        DataFrame com uma linha por consulta: latências (mediana), páginas
+        lidas, partições lidas e total de partições folha
+    """
+    valores = parametros_consultas()
+    total = max(len(particoes()), 1)
+    registros = []
+    for nome in consultas or CONSULTAS_PARTICAO:
+        query, campos = CONSULTAS_PARTICAO[nome]
+        params = tuple(valores[campo] for campo in campos)
+        medidas = pd.DataFrame(
+            medir_consulta(query, params, aquecimento=aquecimento, repeticoes=repeticoes)
+        )
+        registro = {
+            "consulta": nome,
+            "linhas": int(medidas["linhas"].iloc[0]),
+            "latencia_cliente_ms": float(medidas["latencia_cliente_ms"].median()),
+            "latencia_servidor_ms": float(medidas["latencia_servidor_ms"].median()),
+            "paginas_lidas": (medidas["shared_hit"] + medidas["shared_read"]).mean(),
+            "indices_usados": medidas["indices_usados"].iloc[0],
+            "particoes_total": total,
+        }
+        registro.update(medir_poda(query, params))
+        registros.append(registro)
+    return pd.DataFrame(registros)
+
+
+def tamanho_indices(indices=INDICES_PARTICAO):
+    """
+    Retorna o tamanho total de cada índice e, na tabela particionada, o da
+    maior e da média das partições do índice.
+    """
+    registros = []
+    for nome in [_INDICE_RE.search(sql).group(1) for sql in indices]:
+        partes = tamanho_indices_particoes(nome)
+        if len(partes) == 0:
+            tamanhos = pd.Series([descrever_indice(nome)["tamanho_bytes"]])
+        else:
+            tamanhos = partes["tamanho_bytes"]
+        registros.append(
+            {
+                "indice": nome,
+                "particoes": len(tamanhos),
+                "tamanho_total_bytes": int(tamanhos.sum()),
+                "tamanho_maior_particao_bytes": int(tamanhos.max()),
+                "tamanho_medio_particao_bytes": float(tamanhos.mean()),
+            }
+        )
+    return pd.DataFrame(registros)
+
+
+def medir_remocao(corte):
+    """
+    Mede a remoção dos empréstimos anteriores ao corte (ver
+    remover_emprestimos_antigos). Remove os dados do banco.
+    """
+    linhas = int(
+        execute_query(
+            "SELECT COUNT(*) AS linhas FROM emprestimos WHERE data_emprestimo < %s", (corte,)
+        ).linhas[0]
+    )
+    inicio = time.perf_counter()
+    resultado = remover_emprestimos_antigos(corte)
+    resultado["tempo_s"] = time.perf_counter() - inicio
+    resultado["linhas_antigas"] = linhas
+    resultado["corte"] = corte
+    return resultado
+
+
+def comparar_particionamentos(
+    gerador,
+    carga,
+    layouts=LAYOUTS_PADRAO,
+    consultas=None,
+    indices=INDICES_PARTICAO,
+    remocao=True,
+    aquecimento=2,
+    repeticoes=10,
+    **opcoes_carga,
+):
+    """
+    Recarrega o banco com cada layout de emprestimos, constrói os índices e
+    mede as consultas, o tamanho dos índices e, por último, a remoção dos
+    empréstimos do ano mais antigo. O banco termina com o último layout.
+
+    Args:
+        gerador: BibliotecaDataGenerator usado nas cargas
+        carga: Dicionário com num_usuarios, num_livros e num_emprestimos
+        layouts: Valores de particionamento passados a popular_banco (False
+            é a tabela única)
+        consultas: Nomes das consultas de CONSULTAS_PARTICAO (padrão: todas)
+        indices: Comandos CREATE INDEX construídos em cada layout
+        remocao: Mede a remoção dos empréstimos antigos (apaga os dados)
+        opcoes_carga: Argumentos extras repassados a popular_banco
+
+    Returns:
+        Tupla (consultas, indices, remocao) de DataFrames com a coluna layout
+        e, nas consultas, o ganho de latência sobre o primeiro layout
+    """
+    resultados_consultas, resultados_indices, resultados_remocao = [], [], []
+    for particionamento in layouts:
+        layout = nome_particionamento(particionamento)
+        print(f"\n[particionamento] Layout {layout}")
+        gerador.popular_banco(
+            clear=True, particionamento=particionamento, **carga, **opcoes_carga
+        )
+        for sql in comandos_remocao(indices):
+            execute_query(sql)
+        construcao = pd.DataFrame(construir_indices(indices))
+        execute_query("ANALYZE emprestimos")
+
+        resultado = executar_consultas(consultas, aquecimento, repeticoes)
+        resultado.insert(0, "layout", layout)
+        resultados_consultas.append(resultado)
+
+        tamanhos = tamanho_indices(indices)
+        tamanhos["tempo_construcao_s"] = construcao["tempo_construcao_s"].to_numpy()
+        tamanhos.insert(0, "layout", layout)
+        resultados_indices.append(tamanhos)
+
+        if remocao:
+            minimo = execute_query("SELECT MIN(data_emprestimo) AS d FROM emprestimos").d[0]
+            registro = medir_remocao(date(minimo.year + 1, 1, 1))
+            registro["layout"] = layout
+            resultados_remocao.append(registro)
+
+    consultas_df = pd.concat(resultados_consultas, ignore_index=True)
+    referencia = consultas_df[consultas_df["layout"] == consultas_df["layout"].iloc[0]]
+    consultas_df["ganho_latencia"] = consultas_df["consulta"].map(
+        referencia.set_index("consulta")["latencia_servidor_ms"]
+    ) / consultas_df["latencia_servidor_ms"]
+    return (
+        consultas_df,
+        pd.concat(resultados_indices, ignore_index=True),
+        pd.DataFrame(resultados_remocao),
+    )
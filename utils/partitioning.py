@@ -0,0 +1,264 @@
+import re
+import json
+from datetime import date
+from utils.batch_generator import _anos_atras
+from utils.db_connection import DatabaseConnection, execute_query, invalidate_result_cache
+
+# Intervalos do particionamento por faixa de data_emprestimo (meses por partição)
+INTERVALOS = {"mes": 1, "trimestre": 3, "ano": 12}
+
+# Anos de histórico cobertos pelas partições: os empréstimos gerados vão de
+# três anos atrás até hoje
+ANOS_HISTORICO = 3
+
+# Partições criadas além do período atual, para que os empréstimos novos
+# (ex: os do gerador de carga) não caiam na partição padrão
+PERIODOS_FUTUROS = 1
+
+SQL_LAYOUT = """
+    SELECT c.relkind, obj_description(c.oid, 'pg_class') AS descricao
+    FROM pg_class c
+    WHERE c.oid = to_regclass(%s)
+"""
+
+# Partições folha de uma tabela (ou índice) particionada, com os limites e o
+# tamanho de cada uma
+SQL_PARTICOES = """
+    SELECT
+        t.relid::text AS particao,
+        t.parentrelid::text AS pai,
+        t.level AS nivel,
+        pg_get_expr(c.relpartbound, c.oid) AS limites,
+        pg_relation_size(t.relid) AS tamanho_bytes,
+        GREATEST(c.reltuples, 0)::bigint AS linhas_estimadas
+    FROM pg_partition_tree(%s) t
+    JOIN pg_class c ON c.oid = t.relid
+    WHERE t.isleaf
+    ORDER BY t.relid::text
+"""
+
+# Partições do primeiro nível (as faixas de data) com o limite superior
+SQL_FAIXAS = """
+    SELECT t.relid::text AS particao, pg_get_expr(c.relpartbound, c.oid) AS limites
+    FROM pg_partition_tree(%s) t
+    JOIN pg_class c ON c.oid = t.relid
+    WHERE t.level = 1
+    ORDER BY t.relid::text
+"""
+
+# Partições folha de um índice particionado e a partição da tabela de cada uma
+SQL_PARTICOES_INDICE = """
+    SELECT
+        t.relid::text AS indice,
+        x.indrelid::regclass::text AS particao,
+        pg_relation_size(t.relid) AS tamanho_bytes
+    FROM pg_partition_tree(%s) t
+    JOIN pg_index x ON x.indexrelid = t.relid
+    WHERE t.isleaf
+    ORDER BY t.relid::text
+"""
+
+_LIMITE_SUPERIOR_RE = re.compile(r"TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def opcoes_particionamento(particionamento):
+    """
+    Normaliza as opções de particionamento de emprestimos.
+
+    Args:
+        particionamento: None ou False (tabela única), o intervalo das
+            partições por faixa de data_emprestimo ('mes', 'trimestre' ou
+            'ano') ou um dicionário com 'intervalo' e 'particoes_hash' (número
+            de subpartições por hash de usuario_id em cada faixa)
+
+    Returns:
+        None para a tabela única ou dicionário com intervalo e particoes_hash
+    """
+    if particionamento is None or particionamento is False:
+        return None
+    if isinstance(particionamento, str):
+        particionamento = {"intervalo": particionamento}
+    opcoes = {
+        "intervalo": particionamento.get("intervalo", "ano"),
+        "particoes_hash": int(particionamento.get("particoes_hash") or 0),
+    }
+    desconhecidas = set(particionamento) - set(opcoes)
+    if desconhecidas:
+        raise ValueError(f"Opções de particionamento desconhecidas: {sorted(desconhecidas)}")
+    if opcoes["intervalo"] not in INTERVALOS:
+        raise ValueError(
+            f"Intervalo de particionamento inválido: {opcoes['intervalo']}. "
+            f"Use um de {tuple(INTERVALOS)}"
+        )
+    if opcoes["particoes_hash"] < 0 or opcoes["particoes_hash"] == 1:
+        raise ValueError("particoes_hash deve ser 0 (sem subpartições) ou pelo menos 2")
+    return opcoes
+
+
+def nome_particionamento(particionamento):
+    """
+    Descreve o particionamento em poucas letras (ex: 'ano', 'mes_hash4'),
+    para chaves de snapshot e rótulos de resultados.
+    """
+    opcoes = opcoes_particionamento(particionamento)
+    if opcoes is None:
+        return "tabela_unica"
+    if opcoes["particoes_hash"]:
+        return f"{opcoes['intervalo']}_hash{opcoes['particoes_hash']}"
+    return opcoes["intervalo"]
+
+
+def _inicio_periodo(dia, meses):
+    indice = (dia.year * 12 + dia.month - 1) // meses * meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _somar_meses(dia, meses):
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _nome_faixa(inicio, intervalo):
+    if intervalo == "ano":
+        return f"emprestimos_{inicio.year}"
+    if intervalo == "trimestre":
+        return f"emprestimos_{inicio.year}_t{(inicio.month - 1) // 3 + 1}"
+    return f"emprestimos_{inicio.year}_{inicio.month:02d}"
+
+
+def faixas_particoes(particionamento, hoje=None):
+    """
+    Retorna as faixas (nome, inicio, fim) das partições de emprestimos: do
+    início do período de três anos atrás até PERIODOS_FUTUROS períodos
+    depois do atual. O fim de cada faixa é exclusivo.
+    """
+    opcoes = opcoes_particionamento(particionamento)
+    meses = INTERVALOS[opcoes["intervalo"]]
+    hoje = hoje or date.today()
+    inicio = _inicio_periodo(_anos_atras(hoje, ANOS_HISTORICO), meses)
+    fim = _somar_meses(_inicio_periodo(hoje, meses), meses * (1 + PERIODOS_FUTUROS))
+
+    faixas = []
+    while inicio < fim:
+        proximo = _somar_meses(inicio, meses)
+        faixas.append((_nome_faixa(inicio, opcoes["intervalo"]), inicio, proximo))
+        inicio = proximo
+    return faixas
+
+
+def sql_emprestimos_particionada(particionamento, hoje=None):
+    """
+    Monta o DDL de emprestimos particionada por faixa de data_emprestimo,
+    com uma partição padrão para as datas fora das faixas e, opcionalmente,
+    subpartições por hash de usuario_id em cada faixa.
+
+    A chave primária precisa incluir as colunas de particionamento de todos
+    os níveis; o id continua único porque vem de uma única sequência.
+    """
+    opcoes = opcoes_particionamento(particionamento)
+    hash_ = opcoes["particoes_hash"]
+    chave = "id, data_emprestimo, usuario_id" if hash_ else "id, data_emprestimo"
+    subparticao = " PARTITION BY HASH (usuario_id)" if hash_ else ""
+
+    comandos = [
+        f"""
+        CREATE TABLE emprestimos (
+            id SERIAL,
+            livro_id INTEGER NOT NULL REFERENCES livros(id),
+            usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+            data_emprestimo DATE NOT NULL,
+            data_devolucao DATE,
+            status VARCHAR(20) NOT NULL,
+            PRIMARY KEY ({chave})
+        ) PARTITION BY RANGE (data_emprestimo)"""
+    ]
+    particoes = [
+        (nome, f"FOR VALUES FROM ('{inicio}') TO ('{fim}')")
+        for nome, inicio, fim in faixas_particoes(opcoes, hoje)
+    ]
+    particoes.append(("emprestimos_padrao", "DEFAULT"))
+    for nome, limites in particoes:
+        comandos.append(f"CREATE TABLE {nome} PARTITION OF emprestimos {limites}{subparticao}")
+        for resto in range(hash_):
+            comandos.append(
+                f"CREATE TABLE {nome}_h{resto} PARTITION OF {nome} "
+                f"FOR VALUES WITH (MODULUS {hash_}, REMAINDER {resto})"
+            )
+    # As opções ficam no comentário da tabela, para create_schema saber se o
+    # layout existente é o pedido
+    comandos.append(f"COMMENT ON TABLE emprestimos IS '{json.dumps(opcoes, sort_keys=True)}'")
+    return ";\n".join(comandos) + ";"
+
+
+def layout_emprestimos():
+    """
+    Retorna o layout atual de emprestimos: None se a tabela não existe, False
+    se é a tabela única e as opções de particionamento se é particionada.
+    """
+    resultado = execute_query(SQL_LAYOUT, ("emprestimos",))
+    if len(resultado) == 0:
+        return None
+    if resultado.relkind[0] != "p":
+        return False
+    try:
+        return opcoes_particionamento(json.loads(resultado.descricao[0]))
+    except (TypeError, ValueError):
+        # Particionada por fora do create_schema
+        return {"intervalo": None, "particoes_hash": None}
+
+
+def particoes(tabela="emprestimos"):
+    """
+    Retorna as partições folha de uma tabela ou índice particionado, com os
+    limites, o tamanho e o número estimado de linhas de cada uma (vazio se
+    não for particionado).
+    """
+    return execute_query(SQL_PARTICOES, (tabela,))
+
+
+def tabelas_folha(tabela):
+    """
+    Retorna as partições folha de uma tabela particionada, ou a própria tabela.
+    """
+    folhas = particoes(tabela)
+    return list(folhas["particao"]) if len(folhas) else [tabela]
+
+
+def tamanho_indices_particoes(indice):
+    """
+    Retorna o tamanho de cada partição de um índice particionado, junto da
+    partição da tabela que ela indexa.
+    """
+    return execute_query(SQL_PARTICOES_INDICE, (indice,))
+
+
+def remover_emprestimos_antigos(corte):
+    """
+    Remove os empréstimos com data_emprestimo anterior ao corte.
+
+    Na tabela particionada, as faixas que terminam até o corte são removidas
+    inteiras com DROP TABLE (sem varrer linhas nem gerar tuplas mortas) e só
+    as linhas da faixa que contém o corte são apagadas com DELETE. Na tabela
+    única, tudo é feito com DELETE.
+
+    Returns:
+        Dicionário com particoes_removidas e linhas_removidas (apenas as
+        apagadas com DELETE)
+    """
+    removidas = []
+    if layout_emprestimos():
+        for faixa in execute_query(SQL_FAIXAS, ("emprestimos",)).itertuples():
+            limite = _LIMITE_SUPERIOR_RE.search(faixa.limites)
+            if limite and date.fromisoformat(limite.group(1)) <= corte:
+                removidas.append(faixa.particao)
+
+    with DatabaseConnection.connection() as conn:
+        cursor = conn.cursor()
+        for particao in removidas:
+            cursor.execute(f"DROP TABLE {particao}")
+        cursor.execute("DELETE FROM emprestimos WHERE data_emprestimo < %s", (corte,))
+        linhas = cursor.rowcount
+        conn.commit()
+    # DROP TABLE de uma partição não aparece como escrita em emprestimos
+    invalidate_result_cache(["emprestimos"])
+    return {"particoes_removidas": len(removidas), "linhas_removidas": linhas}
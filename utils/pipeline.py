@@ -0,0 +1,162 @@
+import time
+import queue
+import threading
+from utils.copy_loader import tamanho_lote
+
+# Lotes que podem esperar na fila entre a geração e a escrita
+PROFUNDIDADE_PADRAO = 4
+
+# Intervalo (s) em que o produtor bloqueado verifica se algum escritor falhou
+_INTERVALO_VERIFICACAO = 0.1
+
+_FIM = object()
+
+
+class PipelineCarga:
+    """
+    Carga em pipeline: a thread que chama executar gera os lotes e os coloca em
+    uma fila limitada, enquanto escritores (threads com conexões próprias do
+    pool) retiram os lotes e os enviam ao banco. Assim a geração em Python
+    continua enquanto o banco grava o lote anterior.
+
+    A fila limitada aplica contrapressão: quando os escritores não acompanham,
+    o produtor fica bloqueado, e no máximo profundidade + escritores + 1 lotes
+    ficam em memória ao mesmo tempo.
+
+    Depois de executar, estatisticas traz o tempo de cada estágio, as vazões
+    de geração e de escrita e qual dos dois foi o gargalo.
+    """
+
+    def __init__(self, escritores=1, profundidade=PROFUNDIDADE_PADRAO):
+        """
+        Args:
+            escritores: Número de threads que enviam lotes ao banco. Com um
+                único escritor os lotes chegam ao banco na ordem em que foram
+                gerados (mesmos ids e mesmas linhas mantidas em conflitos que a
+                carga sem pipeline).
+            profundidade: Número máximo de lotes esperando na fila
+        """
+        if escritores < 1:
+            raise ValueError("O pipeline precisa de pelo menos um escritor")
+        self.escritores = escritores
+        self.profundidade = profundidade
+        self.estatisticas = {}
+
+    def _escrever(self, fila, carregar, resultados, erros, indice):
+        ocioso = ocupado = 0.0
+        linhas = 0
+        while True:
+            inicio = time.perf_counter()
+            lote = fila.get()
+            ocioso += time.perf_counter() - inicio
+            if lote is _FIM:
+                break
+            if erros:
+                # Outro escritor falhou: só esvazia a fila
+                continue
+            inicio = time.perf_counter()
+            try:
+                linhas += carregar(lote)
+            except Exception as e:
+                erros.append(e)
+            ocupado += time.perf_counter() - inicio
+        resultados[indice] = (linhas, ocupado, ocioso)
+
+    def _enfileirar(self, fila, item, erros):
+        # put com tempo limite para não bloquear para sempre se os escritores
+        # pararam por erro
+        while True:
+            try:
+                fila.put(item, timeout=_INTERVALO_VERIFICACAO)
+                return
+            except queue.Full:
+                if erros and item is not _FIM:
+                    return
+
+    def executar(self, lotes, carregar):
+        """
+        Gera e carrega todos os lotes.
+
+        Args:
+            lotes: Iterável que gera os lotes (consumido nesta thread, na ordem)
+            carregar: Função que envia um lote ao banco e retorna as linhas
+                afetadas; é chamada pelos escritores em paralelo
+
+        Returns:
+            Total de linhas afetadas
+        """
+        fila = queue.Queue(maxsize=self.profundidade)
+        resultados = [None] * self.escritores
+        erros = []
+        threads = [
+            threading.Thread(
+                target=self._escrever,
+                args=(fila, carregar, resultados, erros, indice),
+                daemon=True,
+            )
+            for indice in range(self.escritores)
+        ]
+
+        geracao = espera_fila = 0.0
+        linhas_geradas = num_lotes = ocupacao = 0
+        inicio_total = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            iterador = iter(lotes)
+            while not erros:
+                inicio = time.perf_counter()
+                lote = next(iterador, _FIM)
+                geracao += time.perf_counter() - inicio
+                if lote is _FIM:
+                    break
+
+                linhas_geradas += tamanho_lote(lote)
+                num_lotes += 1
+                ocupacao += fila.qsize()
+
+                inicio = time.perf_counter()
+                self._enfileirar(fila, lote, erros)
+                espera_fila += time.perf_counter() - inicio
+        finally:
+            for _ in threads:
+                self._enfileirar(fila, _FIM, erros)
+            for thread in threads:
+                thread.join()
+
+        if erros:
+            raise erros[0]
+
+        tempo_total = time.perf_counter() - inicio_total
+        linhas = sum(resultado[0] for resultado in resultados)
+        escrita = sum(resultado[1] for resultado in resultados)
+        escrita_ociosa = sum(resultado[2] for resultado in resultados)
+
+        # Vazão de escrita somando os escritores: linhas por segundo de
+        # trabalho de cada um, vezes o número de escritores
+        vazao_escrita = (
+            linhas_geradas / escrita * self.escritores if escrita > 0 else 0.0
+        )
+        vazao_geracao = linhas_geradas / geracao if geracao > 0 else 0.0
+        self.estatisticas = {
+            "lotes": num_lotes,
+            "linhas_geradas": linhas_geradas,
+            "linhas_afetadas": linhas,
+            "escritores": self.escritores,
+            "profundidade": self.profundidade,
+            "tempo_total_s": tempo_total,
+            "tempo_geracao_s": geracao,
+            "tempo_espera_fila_s": espera_fila,
+            "tempo_escrita_s": escrita,
+            "tempo_escritores_ociosos_s": escrita_ociosa,
+            "ocupacao_media_fila": ocupacao / num_lotes if num_lotes else 0.0,
+            "linhas_por_segundo": linhas_geradas / tempo_total if tempo_total > 0 else 0.0,
+            "linhas_por_segundo_geracao": vazao_geracao,
+            "linhas_por_segundo_escrita": vazao_escrita,
+            # O estágio mais lento limita a vazão do pipeline; tempo_espera_fila_s
+            # alto confirma escrita lenta e tempo_escritores_ociosos_s alto,
+            # geração lenta
+            "gargalo": "escrita" if vazao_escrita < vazao_geracao else "geracao",
+        }
+        return linhas
@@ -0,0 +1,186 @@
+import pandas as pd
+
+# Razão entre linhas reais e estimadas a partir da qual um nó é considerado
+# mal estimado (em qualquer direção)
+LIMIAR_ERRO_ESTIMATIVA = 10.0
+
+# Tipos de nó que leem uma tabela por completo
+NOS_SEQ_SCAN = ("Seq Scan", "Parallel Seq Scan")
+
+# Contadores de buffers lidos de cada nó (nome no JSON -> nome da coluna)
+BUFFERS = {
+    "Shared Hit Blocks": "shared_hit",
+    "Shared Read Blocks": "shared_read",
+    "Shared Dirtied Blocks": "shared_dirtied",
+    "Shared Written Blocks": "shared_written",
+    "Local Hit Blocks": "local_hit",
+    "Local Read Blocks": "local_read",
+    "Temp Read Blocks": "temp_read",
+    "Temp Written Blocks": "temp_written",
+}
+
+
+class PlanoInesperadoError(Exception):
+    """
+    O planejador escolheu um plano diferente do esperado pelo experimento
+    (ex: o índice esperado não foi usado ou houve Seq Scan).
+    """
+
+
+def _plano_raiz(explain):
+    """
+    Aceita a saída do EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) em qualquer das
+    formas usadas no projeto: a lista retornada pelo PostgreSQL, o dicionário
+    com a chave 'Plan' ou o próprio nó raiz.
+    """
+    if isinstance(explain, list):
+        explain = explain[0]
+    return explain.get("Plan", explain)
+
+
+def _percorrer(no, id_pai, profundidade, contador, registros):
+    id_no = next(contador)
+    loops = no.get("Actual Loops", 1) or 0
+    linhas_reais = no.get("Actual Rows", 0) * loops
+    linhas_estimadas = no.get("Plan Rows", 0) * max(loops, 1)
+
+    registro = {
+        "id": id_no,
+        "id_pai": id_pai,
+        "profundidade": profundidade,
+        "tipo": no.get("Node Type"),
+        "relacao_pai": no.get("Parent Relationship"),
+        "tabela": no.get("Relation Name"),
+        "indice": no.get("Index Name"),
+        "loops": loops,
+        "linhas_reais": linhas_reais,
+        "linhas_estimadas": linhas_estimadas,
+        "erro_estimativa": max(linhas_reais, 1) / max(linhas_estimadas, 1),
+        # Tempos do JSON são médias por loop; multiplicados dão o total do nó
+        "tempo_total_ms": no.get("Actual Total Time", 0.0) * loops,
+        "tempo_inicial_ms": no.get("Actual Startup Time", 0.0),
+        "custo_estimado": no.get("Total Cost"),
+        "filtro": no.get("Filter") or no.get("Index Cond") or no.get("Recheck Cond"),
+        "linhas_removidas_filtro": no.get("Rows Removed by Filter", 0),
+    }
+    for chave, coluna in BUFFERS.items():
+        registro[coluna] = no.get(chave, 0)
+    registros.append(registro)
+
+    filhos = no.get("Plans", [])
+    for filho in filhos:
+        _percorrer(filho, id_no, profundidade + 1, contador, registros)
+
+    return registro
+
+
+def analisar_plano(explain):
+    """
+    Converte a saída do EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) em um DataFrame
+    com um registro por nó do plano.
+
+    Tempos e buffers do PostgreSQL são cumulativos (incluem os filhos); as
+    colunas *_exclusivo descontam os filhos diretos para mostrar o custo
+    próprio de cada nó.
+    """
+    contador = iter(range(1_000_000))
+    registros = []
+    _percorrer(_plano_raiz(explain), None, 0, contador, registros)
+
+    nos = pd.DataFrame(registros)
+    filhos = nos[nos["id_pai"].notna()].astype({"id_pai": int}).groupby("id_pai")
+    colunas = ["tempo_total_ms"] + list(BUFFERS.values())
+    soma_filhos = filhos[colunas].sum().reindex(nos["id"]).fillna(0).to_numpy()
+
+    for indice, coluna in enumerate(colunas):
+        nome = "tempo_exclusivo_ms" if coluna == "tempo_total_ms" else f"{coluna}_exclusivo"
+        nos[nome] = (nos[coluna].to_numpy() - soma_filhos[:, indice]).clip(min=0)
+
+    nos["mal_estimado"] = (nos["erro_estimativa"] >= LIMIAR_ERRO_ESTIMATIVA) | (
+        nos["erro_estimativa"] <= 1 / LIMIAR_ERRO_ESTIMATIVA
+    )
+    return nos
+
+
+def indices_usados(nos):
+    """
+    Retorna o conjunto de índices usados pelo plano.
+    """
+    return set(nos["indice"].dropna())
+
+
+def seq_scans(nos):
+    """
+    Retorna as tabelas lidas por Seq Scan no plano.
+    """
+    return sorted(set(nos.loc[nos["tipo"].isin(NOS_SEQ_SCAN), "tabela"].dropna()))
+
+
+def resumir_plano(explain, indice_esperado=None):
+    """
+    Resume um plano: totais de tempo e buffers, nó mais custoso, nós mal
+    estimados, índices usados e Seq Scans.
+
+    Args:
+        explain: Saída do EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+        indice_esperado: Nome (ou lista de nomes) de índice que o experimento
+            espera que o planejador use
+
+    Returns:
+        Dicionário com o resumo
+    """
+    nos = analisar_plano(explain)
+    raiz = nos.iloc[0]
+    mais_lento = nos.loc[nos["tempo_exclusivo_ms"].idxmax()]
+    usados = indices_usados(nos)
+
+    resumo = {
+        "tempo_total_ms": raiz["tempo_total_ms"],
+        "no_mais_lento": mais_lento["tipo"],
+        "no_mais_lento_tabela": mais_lento["tabela"],
+        "no_mais_lento_ms": mais_lento["tempo_exclusivo_ms"],
+        "nos_mal_estimados": int(nos["mal_estimado"].sum()),
+        "maior_erro_estimativa": float(
+            max(nos["erro_estimativa"].max(), 1 / nos["erro_estimativa"].min())
+        ),
+        "indices_usados": ",".join(sorted(usados)),
+        "seq_scans": ",".join(seq_scans(nos)),
+    }
+    # Os buffers do nó raiz já incluem os de todo o plano
+    for coluna in BUFFERS.values():
+        resumo[coluna] = int(raiz[coluna])
+
+    if isinstance(explain, (list, dict)):
+        topo = explain[0] if isinstance(explain, list) else explain
+        resumo["planejamento_ms"] = topo.get("Planning Time")
+        resumo["execucao_ms"] = topo.get("Execution Time")
+
+    if indice_esperado is not None:
+        esperados = (
+            {indice_esperado} if isinstance(indice_esperado, str) else set(indice_esperado)
+        )
+        resumo["indice_esperado_usado"] = esperados <= usados
+
+    return resumo
+
+
+def verificar_plano(explain, indice_esperado=None, permitir_seq_scan=True):
+    """
+    Lança PlanoInesperadoError se o plano não usar o índice esperado ou, com
+    permitir_seq_scan=False, se ler alguma tabela por Seq Scan.
+
+    Returns:
+        O resumo do plano (ver resumir_plano)
+    """
+    resumo = resumir_plano(explain, indice_esperado)
+
+    if indice_esperado is not None and not resumo["indice_esperado_usado"]:
+        raise PlanoInesperadoError(
+            f"Índice esperado {indice_esperado} não foi usado "
+            f"(índices usados: {resumo['indices_usados'] or 'nenhum'})"
+        )
+    if not permitir_seq_scan and resumo["seq_scans"]:
+        raise PlanoInesperadoError(
+            f"O planejador usou Seq Scan em: {resumo['seq_scans']}"
+        )
+    return resumo
@@ -0,0 +1,195 @@
+import pandas as pd
+from utils.db_connection import execute_query
+from utils.data_generator import COLUNAS_BUSCA_LIVROS
+from utils.gin_benchmark import parametros_carga
+from utils.index_cost import comparar_configuracoes
+
+# Retângulo das consultas de dimensão: livros de até 25 x 35 cm
+LIMITE_DIMENSAO = (25, 35)
+
+_POLIGONO = "polygon '((0,0),({0},0),({0},{1}),(0,{1}),(0,0))'".format(*LIMITE_DIMENSAO)
+_CAIXA = "box '(({},{}),(0,0))'".format(*LIMITE_DIMENSAO)
+
+# Cargas de trabalho com a consulta escrita sobre a expressão (ou a coluna
+# original) e sobre as colunas pré-calculadas de COLUNAS_BUSCA_LIVROS. Cada
+# variante tem a consulta, a coluna pré-calculada que ela lê (ou None) e as
+# configurações de índices que a atendem
+CARGAS_PRECALCULADAS = {
+    # Mesma busca do 03_gist: a expressão é recalculada em cada linha lida
+    "titulo_texto": {
+        "parametro": "palavra",
+        "variantes": {
+            "expressao": {
+                "query": (
+                    "SELECT id, titulo FROM livros WHERE to_tsvector('portuguese', titulo) "
+                    "@@ plainto_tsquery('portuguese', %s)"
+                ),
+                "coluna": None,
+                "configuracoes": {
+                    "gin": [
+                        "CREATE INDEX idx_livros_titulo_expr_gin ON livros "
+                        "USING gin (to_tsvector('portuguese', titulo))"
+                    ],
+                    "gist": [
+                        "CREATE INDEX idx_livros_titulo_expr_gist ON livros "
+                        "USING gist (to_tsvector('portuguese', titulo))"
+                    ],
+                },
+            },
+            "coluna": {
+                "query": (
+                    "SELECT id, titulo FROM livros "
+                    "WHERE titulo_tsv @@ plainto_tsquery('portuguese', %s)"
+                ),
+                "coluna": "titulo_tsv",
+                "configuracoes": {
+                    "gin": ["CREATE INDEX idx_livros_titulo_tsv_gin ON livros USING gin (titulo_tsv)"],
+                    "gist": [
+                        "CREATE INDEX idx_livros_titulo_tsv_gist ON livros USING gist (titulo_tsv)"
+                    ],
+                },
+            },
+        },
+    },
+    # Mesma busca do 04_spgist: livros que cabem no retângulo LIMITE_DIMENSAO
+    "dimensao_contida": {
+        "parametro": None,
+        "params": None,
+        "variantes": {
+            "poligono": {
+                "query": f"SELECT id, titulo FROM livros WHERE dimensao <@ {_POLIGONO}",
+                "coluna": None,
+                "configuracoes": {
+                    "spgist": [
+                        "CREATE INDEX idx_livros_dimensao_spgist ON livros USING spgist (dimensao)"
+                    ],
+                    "gist": [
+                        "CREATE INDEX idx_livros_dimensao_gist ON livros USING gist (dimensao)"
+                    ],
+                },
+            },
+            "expressao": {
+                "query": f"SELECT id, titulo FROM livros WHERE box(dimensao) <@ {_CAIXA}",
+                "coluna": None,
+                "configuracoes": {
+                    "gist": [
+                        "CREATE INDEX idx_livros_dimensao_expr_gist ON livros "
+                        "USING gist (box(dimensao))"
+                    ],
+                },
+            },
+            "caixa": {
+                "query": f"SELECT id, titulo FROM livros WHERE dimensao_caixa <@ {_CAIXA}",
+                "coluna": "dimensao_caixa",
+                "configuracoes": {
+                    "gist": [
+                        "CREATE INDEX idx_livros_dimensao_caixa_gist ON livros "
+                        "USING gist (dimensao_caixa)"
+                    ],
+                    "spgist": [
+                        "CREATE INDEX idx_livros_dimensao_caixa_spgist ON livros "
+                        "USING spgist (dimensao_caixa)"
+                    ],
+                },
+            },
+            # Um retângulo com vértice na origem cabe no limite se o vértice
+            # oposto (largura, altura) estiver dentro dele
+            "ponto": {
+                "query": f"SELECT id, titulo FROM livros WHERE dimensao_ponto <@ {_CAIXA}",
+                "coluna": "dimensao_ponto",
+                "configuracoes": {
+                    "spgist_quad": [
+                        "CREATE INDEX idx_livros_dimensao_ponto_quad ON livros "
+                        "USING spgist (dimensao_ponto)"
+                    ],
+                    "spgist_kd": [
+                        "CREATE INDEX idx_livros_dimensao_ponto_kd ON livros "
+                        "USING spgist (dimensao_ponto kd_point_ops)"
+                    ],
+                    "gist": [
+                        "CREATE INDEX idx_livros_dimensao_ponto_gist ON livros "
+                        "USING gist (dimensao_ponto)"
+                    ],
+                },
+            },
+        },
+    },
+}
+
+
+def verificar_colunas_busca():
+    """
+    Verifica se livros tem as colunas pré-calculadas.
+
+    Raises:
+        ValueError: Se faltar alguma coluna de COLUNAS_BUSCA_LIVROS
+    """
+    existentes = set(
+        execute_query(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = 'livros'"
+        ).column_name
+    )
+    faltando = sorted(set(COLUNAS_BUSCA_LIVROS) - existentes)
+    if faltando:
+        raise ValueError(
+            f"livros não tem as colunas {faltando}: use popular_banco(colunas_busca=True)"
+        )
+
+
+def tamanho_coluna(coluna):
+    """
+    Retorna os bytes ocupados pela coluna em todas as linhas de livros (sem
+    compressão TOAST nem alinhamento), o custo em disco de pré-calculá-la.
+    """
+    return int(
+        execute_query(
+            f"SELECT COALESCE(SUM(pg_column_size({coluna})), 0) AS bytes FROM livros"
+        ).bytes[0]
+    )
+
+
+def executar_precalculadas(cargas=None, aquecimento=2, repeticoes=10):
+    """
+    Executa cada carga de trabalho nas variantes sobre a expressão e sobre as
+    colunas pré-calculadas, comparando o índice de expressão com o índice da
+    coluna pelo tamanho, tempo de construção e custo de leitura.
+
+    Args:
+        cargas: Nomes das cargas de CARGAS_PRECALCULADAS (padrão: todas)
+        aquecimento: Execuções descartadas antes de cada medição
+        repeticoes: Repetições de cada medição
+
+    Returns:
+        DataFrame com uma linha por carga, variante e configuração (ver
+        comparar_configuracoes), com o tamanho da coluna pré-calculada lida e
+        o ganho de latência sobre a variante sem índices da primeira variante
+    """
+    verificar_colunas_busca()
+    resultados = []
+    for nome in cargas or CARGAS_PRECALCULADAS:
+        carga = CARGAS_PRECALCULADAS[nome]
+        params = parametros_carga(carga)
+        referencia = None
+        for variante, opcoes in carga["variantes"].items():
+            print(f"\n[pré-calculadas] Carga {nome}, variante {variante}")
+            resultado = comparar_configuracoes(
+                opcoes["query"],
+                opcoes["configuracoes"],
+                params,
+                aquecimento=aquecimento,
+                repeticoes=repeticoes,
+            )
+            if referencia is None:
+                referencia = resultado["latencia_servidor_ms"].iloc[0]
+            resultado["ganho_sobre_expressao"] = (
+                referencia / resultado["latencia_servidor_ms"]
+            )
+            resultado.insert(0, "carga", nome)
+            resultado.insert(1, "variante", variante)
+            resultado.insert(
+                2,
+                "tamanho_coluna_bytes",
+                tamanho_coluna(opcoes["coluna"]) if opcoes["coluna"] else 0,
+            )
+            resultados.append(resultado)
+    return pd.concat(resultados, ignore_index=True)
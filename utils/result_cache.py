@@ -0,0 +1,344 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+# Tamanho padrão do cache de resultados (número de consultas guardadas)
+MAX_ENTRADAS_PADRAO = 256
+
+# Comandos que só leem (não invalidam nenhuma entrada)
+_LEITURA_RE = re.compile(r"^\s*(SELECT|SHOW|EXPLAIN|VALUES|TABLE)\b", re.IGNORECASE)
+
+# Comandos de escrita dentro de CTEs (WITH x AS (DELETE ... RETURNING ...))
+_ESCRITA_CTE_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+_NOME = r'((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)'
+
+# Textos, identificadores entre aspas e comentários, removidos antes de
+# procurar as tabelas lidas
+_LITERAIS_RE = re.compile(
+    r"'(?:[^']|'')*'|\$(\w*)\$.*?\$\1\$|--[^\n]*|/\*.*?\*/", re.DOTALL
+)
+
+# Elementos da consulta: nomes (talvez qualificados), parênteses e vírgulas
+_ELEMENTO_RE = re.compile(r'(?:"[^"]+"|\w+)(?:\s*\.\s*(?:"[^"]+"|\w+))*|[(),]')
+
+# Nomes das CTEs (WITH nome AS (...), nome AS (...)), que não são tabelas
+_CTE_RE = re.compile(
+    r"(?:\bWITH\s+(?:RECURSIVE\s+)?|,\s*)(\w+|\"[^\"]+\")\s*(?:\([^()]*\)\s*)?"
+    r"AS\s+(?:NOT\s+)?(?:MATERIALIZED\s+)?\(",
+    re.IGNORECASE,
+)
+
+# Palavras que encerram a lista do FROM
+_FIM_FROM = {
+    "where", "group", "having", "window", "order", "limit", "offset", "fetch",
+    "for", "union", "intersect", "except", "returning",
+}
+
+# Palavras entre o FROM (ou JOIN, ou a vírgula) e o nome da tabela
+_PREFIXOS_FROM = {"only", "lateral"}
+
+# Funções de conjunto que não leem tabelas e podem aparecer no FROM
+_FUNCOES_FROM = {
+    "unnest", "generate_series", "regexp_split_to_table", "string_to_table",
+    "jsonb_array_elements", "jsonb_array_elements_text", "jsonb_each",
+    "jsonb_each_text", "jsonb_object_keys", "json_array_elements",
+    "json_array_elements_text", "json_each", "json_each_text",
+    "json_object_keys", "jsonb_to_recordset", "json_to_recordset",
+}
+
+# Funções e valores que mudam a cada execução: o resultado não pode ser
+# reaproveitado
+_VOLATIL_RE = re.compile(
+    r"\b(?:CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|LOCALTIME|LOCALTIMESTAMP)\b|"
+    r"\b(?:now|random|random_normal|setseed|clock_timestamp|statement_timestamp|"
+    r"transaction_timestamp|timeofday|age|gen_random_uuid|uuid_generate_\w+|nextval|"
+    r"currval|lastval|setval|txid_current|pg_\w+)\s*\(",
+    re.IGNORECASE,
+)
+
+# Tabelas escritas pelos comandos de escrita e DDL mais comuns
+_ESCRITAS_RE = re.compile(
+    rf"\b(?:INSERT\s+INTO|UPDATE(?:\s+ONLY)?|DELETE\s+FROM(?:\s+ONLY)?|MERGE\s+INTO|"
+    rf"COPY|ALTER\s+TABLE(?:\s+IF\s+EXISTS)?(?:\s+ONLY)?|"
+    rf"DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+{_NOME}",
+    re.IGNORECASE,
+)
+_TRUNCATE_RE = re.compile(r"\bTRUNCATE\s+(?:TABLE\s+)?(?:ONLY\s+)?([\w\s.,\"]+)", re.IGNORECASE)
+
+# Comandos que não mudam o resultado de nenhuma consulta
+_SEM_EFEITO_RE = re.compile(
+    r"^\s*(ANALYZE|CREATE\s+(?:UNIQUE\s+)?INDEX|DROP\s+INDEX|REINDEX|SET|RESET|"
+    r"PREPARE|DEALLOCATE|LISTEN|NOTIFY|CHECKPOINT)\b",
+    re.IGNORECASE,
+)
+
+
+def normalizar_sql(query):
+    """
+    Normaliza uma consulta para a chave do cache: espaços repetidos, quebras
+    de linha e o ponto e vírgula final não mudam a chave.
+    """
+    return " ".join(query.split()).rstrip(";").strip()
+
+
+def _nome_tabela(nome):
+    # public.livros, "livros" e LIVROS são a mesma tabela
+    return nome.split(".")[-1].strip('"').lower()
+
+
+def tabelas_lidas(query):
+    """
+    Retorna as tabelas lidas por uma consulta: os itens das listas do FROM
+    (inclusive os separados por vírgula e os de subconsultas) e dos JOIN,
+    sem as CTEs.
+
+    Returns:
+        frozenset com as tabelas, ou None se a consulta não pode ser guardada
+        no cache: alguma fonte do FROM não foi identificada (ex: função
+        definida pelo usuário, junção entre parênteses) ou a consulta usa
+        funções cujo resultado muda a cada execução (CURRENT_DATE, now(),
+        random()...)
+    """
+    texto = _LITERAIS_RE.sub(" '' ", query)
+    if _VOLATIL_RE.search(texto):
+        return None
+    ctes = {_nome_tabela(nome) for nome in _CTE_RE.findall(texto)}
+    elementos = _ELEMENTO_RE.findall(texto)
+
+    tabelas = set()
+    # Para cada nível de parênteses: se já teve SELECT e se está na lista do FROM
+    niveis = [{"select": False, "from": False}]
+    item = False
+    anterior = None
+    for posicao, elemento in enumerate(elementos):
+        palavra = elemento.lower()
+        nivel = niveis[-1]
+        if item:
+            # Início de um item do FROM
+            if palavra in _PREFIXOS_FROM:
+                anterior = palavra
+                continue
+            item = False
+            seguinte = elementos[posicao + 1] if posicao + 1 < len(elementos) else None
+            if elemento == "(":
+                if (seguinte or "").lower() not in ("select", "with", "values", "table"):
+                    # Junção entre parênteses ou ROWS FROM: não identificada
+                    return None
+            elif seguinte == "(":
+                if palavra not in _FUNCOES_FROM:
+                    return None
+            elif elemento in (")", ",") or re.match(r"^\d", elemento):
+                return None
+            else:
+                nome = _nome_tabela(re.sub(r"\s+", "", elemento))
+                if nome not in ctes:
+                    tabelas.add(nome)
+        if elemento == "(":
+            niveis.append({"select": False, "from": False})
+        elif elemento == ")":
+            if len(niveis) > 1:
+                niveis.pop()
+        elif palavra == "select":
+            nivel["select"] = True
+            nivel["from"] = False
+        elif palavra == "from" and nivel["select"] and anterior != "distinct":
+            nivel["from"] = True
+            item = True
+        elif palavra == "join" and nivel["from"]:
+            item = True
+        elif elemento == "," and nivel["from"]:
+            item = True
+        elif palavra in _FIM_FROM:
+            nivel["from"] = False
+        elif palavra == "table" and posicao == 0:
+            item = True
+        anterior = palavra
+    if item:
+        return None
+    return frozenset(tabelas)
+
+
+def tabelas_escritas(query):
+    """
+    Retorna as tabelas que um comando pode alterar.
+
+    Returns:
+        frozenset vazio para leituras e comandos sem efeito nos dados, ou None
+        se o comando escreve mas as tabelas não puderam ser identificadas (ex:
+        DO, CALL, funções), caso em que todo o cache deve ser invalidado
+    """
+    if _LEITURA_RE.match(query) or _SEM_EFEITO_RE.match(query):
+        # SELECT ... INTO e funções que escrevem não são reconhecidos
+        return frozenset()
+    if query.lstrip()[:4].upper() == "WITH" and not _ESCRITA_CTE_RE.search(query):
+        return frozenset()
+
+    tabelas = {_nome_tabela(nome) for nome in _ESCRITAS_RE.findall(query)}
+    for lista in _TRUNCATE_RE.findall(query):
+        if re.search(r"\bCASCADE\b", lista, re.IGNORECASE):
+            # Também esvazia as tabelas que referenciam as listadas
+            return None
+        for nome in lista.split(","):
+            partes = nome.split()
+            if partes and partes[0].upper() not in ("RESTART", "CONTINUE", "RESTRICT"):
+                tabelas.add(_nome_tabela(partes[0]))
+    return frozenset(tabelas) or None
+
+
+def _congelar(valor):
+    """
+    Converte parâmetros em valores hasheáveis para compor a chave do cache.
+    """
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, _congelar(item)) for chave, item in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return (type(valor).__name__,) + tuple(_congelar(item) for item in valor)
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        return repr(valor)
+
+
+def _tamanho(resultado):
+    try:
+        return int(resultado.memory_usage(index=True, deep=True).sum())
+    except AttributeError:
+        return sys.getsizeof(resultado)
+
+
+class CacheResultados:
+    """
+    Cache LRU de resultados de consultas, com tamanho limitado.
+
+    Cada entrada é marcada com as tabelas que a consulta lê; uma escrita em
+    uma tabela remove as entradas que a leem. Cada tabela tem uma versão,
+    incrementada a cada escrita: um resultado lido enquanto outra thread
+    escrevia na tabela não é guardado, para não ressuscitar dados antigos.
+
+    Só escritas feitas por este processo são vistas: cargas feitas por outros
+    processos ou conexões precisam chamar invalidar.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS_PADRAO, max_bytes=None):
+        """
+        Args:
+            max_entradas: Número máximo de resultados guardados
+            max_bytes: Memória máxima ocupada pelos resultados (opcional)
+        """
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._versoes = {}
+        self._versao_global = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.invalidacoes = 0
+        self.descartes = 0
+
+    def chave(self, query, params=None, *opcoes):
+        """
+        Monta a chave de uma consulta: SQL normalizado, parâmetros e opções
+        que mudam o formato do resultado.
+        """
+        return (normalizar_sql(query), _congelar(params)) + opcoes
+
+    def versao(self, tabelas):
+        """
+        Retorna a versão atual das tabelas, usada em guardar para detectar
+        escritas concorrentes.
+        """
+        with self._lock:
+            return self._versao_global, tuple(self._versoes.get(t, 0) for t in sorted(tabelas))
+
+    def obter(self, chave):
+        """
+        Retorna o resultado guardado (ou None), contando acerto ou falta.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.faltas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[0]
+
+    def guardar(self, chave, tabelas, resultado, versao):
+        """
+        Guarda um resultado, descartando os menos usados se o limite for
+        excedido.
+
+        Args:
+            tabelas: Tabelas lidas pela consulta
+            versao: Retorno de versao antes de executar a consulta
+        """
+        tamanho = _tamanho(resultado)
+        if self.max_bytes is not None and tamanho > self.max_bytes:
+            return
+        with self._lock:
+            atual = (
+                self._versao_global,
+                tuple(self._versoes.get(t, 0) for t in sorted(tabelas)),
+            )
+            if atual != versao:
+                return
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (resultado, tabelas, tamanho)
+            self._bytes += tamanho
+            while len(self._entradas) > self.max_entradas or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remover(next(iter(self._entradas)))
+                self.descartes += 1
+
+    def _remover(self, chave):
+        _, _, tamanho = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def invalidar(self, tabelas=None):
+        """
+        Remove as entradas que leem alguma das tabelas (todas, se None).
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            if tabelas is None:
+                self._versao_global += 1
+                removidas = list(self._entradas)
+            else:
+                tabelas = {_nome_tabela(tabela) for tabela in tabelas}
+                for tabela in tabelas:
+                    self._versoes[tabela] = self._versoes.get(tabela, 0) + 1
+                removidas = [
+                    chave
+                    for chave, (_, lidas, _) in self._entradas.items()
+                    if lidas & tabelas
+                ]
+            for chave in removidas:
+                self._remover(chave)
+            self.invalidacoes += len(removidas)
+            return len(removidas)
+
+    def estatisticas(self):
+        """
+        Retorna acertos, faltas, taxa de acerto, entradas, memória ocupada,
+        entradas invalidadas por escritas e descartadas pelo limite de tamanho.
+        """
+        with self._lock:
+            consultas = self.acertos + self.faltas
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "invalidacoes": self.invalidacoes,
+                "descartes": self.descartes,
+            }
@@ -0,0 +1,294 @@
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+import psycopg2
+from utils.db_connection import DatabaseConnection, execute_query, invalidate_result_cache
+
+# Diretório padrão dos snapshots (na raiz do projeto)
+DIRETORIO_SNAPSHOTS = os.path.join(os.path.dirname(__file__), "..", ".cache", "snapshots")
+
+# Tabelas do esquema, na ordem em que as chaves estrangeiras permitem carregá-las
+TABELAS = ("usuarios", "livros", "emprestimos")
+
+# 'copy': arquivos COPY binários em disco; 'template': clone com CREATE DATABASE ... TEMPLATE
+METODOS_SNAPSHOT = ("copy", "template")
+
+# Bancos que o método 'template' nunca remove
+BANCOS_PROTEGIDOS = ("postgres", "template0", "template1")
+
+# Tabelas e visões do banco fora das tabelas da biblioteca (e das suas partições)
+SQL_OUTRAS_TABELAS = """
+SELECT c.oid::regclass::text AS tabela
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+  AND n.nspname <> 'information_schema'
+  AND n.nspname NOT LIKE 'pg\\_%%'
+  AND COALESCE(pg_partition_root(c.oid), c.oid)::regclass::text <> ALL(%s)
+ORDER BY 1
+"""
+
+
+def chave_snapshot(seed, locales, contagens, variante=""):
+    """
+    Retorna a chave de um snapshot.
+
+    Args:
+        seed: Semente do gerador
+        locales: Localidades do Faker
+        contagens: Dicionário com num_usuarios, num_livros e num_emprestimos
+            acumulados até o estado salvo
+        variante: Texto extra que distingue dados gerados de formas diferentes
+            (ex: 'vetorizado')
+    """
+    tamanhos = "-".join(
+        str(contagens[campo]) for campo in ("num_usuarios", "num_livros", "num_emprestimos")
+    )
+    chave = f"{'-'.join(locales)}_{seed}_{tamanhos}"
+    return f"{chave}_{variante}" if variante else chave
+
+
+def _pasta(chave, diretorio=None):
+    return os.path.join(diretorio or DIRETORIO_SNAPSHOTS, chave)
+
+
+def _nome_banco(chave):
+    # Nomes de banco têm no máximo 63 caracteres
+    return f"snapshot_{hashlib.sha1(chave.encode()).hexdigest()[:16]}"
+
+
+def _conexao_manutencao():
+    """
+    Abre uma conexão fora do pool em um banco diferente do configurado, necessária
+    para criar e remover bancos.
+    """
+    params = DatabaseConnection._get_db_params()
+    banco = params.get("database") or params.get("dbname")
+    params.pop("dbname", None)
+    params["database"] = "template1" if banco == "postgres" else "postgres"
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    return conn, banco
+
+
+def _verificar_banco_dedicado():
+    """
+    Garante que o banco configurado pode ser removido e recriado pelo método
+    'template': ele não pode ser um banco do sistema nem ter outras tabelas
+    além das da biblioteca.
+    """
+    params = DatabaseConnection._get_db_params()
+    banco = params.get("database") or params.get("dbname")
+    if banco in BANCOS_PROTEGIDOS:
+        raise ValueError(
+            f"O método 'template' remove o banco configurado e não pode ser usado "
+            f"com '{banco}'. Use um banco dedicado ao experimento ou o método 'copy'."
+        )
+    outras = execute_query(SQL_OUTRAS_TABELAS, (list(TABELAS),))
+    if len(outras):
+        raise ValueError(
+            f"O método 'template' remove o banco '{banco}', que tem outras tabelas "
+            f"além das da biblioteca: {', '.join(outras['tabela'])}. "
+            f"Use um banco dedicado ao experimento ou o método 'copy'."
+        )
+
+
+def _contar_linhas():
+    return {
+        tabela: int(execute_query(f"SELECT COUNT(*) FROM {tabela}").iloc[0, 0])
+        for tabela in TABELAS
+    }
+
+
+def _colunas(cursor, tabela):
+    """
+    Retorna as colunas da tabela que o COPY grava, sem as colunas geradas
+    (recalculadas pelo servidor ao restaurar).
+    """
+    cursor.execute(
+        """
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+          AND attgenerated = ''
+        """,
+        (tabela,),
+    )
+    return cursor.fetchone()[0]
+
+
+def existe_snapshot(chave, diretorio=None):
+    """
+    Indica se há um snapshot salvo com a chave informada.
+    """
+    return os.path.exists(os.path.join(_pasta(chave, diretorio), "metadados.json"))
+
+
+def listar_snapshots(diretorio=None):
+    """
+    Retorna os metadados de todos os snapshots salvos.
+    """
+    diretorio = diretorio or DIRETORIO_SNAPSHOTS
+    if not os.path.isdir(diretorio):
+        return []
+    snapshots = []
+    for chave in sorted(os.listdir(diretorio)):
+        arquivo = os.path.join(diretorio, chave, "metadados.json")
+        if os.path.exists(arquivo):
+            with open(arquivo) as f:
+                snapshots.append(json.load(f))
+    return snapshots
+
+
+def salvar_snapshot(chave, metodo="copy", diretorio=None):
+    """
+    Salva o estado atual das tabelas da biblioteca.
+
+    No método 'copy' cada tabela é exportada com COPY binário para um arquivo.
+    No método 'template' o banco inteiro é clonado com CREATE DATABASE ... TEMPLATE,
+    o que exige que nenhuma outra sessão esteja conectada ao banco configurado
+    (o pool do projeto é fechado antes). Como a restauração desse método
+    recria o banco configurado, ele só é aceito em um banco dedicado ao
+    experimento (ver restaurar_snapshot).
+
+    Returns:
+        Metadados do snapshot
+    """
+    if metodo not in METODOS_SNAPSHOT:
+        raise ValueError(f"Método de snapshot inválido: {metodo}. Use um de {METODOS_SNAPSHOT}")
+
+    if metodo == "template":
+        _verificar_banco_dedicado()
+
+    pasta = _pasta(chave, diretorio)
+    temporaria = f"{pasta}.{os.getpid()}.tmp"
+    os.makedirs(temporaria, exist_ok=True)
+
+    metadados = {
+        "chave": chave,
+        "metodo": metodo,
+        "linhas": _contar_linhas(),
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    try:
+        if metodo == "copy":
+            with DatabaseConnection.connection() as conn:
+                cursor = conn.cursor()
+                for tabela in TABELAS:
+                    with open(os.path.join(temporaria, f"{tabela}.bin"), "wb") as arquivo:
+                        # COPY tabela TO não aceita tabelas particionadas
+                        cursor.copy_expert(
+                            f"COPY (SELECT {_colunas(cursor, tabela)} FROM {tabela}) "
+                            f"TO STDOUT (FORMAT binary)",
+                            arquivo,
+                        )
+                conn.rollback()
+        else:
+            banco = _nome_banco(chave)
+            DatabaseConnection.close_all_connections()
+            conn, origem = _conexao_manutencao()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"DROP DATABASE IF EXISTS {banco}")
+                cursor.execute(f"CREATE DATABASE {banco} TEMPLATE {origem}")
+            finally:
+                conn.close()
+            metadados["banco"] = banco
+
+        with open(os.path.join(temporaria, "metadados.json"), "w") as f:
+            json.dump(metadados, f, indent=2)
+
+        # Substitui o snapshot anterior apenas quando o novo está completo
+        if os.path.exists(pasta):
+            shutil.rmtree(pasta)
+        os.replace(temporaria, pasta)
+    finally:
+        if os.path.exists(temporaria):
+            shutil.rmtree(temporaria)
+
+    print(f"Snapshot {chave} salvo ({metodo}): {metadados['linhas']}")
+    return metadados
+
+
+def restaurar_snapshot(chave, diretorio=None, analisar=True):
+    """
+    Restaura as tabelas da biblioteca a partir de um snapshot.
+
+    No método 'copy' as tabelas são esvaziadas e recarregadas com COPY binário
+    em uma única transação, e as sequências são ajustadas ao maior id.
+
+    O método 'template' é destrutivo: o banco configurado inteiro é removido
+    com DROP DATABASE ... WITH (FORCE), o que encerra as outras sessões
+    conectadas a ele, e recriado a partir do clone (as conexões do pool são
+    reabertas sob demanda). Por isso ele se recusa a rodar em bancos do
+    sistema (como 'postgres') ou em bancos com outras tabelas além das da
+    biblioteca.
+
+    Returns:
+        Metadados do snapshot
+
+    Raises:
+        ValueError: Se o método é 'template' e o banco configurado não é
+            dedicado ao experimento
+    """
+    pasta = _pasta(chave, diretorio)
+    if not existe_snapshot(chave, diretorio):
+        raise FileNotFoundError(f"Snapshot não encontrado: {chave}")
+    with open(os.path.join(pasta, "metadados.json")) as f:
+        metadados = json.load(f)
+
+    if metadados["metodo"] == "copy":
+        with DatabaseConnection.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"TRUNCATE TABLE {', '.join(reversed(TABELAS))} RESTART IDENTITY CASCADE")
+            for tabela in TABELAS:
+                with open(os.path.join(pasta, f"{tabela}.bin"), "rb") as arquivo:
+                    cursor.copy_expert(
+                        f"COPY {tabela} ({_colunas(cursor, tabela)}) FROM STDIN (FORMAT binary)",
+                        arquivo,
+                    )
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+                    f"COALESCE(MAX(id), 0) + 1, false) FROM {tabela}"
+                )
+            conn.commit()
+    else:
+        _verificar_banco_dedicado()
+        DatabaseConnection.close_all_connections()
+        conn, destino = _conexao_manutencao()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP DATABASE IF EXISTS {destino} WITH (FORCE)")
+            cursor.execute(f"CREATE DATABASE {destino} TEMPLATE {metadados['banco']}")
+        finally:
+            conn.close()
+    # As tabelas foram recarregadas fora de execute_query
+    invalidate_result_cache()
+
+    if analisar:
+        execute_query("ANALYZE")
+
+    print(f"Snapshot {chave} restaurado: {metadados['linhas']}")
+    return metadados
+
+
+def remover_snapshot(chave, diretorio=None):
+    """
+    Remove um snapshot (arquivos e, no método 'template', o banco clonado).
+    """
+    pasta = _pasta(chave, diretorio)
+    if not existe_snapshot(chave, diretorio):
+        return
+    with open(os.path.join(pasta, "metadados.json")) as f:
+        metadados = json.load(f)
+
+    if metadados["metodo"] == "template":
+        conn, _ = _conexao_manutencao()
+        try:
+            conn.cursor().execute(f"DROP DATABASE IF EXISTS {metadados['banco']}")
+        finally:
+            conn.close()
+    shutil.rmtree(pasta)
@@ -0,0 +1,193 @@
+import numpy as np
+
+# Tamanho do espaço de chaves de cada tipo (número de valores distintos)
+# CPF: 9 dígitos base, sem os 10 com todos os dígitos iguais (inválidos)
+ESPACO_CPF = 10**9 - 10
+# ISBN-13: prefixos 978 e 979 seguidos de 9 dígitos
+ESPACO_ISBN = 2 * 10**9
+# E-mail: código de 6 caracteres base 36 acrescentado ao nome de usuário
+ESPACO_EMAIL = 36**6
+
+# Valores entre dois CPFs de dígitos repetidos (111.111.111, 222.222.222...)
+_BLOCO_CPF = 111111110
+
+_ALFABETO_EMAIL = np.frombuffer(b"0123456789abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)
+
+# Rodadas da rede de Feistel; 4 rodadas bastam para embaralhar a sequência
+# (não é criptografia)
+RODADAS = 4
+
+_MASCARA_64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+class PermutacaoFeistel:
+    """
+    Permutação pseudoaleatória de [0, tamanho), determinada pela semente.
+
+    Usa uma rede de Feistel balanceada sobre o menor domínio 2^(2b) que contém
+    o espaço; valores que caem fora do espaço são cifrados de novo (cycle
+    walking) até voltar a ele. Como a rede é inversível, valores distintos
+    sempre levam a resultados distintos.
+    """
+
+    def __init__(self, tamanho, seed):
+        """
+        Args:
+            tamanho: Tamanho do espaço permutado
+            seed: Semente (inteiro ou sequência de inteiros) das chaves das rodadas
+        """
+        self.tamanho = int(tamanho)
+        self.bits = max(1, (int(tamanho - 1).bit_length() + 1) // 2)
+        self._mascara = np.uint64((1 << self.bits) - 1)
+        self._chaves = np.random.default_rng(seed).integers(
+            0, 2**63, size=RODADAS, dtype=np.uint64
+        )
+
+    def _rodada(self, direita, chave):
+        # Mistura do splitmix64, truncada para metade do domínio
+        with np.errstate(over="ignore"):
+            x = (direita + chave) & _MASCARA_64
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            x = x ^ (x >> np.uint64(31))
+        return x & self._mascara
+
+    def _cifrar(self, valores):
+        esquerda = valores >> np.uint64(self.bits)
+        direita = valores & self._mascara
+        for chave in self._chaves:
+            esquerda, direita = direita, esquerda ^ self._rodada(direita, chave)
+        return (esquerda << np.uint64(self.bits)) | direita
+
+    def aplicar(self, valores):
+        """
+        Aplica a permutação a um array de inteiros em [0, tamanho).
+
+        Raises:
+            ValueError: Se algum valor estiver fora do espaço
+        """
+        valores = np.asarray(valores, dtype=np.int64)
+        if len(valores) and (valores.min() < 0 or valores.max() >= self.tamanho):
+            raise ValueError(
+                f"Números de sequência fora do espaço de chaves (0 a {self.tamanho - 1})"
+            )
+        resultado = self._cifrar(valores.astype(np.uint64))
+        fora = resultado >= np.uint64(self.tamanho)
+        while fora.any():
+            resultado[fora] = self._cifrar(resultado[fora])
+            fora = resultado >= np.uint64(self.tamanho)
+        return resultado.astype(np.int64)
+
+
+def _digitos(valores, quantidade):
+    """
+    Separa cada inteiro em `quantidade` dígitos decimais (matriz n x quantidade).
+    """
+    potencias = 10 ** np.arange(quantidade - 1, -1, -1, dtype=np.int64)
+    return (np.asarray(valores, dtype=np.int64)[:, None] // potencias) % 10
+
+
+def _formatar(caracteres, mascara):
+    """
+    Monta textos de tamanho fixo a partir de uma matriz de caracteres (códigos
+    ASCII, um texto por linha), que preenchem as posições '#' da máscara; os
+    demais caracteres da máscara são copiados. Bem mais rápido que formatar
+    linha a linha com f-strings.
+    """
+    posicoes = [i for i, c in enumerate(mascara) if c == "#"]
+    matriz = np.frombuffer(mascara.encode("ascii"), dtype=np.uint8)
+    matriz = np.tile(matriz, (len(caracteres), 1))
+    matriz[:, posicoes] = caracteres
+    return matriz.view(f"S{len(mascara)}").ravel().astype(str).tolist()
+
+
+def digitos_cpf(base):
+    """
+    Calcula os dois dígitos verificadores de CPFs com os 9 dígitos base
+    informados (módulo 11).
+
+    Returns:
+        Array com os dois dígitos de cada CPF como um número de 0 a 99
+    """
+    digitos = _digitos(base, 9)
+    primeiro = (digitos * np.arange(10, 1, -1)).sum(axis=1) * 10 % 11 % 10
+    digitos = np.column_stack([digitos, primeiro])
+    segundo = (digitos * np.arange(11, 1, -1)).sum(axis=1) * 10 % 11 % 10
+    return primeiro * 10 + segundo
+
+
+def digito_isbn13(primeiros):
+    """
+    Calcula o dígito verificador de ISBN-13 com os 12 primeiros dígitos
+    informados (pesos alternados 1 e 3, módulo 10).
+    """
+    digitos = _digitos(primeiros, 12)
+    soma = (digitos * np.tile([1, 3], 6)).sum(axis=1)
+    return (10 - soma % 10) % 10
+
+
+class GeradorChaves:
+    """
+    Gera CPFs, ISBN-13 e e-mails únicos a partir de números de sequência.
+
+    Cada número é levado a um valor do espaço de chaves por uma permutação
+    determinada pela semente, então números distintos sempre geram chaves
+    distintas e a ordem das chaves parece aleatória. Os números de sequência
+    vêm das posições das linhas na carga (ids, no modo paralelo), o que torna
+    as chaves independentes do shard ou do lote em que cada linha é gerada.
+
+    Chaves geradas com sementes diferentes podem coincidir: a unicidade vale
+    entre as linhas geradas com a mesma semente.
+    """
+
+    def __init__(self, seed=42):
+        """
+        Args:
+            seed: Semente das permutações (a mesma do gerador de dados)
+        """
+        self.seed = seed
+        self._cpf = PermutacaoFeistel(ESPACO_CPF, [seed, 1])
+        self._isbn = PermutacaoFeistel(ESPACO_ISBN, [seed, 2])
+        self._email = PermutacaoFeistel(ESPACO_EMAIL, [seed, 3])
+
+    def cpfs(self, numeros):
+        """
+        Gera CPFs válidos (com os dígitos verificadores corretos) e formatados.
+
+        Args:
+            numeros: Números de sequência (inteiros distintos a partir de 0)
+        """
+        indices = self._cpf.aplicar(numeros)
+        # Pula os 10 valores de dígitos repetidos, que não são CPFs válidos
+        base = indices + 1 + indices // _BLOCO_CPF
+        digitos = _digitos(base * 100 + digitos_cpf(base), 11)
+        return _formatar(digitos.astype(np.uint8) + ord("0"), "###.###.###-##")
+
+    def isbns(self, numeros):
+        """
+        Gera ISBN-13 com prefixo 978 ou 979 e o dígito verificador correto,
+        no formato 978-G-TTTTTT-EE-V.
+        """
+        indices = self._isbn.aplicar(numeros)
+        primeiros = (978 + indices // 10**9) * 10**9 + indices % 10**9
+        digitos = _digitos(primeiros * 10 + digito_isbn13(primeiros), 13)
+        return _formatar(digitos.astype(np.uint8) + ord("0"), "###-#-######-##-#")
+
+    def emails(self, numeros, bases):
+        """
+        Torna e-mails únicos acrescentando ao nome de usuário um código de 6
+        caracteres derivado do número de sequência (ex: ana.souza.k3x9q2@...).
+
+        Args:
+            numeros: Números de sequência
+            bases: E-mails de onde vêm o nome de usuário e o domínio (do
+                Faker ou do vocabulário), que podem se repetir
+        """
+        codigos = self._email.aplicar(numeros)
+        potencias = 36 ** np.arange(5, -1, -1, dtype=np.int64)
+        sufixos = _formatar(_ALFABETO_EMAIL[(codigos[:, None] // potencias) % 36], "######")
+        unicos = []
+        for email, sufixo in zip(bases, sufixos):
+            local, dominio = email.split("@", 1)
+            unicos.append(f"{local}.{sufixo}@{dominio}")
+        return unicos
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+from faker import Faker
+
+# Diretório padrão do cache de vocabulário (na raiz do projeto)
+DIRETORIO_CACHE = os.path.join(os.path.dirname(__file__), "..", ".cache", "vocabulario")
+
+# Chamadas do Faker que alimentam cada pool
+GERADORES_POOL = {
+    "nomes": lambda fake: fake.name(),
+    "emails": lambda fake: fake.email(),
+    "empresas": lambda fake: fake.company(),
+    "titulos": lambda fake: fake.catch_phrase(),
+    "frases": lambda fake: fake.paragraph(nb_sentences=1),
+}
+
+# Tamanho padrão de cada pool. Os pools de títulos e empresas são menores
+# porque o Faker já gera poucas combinações distintas desses textos.
+TAMANHOS_POOL = {
+    "nomes": 50000,
+    "emails": 50000,
+    "empresas": 5000,
+    "titulos": 20000,
+    "frases": 50000,
+}
+
+# Vocabulários já carregados neste processo, por chave de cache
+_VOCABULARIOS = {}
+
+
+class VocabularioFaker:
+    """
+    Pools de textos do Faker gerados uma única vez e guardados em disco.
+
+    Cada pool é um array NumPy de strings salvo em um arquivo .npy, identificado
+    pela localidade, semente e tamanho. Execuções seguintes carregam os arquivos
+    com memory-map e apenas sorteiam índices, o que torna a geração de texto
+    praticamente gratuita e mantém a distribuição dos textos do Faker.
+    """
+
+    def __init__(self, pools, seed=None, tamanhos=None):
+        """
+        Args:
+            pools: Dicionário nome do pool -> array de strings
+            seed: Semente usada para gerar os pools
+            tamanhos: Tamanho de cada pool
+        """
+        self.pools = pools
+        self.seed = seed
+        self.tamanhos = tamanhos
+
+    @staticmethod
+    def chave(locales, seed, tamanhos=None):
+        """
+        Retorna a chave de cache de um vocabulário.
+        """
+        tamanhos = tamanhos or TAMANHOS_POOL
+        sufixo = "-".join(str(tamanhos[nome]) for nome in sorted(tamanhos))
+        return f"{'-'.join(locales)}_{seed}_{sufixo}"
+
+    @classmethod
+    def construir(cls, locales=["pt_BR"], seed=42, tamanhos=None):
+        """
+        Gera os pools com um Faker semeado, sem usar o cache.
+        """
+        tamanhos = tamanhos or TAMANHOS_POOL
+        fake = Faker(locales)
+        fake.seed_instance(seed)
+
+        pools = {}
+        for nome in sorted(tamanhos):
+            gerar = GERADORES_POOL[nome]
+            pools[nome] = np.array([gerar(fake) for _ in range(tamanhos[nome])])
+        return cls(pools, seed, tamanhos)
+
+    @classmethod
+    def carregar(cls, locales=["pt_BR"], seed=42, tamanhos=None, diretorio=None):
+        """
+        Carrega o vocabulário do cache em disco, gerando e salvando se necessário.
+
+        Args:
+            locales: Localidades do Faker
+            seed: Semente usada para gerar os pools
+            tamanhos: Tamanho de cada pool (padrão: TAMANHOS_POOL)
+            diretorio: Diretório do cache (padrão: DIRETORIO_CACHE)
+        """
+        tamanhos = tamanhos or TAMANHOS_POOL
+        chave = cls.chave(locales, seed, tamanhos)
+        if chave in _VOCABULARIOS:
+            return _VOCABULARIOS[chave]
+
+        pasta = os.path.join(diretorio or DIRETORIO_CACHE, chave)
+        arquivos = {nome: os.path.join(pasta, f"{nome}.npy") for nome in tamanhos}
+
+        if all(os.path.exists(arquivo) for arquivo in arquivos.values()):
+            pools = {
+                nome: np.load(arquivo, mmap_mode="r")
+                for nome, arquivo in arquivos.items()
+            }
+            vocabulario = cls(pools, seed, tamanhos)
+        else:
+            print(f"Gerando vocabulário {chave}...")
+            vocabulario = cls.construir(locales, seed, tamanhos)
+            vocabulario.salvar(pasta)
+
+        _VOCABULARIOS[chave] = vocabulario
+        return vocabulario
+
+    def salvar(self, pasta):
+        """
+        Salva cada pool em um arquivo .npy dentro da pasta informada.
+        """
+        os.makedirs(pasta, exist_ok=True)
+        for nome, pool in self.pools.items():
+            # Grava em arquivo temporário para não deixar um pool incompleto
+            # visível a outros processos
+            temporario = os.path.join(pasta, f".{nome}.{os.getpid()}.npy")
+            np.save(temporario, np.asarray(pool))
+            os.replace(temporario, os.path.join(pasta, f"{nome}.npy"))
+
+    def sortear(self, pool, rng):
+        """
+        Sorteia um texto de um pool usando um random.Random (ou o módulo random).
+        """
+        valores = self.pools[pool]
+        return str(valores[rng.randrange(len(valores))])
+
+    def amostrar(self, pool, n, rng):
+        """
+        Sorteia n textos de um pool de uma vez usando um numpy.random.Generator.
+        """
+        valores = self.pools[pool]
+        return valores[rng.integers(0, len(valores), size=n)].tolist()